@@ -1,2 +1,3 @@
 from .aliasing_compensation_techniques import FullUpsamplingAliasingCompensation, LowpassAliasingCompensation, \
-    ReducedUpsamplingAliasingCompensation, NoAliasingCompensation
+    ReducedUpsamplingAliasingCompensation, NoAliasingCompensation, PreprocessingCache
+from .polyphase_resampling import PolyphaseResampling
@@ -1,5 +1,8 @@
+import threading
+import numpy
 import sumpf
 import math
+import nlsp
 
 
 class AliasingCompensation(object):
@@ -24,8 +27,10 @@ class AliasingCompensation(object):
             self._maximum_harmonics = 1
         else:
             self._maximum_harmonics = maximum_harmonics
+        self._preprocessing_cache = None
+        self._preprocessing_output = None
 
-    @sumpf.Input(data_type=int)
+    @sumpf.Input(data_type=int, observers=["GetPreprocessingOutput", "_GetAttenuation"])
     def SetMaximumHarmonics(self, maximum_harmonics=None):
         """
         Sets the maximum harmonics until which the aliasing compensation has to be compensated for.
@@ -33,6 +38,8 @@ class AliasingCompensation(object):
         :param maximum_harmonics: the maximum harmonics introduced by the nonlinear model
         :type maximum_harmonics: int
         """
+        if maximum_harmonics != self._maximum_harmonics:
+            self._preprocessing_output = None
         self._maximum_harmonics = maximum_harmonics
 
     @sumpf.Input(data_type=sumpf.Signal, observers=["GetPreprocessingOutput"])
@@ -43,16 +50,30 @@ class AliasingCompensation(object):
         :param input_signal: the input signal of the preprocessing unit
         :type preprocessing_input: sumpf.Signal()
         """
+        if preprocessing_input is not self._input_signal:
+            self._preprocessing_output = None
         self._input_signal = preprocessing_input
 
     @sumpf.Output(data_type=sumpf.Signal)
     def GetPreprocessingOutput(self):
         """
-        Gets the output signal of the preprocessing aliasing compensation.
+        Gets the output signal of the preprocessing aliasing compensation. The output is kept until the input signal or
+        the maximum harmonics are changed, so that it is not computed again, when it is requested several times.
 
         :return: the output signal of the preprocessing aliasing compensation
         :rtype: sumpf.Signal()
         """
+        if self._preprocessing_output is None:
+            self._preprocessing_output = self._Preprocess()
+        return self._preprocessing_output
+
+    def _Preprocess(self):
+        """
+        This method can be overridden in the derived classes. Compute the output signal of the preprocessing unit.
+
+        :return: the output signal of the preprocessing unit
+        :rtype: sumpf.Signal()
+        """
         return self._input_signal
 
     @sumpf.Input(data_type=sumpf.Signal, observers=["GetPostprocessingOutput"])
@@ -78,13 +99,111 @@ class AliasingCompensation(object):
     @sumpf.Output(float)
     def _GetAttenuation(self):
         """
-        Get the attenuation factor.
+        Get the attenuation factor, which is the ratio of the sampling rates of the input and the output of the
+        preprocessing unit. It is computed from the upsampling factor, so that the input does not have to be resampled.
 
         :return: the attenuation factor
         :rtype: float
         """
-        attenuation = self._input_signal.GetSamplingRate() / self.GetPreprocessingOutput().GetSamplingRate()
-        return attenuation
+        return 1.0 / self._GetUpsamplingFactor()
+
+    def _SetPreprocessingCache(self, preprocessing_cache):
+        """
+        Set a cache, which is shared with the aliasing compensations of the other branches of a model, so that the
+        preprocessing of the same input signal is computed only once for all branches with the same parameters.
+
+        :param preprocessing_cache: the shared cache or None
+        :type preprocessing_cache: PreprocessingCache
+        """
+        self._preprocessing_cache = preprocessing_cache
+
+    def _GetPreprocessed(self, input_data, key, compute):
+        """
+        Get the preprocessed input from the cache of the model, or compute it, if no cache has been set. If the
+        preprocessed input is computed, it is taken from the output cache, which is shared by all models, if the same
+        input has been preprocessed with the same parameters before.
+
+        :param input_data: the input signal or array of the preprocessing
+        :param key: a hashable key, which identifies the parameters of the preprocessing
+        :param compute: a function without parameters, which computes the preprocessed input
+        :return: the preprocessed input
+        """
+        output_cache = nlsp.common.helper_functions_private.get_output_cache()
+        if output_cache is not None:
+            compute_uncached = compute
+            compute = lambda: output_cache.GetOutput(input_data=input_data, key=key, compute=compute_uncached)
+        if self._preprocessing_cache is None:
+            return compute()
+        return self._preprocessing_cache.GetOutput(input_data=input_data, key=key, compute=compute)
+
+    def _GetUpsamplingFactor(self):
+        """
+        Get the factor, by which the sampling rate is increased in the preprocessing unit.
+
+        :return: the upsampling factor
+        :rtype: int
+        """
+        return 1
+
+    def _GetPreprocessingSamplingRate(self):
+        """
+        Get the sampling rate of the output of the preprocessing unit.
+
+        :return: the sampling rate
+        :rtype: float
+        """
+        return self._input_signal.GetSamplingRate() * self._GetUpsamplingFactor()
+
+    def _PreprocessArray(self, channels, sampling_rate):
+        """
+        Process an array of channels like the preprocessing unit processes the input signal. This is used to simulate
+        models on arrays without creating sumpf signals.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :param sampling_rate: the sampling rate of the input channels
+        :return: the preprocessed channels, whose sampling rate is sampling_rate * self._GetUpsamplingFactor()
+        """
+        return channels
+
+    def _PostprocessArray(self, channels, sampling_rate):
+        """
+        Process an array of channels like the postprocessing unit processes its input signal.
+
+        :param channels: the input channels at the preprocessed sampling rate
+        :param sampling_rate: the sampling rate of the input of the preprocessing unit
+        :return: the postprocessed channels at the given sampling rate
+        """
+        return channels
+
+    def _GetArraySupport(self):
+        """
+        Get the number of neighboring samples on each side of a sample, on which the results of _PreprocessArray and
+        _PostprocessArray at that sample depend. It is counted at the sampling rate of the input of the preprocessing
+        unit. This allows to process a long signal in overlapping segments.
+
+        :return: the number of samples or None, if the results depend on the whole array
+        """
+        return 0
+
+    def _CreateBlockResamplers(self, channels, dtype):
+        """
+        Create the resamplers for the block processing of a signal, Eg. in the streaming models.
+
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        :return: a tuple of an upsampler and a downsampler, which keep their state between the blocks, or None, if
+                 the aliasing compensation does not resample the signal
+        """
+        return None
+
+    def _GetBlockDelay(self):
+        """
+        Get the delay, which is caused by the resamplers of _CreateBlockResamplers, in samples at the sampling rate of
+        the input of the preprocessing unit.
+
+        :return: the delay
+        """
+        return 0
 
 
 class FullUpsamplingAliasingCompensation(AliasingCompensation):
@@ -100,7 +219,8 @@ class FullUpsamplingAliasingCompensation(AliasingCompensation):
         :param maximum_harmonics: the maximum harmonics
         :type maximum_harmonics: int
         :param resampling_algorithm: the resampling algorithm
-        :type resampling_algorithm: Eg, sumpf.modules.ResampleSignal.SPECTRUM()
+        :type resampling_algorithm: Eg, sumpf.modules.ResampleSignal.SPECTRUM() or
+                                    nlsp.aliasing_compensation.PolyphaseResampling()
         """
         AliasingCompensation.__init__(self, input_signal=input_signal, maximum_harmonics=maximum_harmonics)
         if resampling_algorithm is None:
@@ -117,7 +237,8 @@ class FullUpsamplingAliasingCompensation(AliasingCompensation):
         :param maximum_harmonics: the maximum harmonics introduced by the nonlinear model
         :type maximum_harmonics: int
         :param resampling_algorithm: the resampling algorithm
-        :type resampling_algorithm: Eg. sumpf.modules.ResampleSignal.SPECTRUM()
+        :type resampling_algorithm: Eg. sumpf.modules.ResampleSignal.SPECTRUM() or
+                                    nlsp.aliasing_compensation.PolyphaseResampling()
         """
         if input_signal is None:
             input_signal = self._input_signal
@@ -128,18 +249,78 @@ class FullUpsamplingAliasingCompensation(AliasingCompensation):
         return self.__class__(input_signal=input_signal, maximum_harmonics=maximum_harmonics,
                               resampling_algorithm=resampling_algorithm)
 
-    @sumpf.Output(data_type=sumpf.Signal)
-    def GetPreprocessingOutput(self):
+    def _GetUpsamplingFactor(self):
+        """
+        Get the factor, by which the sampling rate is increased in the preprocessing unit.
+
+        :return: the upsampling factor, which is equal to the maximum harmonics
+        :rtype: int
+        """
+        return int(self._maximum_harmonics)
+
+    def _PreprocessArray(self, channels, sampling_rate):
+        """
+        Upsample an array of channels like the preprocessing unit upsamples the input signal.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :param sampling_rate: the sampling rate of the input channels
+        :return: the upsampled channels
+        """
+        factor = self._GetUpsamplingFactor()
+        return self._GetPreprocessed(channels, ("resample_array", numpy.shape(channels)[-1] * factor,
+                                                self._resampling_algorithm),
+                                     lambda: _upsample_array(channels, factor, self._resampling_algorithm))
+
+    def _PostprocessArray(self, channels, sampling_rate):
+        """
+        Downsample an array of channels like the postprocessing unit downsamples its input signal.
+
+        :param channels: the input channels at the upsampled sampling rate
+        :param sampling_rate: the sampling rate of the input of the preprocessing unit
+        :return: the downsampled channels
+        """
+        return _downsample_array(channels, self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _GetArraySupport(self):
+        """
+        Get the number of neighboring samples on each side of a sample, on which the resampling of an array at that
+        sample depends.
+
+        :return: the number of samples or None, if the resampling transforms the whole array
+        """
+        return _get_resampling_support(self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _CreateBlockResamplers(self, channels, dtype):
+        """
+        Create the resamplers for the block processing of a signal, which is only possible with the polyphase
+        resampling.
+
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        :return: a tuple of an upsampler and a downsampler or None, if the upsampling factor is 1
         """
-        Get the output signal of the preprocessing aliasing compensation.
+        return _create_block_resamplers(self._GetUpsamplingFactor(), self._resampling_algorithm, channels, dtype)
+
+    def _GetBlockDelay(self):
+        """
+        Get the delay, which is caused by the resamplers of _CreateBlockResamplers, in samples at the sampling rate of
+        the input of the preprocessing unit.
+
+        :return: the delay
+        """
+        return _get_block_resampling_delay(self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _Preprocess(self):
+        """
+        Upsample the input signal of the preprocessing unit.
 
         :return: the output signal of the preprocessing aliasing compensation
         :rtype: sumpf.Signal()
         """
-        resampling_rate = self._input_signal.GetSamplingRate() * self._maximum_harmonics
-        resampler = sumpf.modules.ResampleSignal(signal=self._input_signal, samplingrate=resampling_rate,
-                                                 algorithm=self._resampling_algorithm)
-        return resampler.GetOutput()
+        resampling_rate = self._GetPreprocessingSamplingRate()
+        return self._GetPreprocessed(self._input_signal, ("resample", resampling_rate, self._resampling_algorithm),
+                                     lambda: _resample_signal(self._input_signal, resampling_rate,
+                                                              self._resampling_algorithm))
 
     @sumpf.Output(data_type=sumpf.Signal)
     def GetPostprocessingOutput(self):
@@ -150,10 +331,8 @@ class FullUpsamplingAliasingCompensation(AliasingCompensation):
         :rtype: sumpf.Signal()
         """
         resampling_rate = self._input_signal.GetSamplingRate()
-        resampler = sumpf.modules.ResampleSignal(signal=self._postprocessing_input, samplingrate=resampling_rate,
-                                                 algorithm=self._resampling_algorithm)
         self.GetPostprocessingOutput.__name__ = 'GetPostprocessingOutput'
-        return resampler.GetOutput()
+        return _resample_signal(self._postprocessing_input, resampling_rate, self._resampling_algorithm)
 
     def GetPostprocessingOutput1(self):
         """
@@ -163,9 +342,7 @@ class FullUpsamplingAliasingCompensation(AliasingCompensation):
         :rtype: sumpf.Signal()
         """
         resampling_rate = self._input_signal.GetSamplingRate()
-        resampler = sumpf.modules.ResampleSignal(signal=self._postprocessing_input, samplingrate=resampling_rate,
-                                                 algorithm=self._resampling_algorithm)
-        return resampler.GetOutput()
+        return _resample_signal(self._postprocessing_input, resampling_rate, self._resampling_algorithm)
 
 
 class ReducedUpsamplingAliasingCompensation(AliasingCompensation):
@@ -181,7 +358,8 @@ class ReducedUpsamplingAliasingCompensation(AliasingCompensation):
         :param maximum_harmonics: the maximum harmonics
         :type maximum_harmonics: int
         :param resampling_algorithm: the resampling algorithm
-        :type resampling_algorithm: Eg, sumpf.modules.ResampleSignal.SPECTRUM()
+        :type resampling_algorithm: Eg, sumpf.modules.ResampleSignal.SPECTRUM() or
+                                    nlsp.aliasing_compensation.PolyphaseResampling()
         """
         AliasingCompensation.__init__(self, input_signal=input_signal, maximum_harmonics=maximum_harmonics)
         if resampling_algorithm is None:
@@ -189,18 +367,78 @@ class ReducedUpsamplingAliasingCompensation(AliasingCompensation):
         else:
             self._resampling_algorithm = resampling_algorithm
 
-    @sumpf.Output(data_type=sumpf.Signal)
-    def GetPreprocessingOutput(self):
+    def _GetUpsamplingFactor(self):
+        """
+        Get the factor, by which the sampling rate is increased in the preprocessing unit.
+
+        :return: the upsampling factor, which avoids aliasing in the baseband
+        :rtype: int
+        """
+        return int(math.ceil((self._maximum_harmonics + 1.0) / 2.0))
+
+    def _PreprocessArray(self, channels, sampling_rate):
+        """
+        Upsample an array of channels like the preprocessing unit upsamples the input signal.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :param sampling_rate: the sampling rate of the input channels
+        :return: the upsampled channels
         """
-        Gets the output signal of the preprocessing aliasing compensation.
+        factor = self._GetUpsamplingFactor()
+        return self._GetPreprocessed(channels, ("resample_array", numpy.shape(channels)[-1] * factor,
+                                                self._resampling_algorithm),
+                                     lambda: _upsample_array(channels, factor, self._resampling_algorithm))
+
+    def _PostprocessArray(self, channels, sampling_rate):
+        """
+        Downsample an array of channels like the postprocessing unit downsamples its input signal.
+
+        :param channels: the input channels at the upsampled sampling rate
+        :param sampling_rate: the sampling rate of the input of the preprocessing unit
+        :return: the downsampled channels
+        """
+        return _downsample_array(channels, self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _GetArraySupport(self):
+        """
+        Get the number of neighboring samples on each side of a sample, on which the resampling of an array at that
+        sample depends.
+
+        :return: the number of samples or None, if the resampling transforms the whole array
+        """
+        return _get_resampling_support(self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _CreateBlockResamplers(self, channels, dtype):
+        """
+        Create the resamplers for the block processing of a signal, which is only possible with the polyphase
+        resampling.
+
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        :return: a tuple of an upsampler and a downsampler or None, if the upsampling factor is 1
+        """
+        return _create_block_resamplers(self._GetUpsamplingFactor(), self._resampling_algorithm, channels, dtype)
+
+    def _GetBlockDelay(self):
+        """
+        Get the delay, which is caused by the resamplers of _CreateBlockResamplers, in samples at the sampling rate of
+        the input of the preprocessing unit.
+
+        :return: the delay
+        """
+        return _get_block_resampling_delay(self._GetUpsamplingFactor(), self._resampling_algorithm)
+
+    def _Preprocess(self):
+        """
+        Upsample the input signal of the preprocessing unit.
 
         :return: the output signal of the preprocessing aliasing compensation
         :rtype: sumpf.Signal()
         """
-        resampling_rate = self._input_signal.GetSamplingRate() * math.ceil((self._maximum_harmonics + 1.0) / 2.0)
-        resampler = sumpf.modules.ResampleSignal(signal=self._input_signal, samplingrate=resampling_rate,
-                                                 algorithm=self._resampling_algorithm)
-        return resampler.GetOutput()
+        resampling_rate = self._GetPreprocessingSamplingRate()
+        return self._GetPreprocessed(self._input_signal, ("resample", resampling_rate, self._resampling_algorithm),
+                                     lambda: _resample_signal(self._input_signal, resampling_rate,
+                                                              self._resampling_algorithm))
 
     @sumpf.Output(data_type=sumpf.Signal)
     def GetPostprocessingOutput(self):
@@ -211,9 +449,7 @@ class ReducedUpsamplingAliasingCompensation(AliasingCompensation):
         :rtype: sumpf.Signal()
         """
         resampling_rate = self._input_signal.GetSamplingRate()
-        resampler = sumpf.modules.ResampleSignal(signal=self._postprocessing_input, samplingrate=resampling_rate,
-                                                 algorithm=self._resampling_algorithm)
-        return resampler.GetOutput()
+        return _resample_signal(self._postprocessing_input, resampling_rate, self._resampling_algorithm)
 
     def CreateModified(self, input_signal=None, maximum_harmonics=None, resampling_algorithm=None):
         """
@@ -221,7 +457,8 @@ class ReducedUpsamplingAliasingCompensation(AliasingCompensation):
 
         :param input_signal: the input signal
         :param maximum_harmonics: the maximum harmonics introduced by the nonlinear model
-        :param resampling_algorithm: the resampling algorithms Eg. sumpf.modules.ResampleSignal.SPECTRUM()
+        :param resampling_algorithm: the resampling algorithms Eg. sumpf.modules.ResampleSignal.SPECTRUM() or
+                                     nlsp.aliasing_compensation.PolyphaseResampling()
         :return: the modified instance of the class
         """
         if input_signal is None:
@@ -256,14 +493,14 @@ class LowpassAliasingCompensation(AliasingCompensation):
         :type attenuation: int
         """
         AliasingCompensation.__init__(self, input_signal=input_signal, maximum_harmonics=maximum_harmonics)
+        self._filter_function_class = filter_function_class
         self._filter_function = sumpf.modules.FilterGenerator(filterfunction=filter_function_class(order=filter_order))
         self._attenuation = attenuation
         self._filter_order = filter_order
 
-    @sumpf.Output(data_type=sumpf.Signal)
-    def GetPreprocessingOutput(self):
+    def _Preprocess(self):
         """
-        Gets the output signal of the preprocessing aliasing compensation.
+        Filter the input signal of the preprocessing unit with the lowpass filter.
 
         :return: the output signal of the preprocessing aliasing compensation
         :rtype: sumpf.Signal()
@@ -280,6 +517,44 @@ class LowpassAliasingCompensation(AliasingCompensation):
             value2=self._filter_function.GetSpectrum()).GetResult()
         return sumpf.modules.InverseFourierTransform(spectrum=result_spectrum).GetSignal()
 
+    def _PreprocessArray(self, channels, sampling_rate):
+        """
+        Filter an array of channels with the lowpass filter of the preprocessing unit.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :param sampling_rate: the sampling rate of the input channels
+        :return: the filtered channels
+        """
+        length = numpy.shape(channels)[-1]
+        cutoff_frequency = ((sampling_rate / 2.0) / self._maximum_harmonics) \
+                           / (2.0 ** (self._attenuation / (6.0 * self._filter_order)))
+        self._filter_function.SetFrequency(frequency=cutoff_frequency)
+        self._filter_function.SetResolution(float(sampling_rate) / length)
+        self._filter_function.SetLength(length // 2 + 1)
+        filter_spectrum = numpy.asarray(self._filter_function.GetSpectrum().GetChannels()[0])
+        return numpy.fft.irfft(numpy.fft.rfft(channels) * filter_spectrum, n=length)
+
+    def _GetArraySupport(self):
+        """
+        Get the number of neighboring samples on each side of a sample, on which the filtering of an array at that
+        sample depends.
+
+        :return: None, since the filter is applied to the spectrum of the whole array
+        """
+        return None
+
+    def _CreateBlockResamplers(self, channels, dtype):
+        """
+        The lowpass filter is applied to the spectrum of the whole signal, so it can not be computed block by block.
+        """
+        raise NotImplementedError("The lowpass aliasing compensation does not support the block processing")
+
+    def _GetBlockDelay(self):
+        """
+        The lowpass filter is applied to the spectrum of the whole signal, so it can not be computed block by block.
+        """
+        raise NotImplementedError("The lowpass aliasing compensation does not support the block processing")
+
     def CreateModified(self, input_signal=None, maximum_harmonics=None, filter_function_class=None,
                        filter_order=None, attenuation=None):
         """
@@ -303,7 +578,7 @@ class LowpassAliasingCompensation(AliasingCompensation):
         if maximum_harmonics is None:
             maximum_harmonics = self._maximum_harmonics
         if filter_function_class is None:
-            filter_function_class = self._filter_function
+            filter_function_class = self._filter_function_class
         if filter_order is None:
             filter_order = self._filter_order
         if attenuation is None:
@@ -343,3 +618,135 @@ class NoAliasingCompensation(AliasingCompensation):
         if maximum_harmonics is None:
             maximum_harmonics = self._maximum_harmonics
         return self.__class__(input_signal=input_signal, maximum_harmonics=maximum_harmonics)
+
+
+def _resample_signal(signal, samplingrate, algorithm):
+    """
+    Resample a signal with an algorithm of sumpf.modules.ResampleSignal or with a PolyphaseResampling, which requires
+    an integer ratio of the sampling rates.
+
+    :param signal: the signal
+    :param samplingrate: the sampling rate of the resampled signal
+    :param algorithm: the resampling algorithm
+    :return: the resampled signal
+    :rtype: sumpf.Signal
+    """
+    if not isinstance(algorithm, nlsp.aliasing_compensation.PolyphaseResampling):
+        return sumpf.modules.ResampleSignal(signal=signal, samplingrate=samplingrate, algorithm=algorithm).GetOutput()
+    channels = nlsp.common.helper_functions_private.signal_to_array(signal)
+    if samplingrate >= signal.GetSamplingRate():
+        resampled = algorithm.Upsample(channels, int(round(float(samplingrate) / signal.GetSamplingRate())))
+    else:
+        resampled = algorithm.Downsample(channels, int(round(float(signal.GetSamplingRate()) / samplingrate)))
+    return nlsp.common.helper_functions_private.array_to_signal(resampled, samplingrate=samplingrate,
+                                                                labels=signal.GetLabels())
+
+
+def _upsample_array(channels, factor, algorithm):
+    """
+    Upsample an array of channels with a PolyphaseResampling or, for the algorithms of sumpf.modules.ResampleSignal,
+    by zero padding the spectra.
+    """
+    if isinstance(algorithm, nlsp.aliasing_compensation.PolyphaseResampling):
+        return algorithm.Upsample(channels, factor)
+    return nlsp.common.helper_functions_private.resample_array(channels, numpy.shape(channels)[-1] * factor)
+
+
+def _downsample_array(channels, factor, algorithm):
+    """
+    Downsample an array of channels with a PolyphaseResampling or, for the algorithms of sumpf.modules.ResampleSignal,
+    by cutting the spectra.
+    """
+    if isinstance(algorithm, nlsp.aliasing_compensation.PolyphaseResampling):
+        return algorithm.Downsample(channels, factor)
+    return nlsp.common.helper_functions_private.resample_array(channels, numpy.shape(channels)[-1] // factor)
+
+
+def _get_resampling_support(factor, algorithm):
+    """
+    Get the number of neighboring samples on each side of a sample at the lower sampling rate, on which the resampling
+    of an array by the given factor depends.
+
+    :return: the number of samples or None, if the algorithm transforms the whole array
+    """
+    if factor == 1:
+        return 0
+    if isinstance(algorithm, nlsp.aliasing_compensation.PolyphaseResampling):
+        return algorithm.GetTapsPerPhase()
+    return None
+
+
+def _create_block_resamplers(factor, algorithm, channels, dtype):
+    """
+    Create an upsampler and a downsampler for the block processing with a PolyphaseResampling.
+
+    :return: the tuple (upsampler, downsampler) or None, if the factor is 1
+    """
+    if factor == 1:
+        return None
+    _check_block_resampling(algorithm)
+    return (algorithm.GetUpsampler(factor, channels=channels, dtype=dtype),
+            algorithm.GetDownsampler(factor, channels=channels, dtype=dtype))
+
+
+def _get_block_resampling_delay(factor, algorithm):
+    """
+    Get the delay of the upsampler and the downsampler of a PolyphaseResampling together, in samples at the lower
+    sampling rate.
+    """
+    if factor == 1:
+        return 0
+    _check_block_resampling(algorithm)
+    return 2 * algorithm.GetTapsPerPhase()
+
+
+def _check_block_resampling(algorithm):
+    """
+    Raise an error, if the resampling algorithm can not be used for the block processing.
+    """
+    if not isinstance(algorithm, nlsp.aliasing_compensation.PolyphaseResampling):
+        raise NotImplementedError("The block processing of the upsampling aliasing compensations is only supported "
+                                  "with nlsp.aliasing_compensation.PolyphaseResampling")
+
+
+class PreprocessingCache(object):
+    """
+    A cache for the outputs of the preprocessing units of aliasing compensations, which is shared by the branches of a
+    model. All branches receive the same input signal, so branches, whose preprocessing has the same parameters (Eg.
+    the same resampling rate), can share the preprocessed signal. The cache only keeps the outputs for the most recent
+    input, which is identified by the object identity. Since arrays can be changed in place, the cache has to be
+    cleared, before an array, that may have been processed before, is preprocessed again.
+    """
+
+    def __init__(self):
+        self.__input_data = None
+        self.__outputs = {}
+        self.__lock = threading.Lock()
+
+    def GetOutput(self, input_data, key, compute):
+        """
+        Get the cached preprocessing output for the given input and parameters, or compute and cache it.
+
+        :param input_data: the input signal or array of the preprocessing
+        :param key: a hashable key, which identifies the parameters of the preprocessing
+        :param compute: a function without parameters, which computes the preprocessed input
+        :return: the preprocessed input
+        """
+        with self.__lock:
+            if input_data is not self.__input_data:
+                self.__input_data = input_data
+                self.__outputs = {}
+            outputs = self.__outputs
+            if key in outputs:
+                return outputs[key]
+        output = compute()
+        with self.__lock:
+            return outputs.setdefault(key, output)
+
+    def Clear(self):
+        """
+        Remove the outputs of the most recent input from the cache.
+        """
+        with self.__lock:
+            self.__input_data = None
+            self.__outputs = {}
@@ -0,0 +1,297 @@
+import threading
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
+
+class PolyphaseResampling(object):
+    """
+    A resampling algorithm for integer factors, which can be given as the resampling_algorithm parameter of the
+    FullUpsamplingAliasingCompensation and the ReducedUpsamplingAliasingCompensation instead of the algorithms of
+    sumpf.modules.ResampleSignal. The signals are upsampled and downsampled in the time domain with the polyphase
+    components of a Kaiser windowed sinc lowpass filter, whose cutoff frequency is the Nyquist frequency of the lower
+    sampling rate. Unlike the SPECTRUM algorithm, which transforms the whole signal, the computation time grows
+    linearly with the length of the signal and the signals can be processed in blocks with the upsamplers and
+    downsamplers of GetUpsampler and GetDownsampler.
+
+    The transition band of the lowpass filter becomes narrower with more taps per phase. The delay of the filter is
+    compensated by Upsample and Downsample, so their results are aligned with the input, while the upsamplers and
+    downsamplers for the block processing are causal and delay the signal by taps_per_phase samples of the lower
+    sampling rate.
+    """
+
+    def __init__(self, taps_per_phase=None, kaiser_beta=None):
+        """
+        :param taps_per_phase: the half length of the polyphase components of the lowpass filter
+        :param kaiser_beta: the shape parameter of the Kaiser window
+        """
+        if taps_per_phase is None:
+            self.__taps = 16
+        else:
+            self.__taps = taps_per_phase
+        if kaiser_beta is None:
+            self.__beta = 8.0
+        else:
+            self.__beta = float(kaiser_beta)
+        self.__lowpass_filters = {}
+        self.__lock = threading.Lock()
+
+    def GetTapsPerPhase(self):
+        """
+        Get the half length of the polyphase components of the lowpass filter.
+
+        :return: the number of taps per phase
+        """
+        return self.__taps
+
+    def GetKaiserBeta(self):
+        """
+        Get the shape parameter of the Kaiser window of the lowpass filter.
+
+        :return: the shape parameter
+        """
+        return self.__beta
+
+    def GetLowpassFilter(self, factor):
+        """
+        Get the lowpass filter for the given resampling factor. It has 2 * taps_per_phase * factor + 1 coefficients at
+        the higher sampling rate and a gain of 1.
+
+        :param factor: the resampling factor
+        :return: the one dimensional array of the filter coefficients
+        """
+        with self.__lock:
+            if factor not in self.__lowpass_filters:
+                center = self.__taps * factor
+                n = numpy.arange(2 * center + 1) - center
+                lowpass = numpy.sinc(n / float(factor)) * numpy.kaiser(2 * center + 1, self.__beta)
+                self.__lowpass_filters[factor] = lowpass / numpy.sum(lowpass)
+            return self.__lowpass_filters[factor]
+
+    def GetUpsampler(self, factor, channels=1, dtype=numpy.float64):
+        """
+        Get an upsampler, which keeps the state of the filter between the blocks of a signal.
+
+        :param factor: the upsampling factor
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        :return: the upsampler
+        :rtype: PolyphaseUpsampler
+        """
+        return PolyphaseUpsampler(lowpass_filter=self.GetLowpassFilter(factor), factor=factor,
+                                  taps_per_phase=self.__taps, channels=channels, dtype=dtype)
+
+    def GetDownsampler(self, factor, channels=1, dtype=numpy.float64):
+        """
+        Get a downsampler, which keeps the state of the filter between the blocks of a signal.
+
+        :param factor: the downsampling factor
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        :return: the downsampler
+        :rtype: PolyphaseDownsampler
+        """
+        return PolyphaseDownsampler(lowpass_filter=self.GetLowpassFilter(factor), factor=factor,
+                                    taps_per_phase=self.__taps, channels=channels, dtype=dtype)
+
+    def Upsample(self, channels, factor):
+        """
+        Upsample an array of channels without a delay.
+
+        :param channels: the channels Eg, numpy.array([channel1, channel2, ...])
+        :param factor: the upsampling factor
+        :return: the upsampled array, whose channels are factor times longer
+        """
+        shape, channels = self.__GetFloatArray(channels)
+        if factor == 1:
+            return channels.reshape(shape).copy()
+        upsampler = self.GetUpsampler(factor, channels=channels.shape[0], dtype=channels.dtype)
+        flushed = numpy.zeros((channels.shape[0], channels.shape[-1] + self.__taps), dtype=channels.dtype)
+        flushed[:, :channels.shape[-1]] = channels
+        return upsampler.ProcessBlock(flushed)[:, upsampler.GetDelay():].reshape(shape[:-1] + (-1,))
+
+    def Downsample(self, channels, factor):
+        """
+        Downsample an array of channels without a delay.
+
+        :param channels: the channels Eg, numpy.array([channel1, channel2, ...])
+        :param factor: the downsampling factor
+        :return: the downsampled array, whose channels have length // factor samples
+        """
+        shape, channels = self.__GetFloatArray(channels)
+        if factor == 1:
+            return channels.reshape(shape).copy()
+        length = channels.shape[-1] // factor
+        downsampler = self.GetDownsampler(factor, channels=channels.shape[0], dtype=channels.dtype)
+        flushed = numpy.zeros((channels.shape[0], (length + self.__taps) * factor), dtype=channels.dtype)
+        flushed[:, :length * factor] = channels[:, :length * factor]
+        return downsampler.ProcessBlock(flushed)[:, self.__taps:].reshape(shape[:-1] + (-1,))
+
+    def __GetFloatArray(self, channels):
+        """
+        Get the shape of the given array and the array as a two dimensional array of floats.
+        """
+        channels = numpy.asarray(channels)
+        if channels.dtype not in (numpy.float32, numpy.float64):
+            channels = channels.astype(numpy.float64)
+        return channels.shape, channels.reshape(-1, channels.shape[-1])
+
+    def __eq__(self, other):
+        return isinstance(other, PolyphaseResampling) and \
+               (self.__taps, self.__beta) == (other.GetTapsPerPhase(), other.GetKaiserBeta())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self.__taps, self.__beta))
+
+
+class PolyphaseUpsampler(object):
+    """
+    An upsampler for the block processing of a signal. Each block of the input signal is convolved with the polyphase
+    components of the lowpass filter, and the last samples of the input are kept as the state of the filter for the
+    next block. The upsampler is causal, so the output is delayed by GetDelay samples.
+    """
+
+    def __init__(self, lowpass_filter, factor, taps_per_phase, channels=1, dtype=numpy.float64):
+        """
+        :param lowpass_filter: the coefficients of the lowpass filter, see PolyphaseResampling.GetLowpassFilter
+        :param factor: the upsampling factor
+        :param taps_per_phase: the half length of the polyphase components of the lowpass filter
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        """
+        self.__factor = factor
+        self.__history = 2 * taps_per_phase
+        # phases[p, d] is the coefficient of the input sample j - d in the output sample j * factor + p
+        padded = numpy.zeros((self.__history + 1) * factor)
+        padded[:len(lowpass_filter)] = factor * lowpass_filter
+        phases = padded.reshape(self.__history + 1, factor).T
+        self.__phases = numpy.ascontiguousarray(phases[:, ::-1].T).astype(dtype)
+        self.__state = numpy.zeros((channels, self.__history), dtype=dtype)
+        self.__extended = None
+        self.__windows = None
+
+    def GetFactor(self):
+        """
+        Get the upsampling factor.
+
+        :return: the upsampling factor
+        """
+        return self.__factor
+
+    def GetDelay(self):
+        """
+        Get the delay of the output in samples of the upsampled signal.
+
+        :return: the delay
+        """
+        return self.__history // 2 * self.__factor
+
+    def Reset(self):
+        """
+        Reset the state of the filter, so the next block is treated as the beginning of a new signal.
+        """
+        self.__state[:] = 0.0
+
+    def ProcessBlock(self, block, out=None):
+        """
+        Upsample a block of the input signal. The intermediate buffer is kept for the next block of the same length,
+        so no arrays are allocated, if an output array is given.
+
+        :param block: the array of the shape (channels, samples)
+        :param out: an optional C contiguous array of the shape (channels, samples * factor), to which the upsampled
+                    block is written
+        :return: the upsampled array of the shape (channels, samples * factor)
+        """
+        channels, samples = numpy.shape(block)
+        if self.__extended is None or self.__extended.shape[-1] != self.__history + samples:
+            self.__extended = numpy.zeros((channels, self.__history + samples), dtype=self.__state.dtype)
+            # windows[c, j] contains the input samples j - history ... j of the block
+            self.__windows = as_strided(self.__extended, shape=(channels, samples, self.__history + 1),
+                                        strides=(self.__extended.strides[0], self.__extended.strides[1],
+                                                 self.__extended.strides[1]))
+        self.__extended[:, :self.__history] = self.__state
+        self.__extended[:, self.__history:] = block
+        if out is None:
+            out = numpy.empty((channels, samples * self.__factor), dtype=self.__state.dtype)
+        numpy.dot(self.__windows, self.__phases, out=out.reshape(channels, samples, self.__factor))
+        self.__state[:] = self.__extended[:, samples:]
+        return out
+
+
+class PolyphaseDownsampler(object):
+    """
+    A downsampler for the block processing of a signal. Only every factor-th sample of the lowpass filtered signal is
+    computed, and the last samples of the input are kept as the state of the filter for the next block. The lengths
+    of the blocks must be multiples of the downsampling factor. The downsampler is causal, so the output is delayed by
+    GetDelay samples.
+    """
+
+    def __init__(self, lowpass_filter, factor, taps_per_phase, channels=1, dtype=numpy.float64):
+        """
+        :param lowpass_filter: the coefficients of the lowpass filter, see PolyphaseResampling.GetLowpassFilter
+        :param factor: the downsampling factor
+        :param taps_per_phase: the half length of the polyphase components of the lowpass filter
+        :param channels: the number of channels of the blocks
+        :param dtype: the data type of the blocks
+        """
+        self.__factor = factor
+        self.__taps = taps_per_phase
+        # the filter is symmetric, so it does not have to be reversed for the convolution
+        self.__lowpass_filter = numpy.asarray(lowpass_filter, dtype=dtype)
+        self.__state = numpy.zeros((channels, len(lowpass_filter) - 1), dtype=dtype)
+        self.__extended = None
+        self.__windows = None
+
+    def GetFactor(self):
+        """
+        Get the downsampling factor.
+
+        :return: the downsampling factor
+        """
+        return self.__factor
+
+    def GetDelay(self):
+        """
+        Get the delay of the output in samples of the downsampled signal.
+
+        :return: the delay
+        """
+        return self.__taps
+
+    def Reset(self):
+        """
+        Reset the state of the filter, so the next block is treated as the beginning of a new signal.
+        """
+        self.__state[:] = 0.0
+
+    def ProcessBlock(self, block, out=None):
+        """
+        Downsample a block of the input signal. The intermediate buffer is kept for the next block of the same length,
+        so no arrays are allocated, if an output array is given.
+
+        :param block: the array of the shape (channels, samples), whose number of samples is a multiple of the factor
+        :param out: an optional C contiguous array of the shape (channels, samples // factor), to which the downsampled
+                    block is written
+        :return: the downsampled array of the shape (channels, samples // factor)
+        """
+        channels, length = numpy.shape(block)
+        if length % self.__factor != 0:
+            raise ValueError("The length of the blocks must be a multiple of the downsampling factor")
+        history = self.__state.shape[-1]
+        samples = length // self.__factor
+        if self.__extended is None or self.__extended.shape[-1] != history + length:
+            self.__extended = numpy.zeros((channels, history + length), dtype=self.__state.dtype)
+            # windows[c, j] contains the input samples j * factor - len(filter) + 1 ... j * factor of the block
+            self.__windows = as_strided(self.__extended, shape=(channels, samples, len(self.__lowpass_filter)),
+                                        strides=(self.__extended.strides[0],
+                                                 self.__factor * self.__extended.strides[1],
+                                                 self.__extended.strides[1]))
+        self.__extended[:, :history] = self.__state
+        self.__extended[:, history:] = block
+        if out is None:
+            out = numpy.empty((channels, samples), dtype=self.__state.dtype)
+        numpy.dot(self.__windows, self.__lowpass_filter, out=out)
+        self.__state[:] = self.__extended[:, length:]
+        return out
@@ -1,5 +1,8 @@
 import evaluations as evaluations
 import helper_functions_private
+import block_convolution
+import precision
+import convolution_strategy
 import helper_functions
 import evaluation_systemidentification as evaluate_systemidentification
 import sumpf_extensions as sumpf
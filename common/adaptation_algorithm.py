@@ -1,5 +1,6 @@
 import numpy
 import sumpf
+import nlsp
 
 
 class FIRAdaptationAlgorithm(object):
@@ -9,7 +10,7 @@ class FIRAdaptationAlgorithm(object):
 
     def __init__(self, input_signal=None, desired_output=None, filter_length=None, initialcoefficients=None,
                  step_size=None,
-                 leakage=None, iteration_cycle=None):
+                 leakage=None, iteration_cycle=None, precision=None):
         """
         :param input_signal: the input signal
         :type input_signal: sumpf.Signal()
@@ -25,6 +26,8 @@ class FIRAdaptationAlgorithm(object):
         :type leakage: Eg, 0-no leakage, <1-leaky filter design, >2-error
         :param iteration_cycle: the iteration cycles, multiple iteration cycles results in over adaptation
         :type iteration_cycle: int
+        :param precision: the precision of the adaptation Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken at the time of the adaptation
         """
         if input_signal is None:
             self._input_signal = sumpf.Signal()
@@ -51,6 +54,7 @@ class FIRAdaptationAlgorithm(object):
             self._step_size = 0.1
         else:
             self._step_size = step_size
+        self._precision = precision
 
     @sumpf.Input(sumpf.Signal, "GetFilterKernel")
     def SetInput(self, input_signal):
@@ -100,7 +104,7 @@ class MISO_NLMS_algorithm(FIRAdaptationAlgorithm):
     """
 
     def __init__(self, input_signal=None, desired_output=None, filter_length=None, step_size=None,
-                 initialcoefficients=None, leakage=None, iteration_cycle=None, epsilon=0.0001):
+                 initialcoefficients=None, leakage=None, iteration_cycle=None, epsilon=0.0001, precision=None):
         """
         :param input_signal: the input signal
         :type input_signal: sumpf.Signal()
@@ -118,12 +122,13 @@ class MISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         :type iteration_cycle: int
         :param epsilon: the regularization factor to avoid numerical errors when power of input is close to zero
         :type epsilon: float
+        :param precision: the precision of the adaptation Eg, nlsp.common.precision.DOUBLE or SINGLE
         """
         self.__epsilon = epsilon
         FIRAdaptationAlgorithm.__init__(self, input_signal=input_signal, desired_output=desired_output,
                                         step_size=step_size,
                                         filter_length=filter_length, initialcoefficients=initialcoefficients,
-                                        leakage=leakage, iteration_cycle=iteration_cycle)
+                                        leakage=leakage, iteration_cycle=iteration_cycle, precision=precision)
 
     @sumpf.Output(sumpf.Signal)
     def GetFilterKernel(self):
@@ -133,9 +138,10 @@ class MISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         :return: the identified filter kernel
         :rtype: sumpf.Signal()
         """
-        input_signals_array = self._input_signal.GetChannels()
+        dtype = nlsp.common.precision.get_real_dtype(self._precision)
+        input_signals_array = numpy.array(self._input_signal.GetChannels(), dtype=dtype)
         initCoeffs = self._initial_coeff
-        d = self._desired_output.GetChannels()[0]
+        d = numpy.array(self._desired_output.GetChannels()[0], dtype=dtype)
         M = self._filter_length
         channels = len(input_signals_array)
         step_size = self._step_size
@@ -144,20 +150,20 @@ class MISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         W = []
         N = len(input_signals_array[0]) - M + 1
         if initCoeffs is None:
-            init = numpy.zeros((channels, M))
+            init = numpy.zeros((channels, M), dtype=dtype)
         else:
-            init = initCoeffs.GetChannels()
+            init = numpy.array(initCoeffs.GetChannels(), dtype=dtype)
         leakstep = (1 - step_size * leak)
         u = []  # input signal array
         w = []  # filter coefficients array
         for channel in range(channels):
             u.append(input_signals_array[channel])
             w.append(init[channel])
-        E = numpy.zeros(N)
+        E = numpy.zeros(N, dtype=dtype)
         for n in xrange(N):
             normfac = [0, ] * channels
-            x = numpy.zeros((channels, M))
-            y = numpy.zeros((channels, M))
+            x = numpy.zeros((channels, M), dtype=dtype)
+            y = numpy.zeros((channels, M), dtype=dtype)
             for channel in range(channels):
                 x[channel] = numpy.flipud(u[channel][n:n + M])
                 normfac[channel] = 1. / (numpy.dot(x[channel], x[channel]) + eps)
@@ -181,7 +187,7 @@ class SISO_NLMS_algorithm(FIRAdaptationAlgorithm):
     """
 
     def __init__(self, input_signal=None, desired_output=None, filter_length=None, step_size=None,
-                 initialcoefficients=None, leakage=None, iteration_cycle=None, epsilon=0.0001):
+                 initialcoefficients=None, leakage=None, iteration_cycle=None, epsilon=0.0001, precision=None):
         """
         :param input_signal: the input signal
         :type input_signal: sumpf.Signal()
@@ -199,12 +205,13 @@ class SISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         :type iteration_cycle: int
         :param epsilon: the regularization factor to avoid numerical errors when power of input is close to zero
         :type epsilon: float
+        :param precision: the precision of the adaptation Eg, nlsp.common.precision.DOUBLE or SINGLE
         """
         self.__epsilon = epsilon
         FIRAdaptationAlgorithm.__init__(self, input_signal=input_signal, desired_output=desired_output,
                                         step_size=step_size,
                                         filter_length=filter_length, initialcoefficients=initialcoefficients,
-                                        leakage=leakage, iteration_cycle=iteration_cycle)
+                                        leakage=leakage, iteration_cycle=iteration_cycle, precision=precision)
 
     @sumpf.Output(sumpf.Signal)
     def GetFilterKernel(self):
@@ -214,9 +221,10 @@ class SISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         :return: the identified filter kernel
         :rtype: sumpf.Signal()
         """
-        d = self._desired_output.GetChannels()[0]
+        dtype = nlsp.common.precision.get_real_dtype(self._precision)
+        d = numpy.array(self._desired_output.GetChannels()[0], dtype=dtype)
         M = self._filter_length
-        input_signals_array = self._input_signal.GetChannels()
+        input_signals_array = numpy.array(self._input_signal.GetChannels(), dtype=dtype)
         channels = len(input_signals_array)
         initCoeffs = self._initial_coeff
         step_size = self._step_size
@@ -224,17 +232,17 @@ class SISO_NLMS_algorithm(FIRAdaptationAlgorithm):
         eps = self.__epsilon
         W = []
         if initCoeffs is None:
-            init = numpy.zeros((channels, M))
+            init = numpy.zeros((channels, M), dtype=dtype)
         else:
-            init = initCoeffs.GetChannels()
+            init = numpy.array(initCoeffs.GetChannels(), dtype=dtype)
         leakstep = (1 - step_size * leak)
 
         for channel in range(channels):
             u = input_signals_array[channel]
             N = len(u) - M + 1
             w = init[channel]  # Initial coefficients
-            y = numpy.zeros((channels, N))  # Filter output
-            e = numpy.zeros((channels, N))  # Error signal
+            y = numpy.zeros((channels, N), dtype=dtype)  # Filter output
+            e = numpy.zeros((channels, N), dtype=dtype)  # Error signal
             for n in xrange(N):
                 x = numpy.flipud(u[n:n + M])  # Slice to get view of M latest datapoints
                 y[channel][n] = numpy.dot(x, w)
@@ -0,0 +1,332 @@
+import numpy
+
+
+def next_power_of_two(length):
+    """
+    Get the smallest power of two, which is greater than or equal to the given length.
+
+    :param length: the length
+    :return: the power of two
+    """
+    result = 1
+    while result < length:
+        result *= 2
+    return result
+
+
+class OverlapSaveConvolution(object):
+    """
+    A class to convolve a signal, which is given in blocks of fixed length, with a filter kernel using the overlap-save
+    method. The input history, which is needed to compute the following blocks, is kept between the calls, so that the
+    memory consumption does not depend on the length of the whole signal.
+    """
+
+    def __init__(self, filter_kernel=None, block_length=None, dtype=numpy.float64):
+        """
+        :param filter_kernel: the filter kernel Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :param block_length: the number of samples per block
+        :param dtype: the data type of the buffers and the output Eg, numpy.float64 or numpy.float32
+        """
+        if filter_kernel is None:
+            filter_kernel = numpy.ones(1)
+        if block_length is None:
+            block_length = 2 ** 10
+        self._dtype = numpy.dtype(dtype)
+        self._complex_dtype = numpy.result_type(self._dtype, numpy.complex64)
+        self._filter_kernel = numpy.atleast_2d(numpy.asarray(filter_kernel, dtype=numpy.float64))
+        self._block_length = block_length
+        self._fft_length = next_power_of_two(block_length + self._filter_kernel.shape[-1] - 1)
+        self._filter_spectrum = numpy.fft.rfft(self._filter_kernel, n=self._fft_length).astype(self._complex_dtype)
+        self._buffer = None
+
+    def GetBlockLength(self):
+        """
+        Get the number of samples per block.
+
+        :return: the block length
+        """
+        return self._block_length
+
+    def GetLatency(self):
+        """
+        Get the latency of the convolution in samples, which is additional to the waiting time for a full block.
+
+        :return: the latency
+        """
+        return 0
+
+    def Reset(self):
+        """
+        Reset the state of the convolution, so the next block is treated as the beginning of a new signal.
+        """
+        self._buffer = None
+
+    def ProcessBlock(self, block):
+        """
+        Convolve the next block of the input signal with the filter kernel.
+
+        :param block: the input block Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :return: the output block, which has the same shape as the input block
+        """
+        block = numpy.asarray(block, dtype=self._dtype)
+        if block.shape[-1] != self._block_length:
+            raise ValueError("The length of the block must be equal to the block length of the convolution")
+        channels = numpy.atleast_2d(block)
+        if self._buffer is None or self._buffer.shape[0] != channels.shape[0]:
+            self._buffer = numpy.zeros((channels.shape[0], self._fft_length), dtype=self._dtype)
+        self._buffer[:, :-self._block_length] = self._buffer[:, self._block_length:]
+        self._buffer[:, -self._block_length:] = channels
+        spectrum = numpy.fft.rfft(self._buffer).astype(self._complex_dtype, copy=False) * self._filter_spectrum
+        output = numpy.fft.irfft(spectrum, n=self._fft_length)[:, -self._block_length:].astype(self._dtype,
+                                                                                              copy=False)
+        if block.ndim == 1 and output.shape[0] == 1:
+            return output[0]
+        return output
+
+
+class PartitionedConvolution(object):
+    """
+    A class to convolve a signal, which is given in blocks of fixed length, with a long filter kernel using a
+    partitioned convolution. The kernel is split into a head of short partitions, which have the length of a block, and
+    a tail of partitions, whose lengths double from level to level up to the maximum partition length. Each level is
+    computed with a frequency domain delay line, so the latency is one block. If the maximum partition length is equal
+    to the block length, the kernel is partitioned uniformly.
+
+    The computation of a level, whose partitions are longer than a block, is distributed over the blocks, until its
+    result is needed in the output, so that the effort of the long transforms does not pile up in the blocks, that
+    complete the partitions of several levels. With the default two partitions per level, the computation of each
+    level is spread over all blocks of its period. So the worst case effort per block stays close to the average
+    effort, which is bounded by the maximum partition length, while the effort of the delay lines grows with the
+    length of the kernel divided by the maximum partition length.
+    """
+
+    def __init__(self, filter_kernel=None, block_length=None, maximum_partition_length=None, partitions_per_level=2,
+                 dtype=numpy.float64):
+        """
+        :param filter_kernel: the filter kernel Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :param block_length: the number of samples per block, which is the length of the head partitions
+        :param maximum_partition_length: the maximum length of the tail partitions, if it is None, 16 times the block
+                                         length is taken
+        :param partitions_per_level: the number of partitions of the same length, before the length is doubled. The
+                                     computation of the levels can only be distributed over the blocks, if it is at
+                                     least 2
+        :param dtype: the data type of the buffers and the output Eg, numpy.float64 or numpy.float32
+        """
+        if filter_kernel is None:
+            filter_kernel = numpy.ones(1)
+        if block_length is None:
+            block_length = 2 ** 8
+        self._dtype = numpy.dtype(dtype)
+        self._filter_kernel = numpy.atleast_2d(numpy.asarray(filter_kernel, dtype=numpy.float64))
+        self._block_length = block_length
+        kernel_length = self._filter_kernel.shape[-1]
+        if maximum_partition_length is None:
+            maximum_partition_length = 2 ** 4 * block_length
+        self._levels = []
+        offset = 0
+        partition_length = block_length
+        while offset < kernel_length:
+            remaining = int(numpy.ceil(float(kernel_length - offset) / partition_length))
+            if partition_length * 2 <= maximum_partition_length:
+                partitions = min(partitions_per_level, remaining)
+            else:
+                partitions = remaining
+            kernel = self._filter_kernel[:, offset:offset + partitions * partition_length]
+            self._levels.append(_PartitionLevel(filter_kernel=kernel, partition_length=partition_length,
+                                                partitions=partitions, offset=offset, block_length=block_length,
+                                                dtype=self._dtype))
+            offset += partitions * partition_length
+            if partition_length * 2 <= maximum_partition_length:
+                partition_length *= 2
+        self._accumulator_length = max([level.GetOutputOffset() + level.GetPartitionLength()
+                                        for level in self._levels])
+        self._accumulator = None
+
+    def GetBlockLength(self):
+        """
+        Get the number of samples per block.
+
+        :return: the block length
+        """
+        return self._block_length
+
+    def GetLatency(self):
+        """
+        Get the latency of the convolution in samples, which is additional to the waiting time for a full block.
+
+        :return: the latency
+        """
+        return 0
+
+    def GetPartitionLengths(self):
+        """
+        Get the lengths of the partitions, in which the filter kernel has been split.
+
+        :return: a list of partition lengths
+        """
+        lengths = []
+        for level in self._levels:
+            lengths.extend([level.GetPartitionLength()] * level.GetNumberOfPartitions())
+        return lengths
+
+    def _GetOperationCount(self):
+        """
+        Get an estimate of the number of arithmetic operations, which have been computed since the creation or the
+        last reset of the convolution, to verify the distribution of the effort over the blocks. A transform of the
+        length n is counted as n * log2(n) operations and a complex multiply-accumulate as one operation.
+
+        :return: the number of operations
+        """
+        return sum([level.GetOperationCount() for level in self._levels])
+
+    def Reset(self):
+        """
+        Reset the state of the convolution, so the next block is treated as the beginning of a new signal.
+        """
+        self._accumulator = None
+        for level in self._levels:
+            level.Reset()
+
+    def ProcessBlock(self, block):
+        """
+        Convolve the next block of the input signal with the filter kernel.
+
+        :param block: the input block Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :return: the output block
+        """
+        block = numpy.asarray(block, dtype=self._dtype)
+        if block.shape[-1] != self._block_length:
+            raise ValueError("The length of the block must be equal to the block length of the convolution")
+        channels = numpy.atleast_2d(block)
+        if self._accumulator is None:
+            output_channels = max(channels.shape[0], self._filter_kernel.shape[0])
+            self._accumulator = numpy.zeros((output_channels, self._accumulator_length), dtype=self._dtype)
+        for level in self._levels:
+            contribution = level.ProcessBlock(channels)
+            if contribution is not None:
+                start = level.GetOutputOffset()
+                self._accumulator[:, start:start + level.GetPartitionLength()] += contribution
+        output = self._accumulator[:, :self._block_length].copy()
+        self._accumulator[:, :-self._block_length] = self._accumulator[:, self._block_length:]
+        self._accumulator[:, -self._block_length:] = 0.0
+        if block.ndim == 1 and output.shape[0] == 1:
+            return output[0]
+        return output
+
+
+class _PartitionLevel(object):
+    """
+    A helper class for the PartitionedConvolution, which convolves the input with a part of the filter kernel, that is
+    split into partitions of equal length. The partitions are computed with a uniformly partitioned overlap-save
+    convolution, whose input is collected from the blocks of the signal until a partition length is reached.
+
+    The computation is distributed over several blocks: the input is transformed in the block, which completes a
+    partition, the products of the frequency domain delay line and the filter spectra are accumulated for a part of
+    the frequency bins in each block, and the result is transformed back in the last block. The number of blocks is
+    limited by the number of blocks per partition and by the time, until the result is needed in the output.
+    """
+
+    def __init__(self, filter_kernel, partition_length, partitions, offset, block_length, dtype=numpy.float64):
+        """
+        :param filter_kernel: the part of the filter kernel, which is convolved in this level
+        :param partition_length: the length of the partitions
+        :param partitions: the number of partitions
+        :param offset: the position of the first sample of this part in the whole filter kernel
+        :param block_length: the length of the input blocks
+        :param dtype: the data type of the buffers
+        """
+        self._dtype = numpy.dtype(dtype)
+        self._complex_dtype = numpy.result_type(self._dtype, numpy.complex64)
+        self._partition_length = partition_length
+        self._partitions = partitions
+        self._offset = offset
+        self._block_length = block_length
+        kernel = numpy.zeros((filter_kernel.shape[0], partitions * partition_length))
+        kernel[:, :filter_kernel.shape[-1]] = filter_kernel
+        kernel = kernel.reshape((kernel.shape[0], partitions, partition_length)).transpose((1, 0, 2))
+        # the spectra are reversed, so that they match the order of the input spectra in the delay line
+        self._filter_spectra = numpy.fft.rfft(kernel, n=2 * partition_length)[::-1].astype(self._complex_dtype)
+        # the result of the input up to the current block is needed after offset - partition_length + block_length
+        # samples, so the computation can take this many blocks in addition to the current one
+        self._steps = max(1, min(partition_length // block_length, (offset - partition_length) // block_length + 2))
+        self._bins = [(partition_length + 1) * i // self._steps for i in range(self._steps + 1)]
+        self._transform_cost = 2 * partition_length * int(numpy.log2(2 * partition_length))
+        self.Reset()
+
+    def GetPartitionLength(self):
+        """
+        Get the length of the partitions of this level.
+        """
+        return self._partition_length
+
+    def GetNumberOfPartitions(self):
+        """
+        Get the number of partitions of this level.
+        """
+        return self._partitions
+
+    def GetOutputOffset(self):
+        """
+        Get the position in the output accumulator, relative to the beginning of the current block, to which the
+        result of a computation of this level has to be added, when it is returned after the last step.
+        """
+        return self._offset - self._partition_length + self._block_length - (self._steps - 1) * self._block_length
+
+    def GetOperationCount(self):
+        """
+        Get the estimated number of arithmetic operations since the last reset. See
+        PartitionedConvolution._GetOperationCount.
+        """
+        return self._operations
+
+    def Reset(self):
+        """
+        Reset the collected input, the frequency domain delay line and the pending computation.
+        """
+        self._buffer = None
+        self._delay_line = None
+        self._spectrum = None
+        self._position = 0
+        self._index = self._partitions - 1
+        self._step = None
+        self._operations = 0
+
+    def ProcessBlock(self, channels):
+        """
+        Collect the given block and compute the next step of the pending computation of this level.
+
+        :param channels: the two dimensional input block
+        :return: the contribution of length partition_length or None, if the computation is not yet complete
+        """
+        if self._buffer is None:
+            self._buffer = numpy.zeros((channels.shape[0], 2 * self._partition_length), dtype=self._dtype)
+            # every spectrum is stored twice, so that the last spectra are a contiguous view in the order of the time
+            self._delay_line = numpy.zeros((2 * self._partitions, channels.shape[0], self._partition_length + 1),
+                                           dtype=self._complex_dtype)
+            self._spectrum = numpy.zeros((max(channels.shape[0], self._filter_spectra.shape[1]),
+                                          self._partition_length + 1), dtype=self._complex_dtype)
+        start = self._partition_length + self._position
+        self._buffer[:, start:start + self._block_length] = channels
+        self._position += self._block_length
+        if self._position == self._partition_length:
+            self._position = 0
+            self._index = (self._index + 1) % self._partitions
+            spectrum = numpy.fft.rfft(self._buffer)
+            self._delay_line[self._index] = spectrum
+            self._delay_line[self._index + self._partitions] = spectrum
+            self._buffer[:, :self._partition_length] = self._buffer[:, self._partition_length:]
+            self._operations += self._transform_cost
+            self._step = 0
+        if self._step is None:
+            return None
+        low, high = self._bins[self._step], self._bins[self._step + 1]
+        delay_line = self._delay_line[self._index + 1:self._index + 1 + self._partitions, :, low:high]
+        self._spectrum[:, low:high] = numpy.sum(delay_line * self._filter_spectra[:, :, low:high], axis=0)
+        self._operations += self._partitions * self._spectrum.shape[0] * (high - low)
+        if self._step < self._steps - 1:
+            self._step += 1
+            return None
+        self._step = None
+        self._operations += self._transform_cost
+        return numpy.fft.irfft(self._spectrum, n=2 * self._partition_length)[:, self._partition_length:].astype(
+            self._dtype, copy=False)
@@ -0,0 +1,228 @@
+import math
+import timeit
+import numpy
+from block_convolution import next_power_of_two
+
+
+def next_fast_length(length):
+    """
+    Get the smallest 5-smooth number, which is greater than or equal to the given length. The Fourier transforms of
+    numpy are fast for lengths, whose prime factors are only 2, 3 and 5, so zero padding the signals to such a length
+    is usually faster than transforming them at an arbitrary length, while the padding is much shorter than for the
+    next power of two.
+
+    :param length: the length
+    :return: the 5-smooth length
+    """
+    if length <= 6:
+        return max(int(length), 1)
+    best = next_power_of_two(length)
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            candidate = next_power_of_two(-(-length // power35)) * power35
+            if candidate < best:
+                best = candidate
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+class ConvolutionCostModel(object):
+    """
+    A cost model, which estimates the computation time of the direct convolution in the time domain and of the fast
+    convolution with Fourier transforms. The direct convolution is estimated to take direct_cost seconds per multiply
+    and accumulate operation, while the fast convolution takes fft_cost * L * log2(L) seconds per transform of length
+    L plus fft_overhead seconds per call. The default parameters are typical for a desktop computer, they can be
+    adapted to the host machine with the Calibrate method.
+    """
+
+    def __init__(self, direct_cost=None, fft_cost=None, fft_overhead=None):
+        """
+        :param direct_cost: the time of a multiply and accumulate operation of the direct convolution in seconds
+        :param fft_cost: the time of a Fourier transform divided by L * log2(L) in seconds
+        :param fft_overhead: the constant time of a call of the fast convolution in seconds
+        """
+        if direct_cost is None:
+            self.__direct_cost = 1.0e-9
+        else:
+            self.__direct_cost = direct_cost
+        if fft_cost is None:
+            self.__fft_cost = 2.0e-9
+        else:
+            self.__fft_cost = fft_cost
+        if fft_overhead is None:
+            self.__fft_overhead = 2.0e-5
+        else:
+            self.__fft_overhead = fft_overhead
+
+    def GetParameters(self):
+        """
+        Get the parameters of the cost model.
+
+        :return: a tuple (direct_cost, fft_cost, fft_overhead)
+        """
+        return self.__direct_cost, self.__fft_cost, self.__fft_overhead
+
+    def GetDirectCost(self, signal_length, kernel_length, channels=1):
+        """
+        Estimate the time of the direct convolution.
+
+        :param signal_length: the length of the signal
+        :param kernel_length: the length of the filter kernel
+        :param channels: the number of channels, which are convolved
+        :return: the estimated time in seconds
+        """
+        return self.__direct_cost * signal_length * kernel_length * channels
+
+    def GetFFTCost(self, signal_length, kernel_length, channels=1):
+        """
+        Estimate the time of the fast convolution, whose transform length is the 5-smooth length, which is sufficient
+        for a linear convolution. The transform of the filter kernel is not counted, since it can be cached.
+
+        :param signal_length: the length of the signal
+        :param kernel_length: the length of the filter kernel
+        :param channels: the number of channels, which are convolved
+        :return: the estimated time in seconds
+        """
+        length = next_fast_length(signal_length + kernel_length - 1)
+        return self.__fft_overhead + 2 * channels * self.__fft_cost * length * math.log(max(length, 2), 2)
+
+    def IsDirectFaster(self, signal_length, kernel_length, channels=1):
+        """
+        Decide, whether the direct convolution is expected to be faster than the fast convolution.
+
+        :param signal_length: the length of the signal
+        :param kernel_length: the length of the filter kernel
+        :param channels: the number of channels, which are convolved
+        :return: True, if the direct convolution shall be used
+        """
+        return self.GetDirectCost(signal_length, kernel_length, channels) < \
+               self.GetFFTCost(signal_length, kernel_length, channels)
+
+    def Calibrate(self, signal_length=2 ** 14, kernel_length=2 ** 6, repetitions=10):
+        """
+        Measure the time of the direct and the fast convolution on the host machine and adapt the parameters of the
+        cost model accordingly.
+
+        :param signal_length: the length of the test signal
+        :param kernel_length: the length of the test kernel for the direct convolution
+        :param repetitions: the number of repetitions of each measurement, of which the fastest is taken
+        """
+        random = numpy.random.RandomState(0)
+        signal = random.standard_normal(signal_length)
+        kernel = random.standard_normal(kernel_length)
+        length = next_fast_length(signal_length)
+        self.__fft_overhead = self.__Measure(lambda: numpy.fft.irfft(numpy.fft.rfft(signal[:8]), n=8), repetitions)
+        direct = self.__Measure(lambda: numpy.convolve(signal, kernel), repetitions)
+        self.__direct_cost = direct / float(signal_length * kernel_length)
+        fft = self.__Measure(lambda: numpy.fft.irfft(numpy.fft.rfft(signal, n=length), n=length), repetitions)
+        self.__fft_cost = max(fft - self.__fft_overhead, 0.0) / (2.0 * length * math.log(length, 2))
+
+    def __Measure(self, function, repetitions):
+        timer = timeit.default_timer
+        times = []
+        for i in range(repetitions):
+            start = timer()
+            function()
+            times.append(timer() - start)
+        return min(times)
+
+
+__default_cost_model = [ConvolutionCostModel()]
+
+
+def get_default_cost_model():
+    """
+    Get the cost model, which is used by the convolution strategies, that have not been given a cost model.
+
+    :return: the default cost model
+    :rtype: ConvolutionCostModel
+    """
+    return __default_cost_model[0]
+
+
+def set_default_cost_model(cost_model):
+    """
+    Set the cost model, which is used by the convolution strategies, that have not been given a cost model, Eg. a
+    cost model, that has been calibrated on the host machine.
+
+    :param cost_model: the cost model
+    :type cost_model: ConvolutionCostModel
+    """
+    __default_cost_model[0] = cost_model
+
+
+class ConvolutionStrategy(object):
+    """
+    A class, which computes the linear convolution of signals with a filter kernel and crops the result to the desired
+    length. Depending on the estimation of a cost model, the convolution is computed directly in the time domain, which
+    is faster for short kernels, or with Fourier transforms of a 5-smooth length.
+    """
+    AUTOMATIC = 0
+    DIRECT = 1
+    FFT = 2
+
+    def __init__(self, method=AUTOMATIC, cost_model=None):
+        """
+        :param method: the convolution method Eg, AUTOMATIC, DIRECT or FFT
+        :param cost_model: the cost model, which chooses the method in the AUTOMATIC mode, if it is None, the default
+                           cost model is taken at the time of the convolution
+        """
+        self.__method = method
+        self.__cost_model = cost_model
+
+    def GetMethod(self, signal_length, kernel_length, channels=1):
+        """
+        Get the method, which is used for the convolution of signals and kernels of the given lengths.
+
+        :param signal_length: the length of the signal
+        :param kernel_length: the length of the filter kernel
+        :param channels: the number of channels, which are convolved
+        :return: DIRECT or FFT
+        """
+        if self.__method != self.AUTOMATIC:
+            return self.__method
+        cost_model = self.__cost_model
+        if cost_model is None:
+            cost_model = get_default_cost_model()
+        if cost_model.IsDirectFaster(signal_length, kernel_length, channels):
+            return self.DIRECT
+        return self.FFT
+
+    def Convolve(self, signal, kernel, output_length=None, get_kernel_spectrum=None):
+        """
+        Compute the linear convolution of the signal channels with the kernel channels. The kernel must either have a
+        single channel, or as many channels as the signal.
+
+        :param signal: the signal channels Eg, numpy.array([channel1, channel2, ...])
+        :param kernel: the kernel channels Eg, numpy.array([kernel1, kernel2, ...])
+        :param output_length: the length, to which the result is cropped or zero padded, if it is None, the full
+                              length of the linear convolution is returned
+        :param get_kernel_spectrum: an optional function, which takes a transform length and returns the spectrum of
+                                    the kernel, Eg. from a cache of kernel spectra
+        :return: the convolved channels with the data type of the signal
+        """
+        signal = numpy.atleast_2d(signal)
+        kernel = numpy.atleast_2d(kernel)
+        full_length = signal.shape[-1] + kernel.shape[-1] - 1
+        if output_length is None:
+            output_length = full_length
+        channels = max(signal.shape[0], kernel.shape[0])
+        output = numpy.zeros((channels, output_length), dtype=signal.dtype)
+        length = min(output_length, full_length)
+        if self.GetMethod(signal.shape[-1], kernel.shape[-1], channels) == self.DIRECT:
+            for i in range(channels):
+                s = signal[i % signal.shape[0]]
+                k = kernel[i % kernel.shape[0]]
+                output[i, :length] = numpy.convolve(s, k)[:length]
+        else:
+            transform_length = next_fast_length(full_length)
+            if get_kernel_spectrum is None:
+                kernel_spectrum = numpy.fft.rfft(kernel, n=transform_length)
+            else:
+                kernel_spectrum = get_kernel_spectrum(transform_length)
+            spectrum = numpy.fft.rfft(signal, n=transform_length) * kernel_spectrum
+            output[:, :length] = numpy.fft.irfft(spectrum, n=transform_length)[:, :length]
+        return output
@@ -1,6 +1,10 @@
+import collections
+import hashlib
+import threading
 import numpy
 import math
 import sumpf
+import nlsp
 
 
 def cut_spectrum(input_spectrum, desired_frequency_range):
@@ -95,6 +99,9 @@ def append_zeros(input_signal, length=None):
     """
     if length is None:
         length = 2 ** int(math.ceil(math.log(len(input_signal), 2)))
+    if isinstance(input_signal, ArraySignal):
+        return ArraySignal(channels=append_zeros_array(input_signal.GetArray(), length),
+                           samplingrate=input_signal.GetSamplingRate(), labels=input_signal.GetLabels())
     zeros = length - len(input_signal)
     result = sumpf.Signal(channels=tuple([c + (0.0,) * zeros for c in input_signal.GetChannels()]),
                           samplingrate=input_signal.GetSamplingRate(),
@@ -102,6 +109,178 @@ def append_zeros(input_signal, length=None):
     return result
 
 
+def append_zeros_array(channels, length=None):
+    """
+    Appends zeros to the last axis of an array of channels until it has the given length. If no length is given,
+    zeros will be appended until the length is a power of 2.
+
+    :param channels: the channels as a numpy array Eg, numpy.array([channel1, channel2, ...])
+    :param length: the desired length
+    :return: the zero padded array
+    """
+    channels = numpy.asarray(channels)
+    if length is None:
+        length = 2 ** int(math.ceil(math.log(channels.shape[-1], 2)))
+    zeros = length - channels.shape[-1]
+    if zeros <= 0:
+        return channels
+    padding = [(0, 0)] * (channels.ndim - 1) + [(0, zeros)]
+    return numpy.pad(channels, padding, mode="constant")
+
+
+def resample_array(channels, length):
+    """
+    Resamples the channels of an array to the given length by zero padding or cutting their spectra. This is the array
+    equivalent of sumpf.modules.ResampleSignal with the SPECTRUM algorithm.
+
+    :param channels: the channels as a numpy array Eg, numpy.array([channel1, channel2, ...])
+    :param length: the length of the resampled channels
+    :return: the resampled array
+    """
+    channels = numpy.asarray(channels)
+    original_length = channels.shape[-1]
+    if length == original_length:
+        return channels
+    spectrum = numpy.fft.rfft(channels)
+    spectrum = spectrum[..., :length // 2 + 1]
+    return numpy.fft.irfft(spectrum, n=length) * (float(length) / original_length)
+
+
+class ArraySignal(object):
+    """
+    A signal, whose channels are kept in a contiguous float64 or float32 numpy array of the shape (channels, samples).
+    It provides the getter methods of sumpf.Signal, so it can be used in place of a sumpf signal in the array based
+    parts of the models, while the conversion of the samples to tuples of floats is only done, when the channels are
+    requested as tuples or when the signal is converted to a sumpf signal.
+    """
+
+    def __init__(self, channels=None, samplingrate=None, labels=None):
+        """
+        :param channels: the channels Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :param samplingrate: the sampling rate
+        :param labels: the labels of the channels
+        """
+        if channels is None:
+            channels = numpy.zeros((1, 2))
+        channels = numpy.atleast_2d(channels)
+        if channels.dtype not in (numpy.float32, numpy.float64):
+            channels = channels.astype(numpy.float64)
+        self.__channels = numpy.ascontiguousarray(channels)
+        if samplingrate is None:
+            self.__samplingrate = sumpf.config.get("default_samplingrate")
+        else:
+            self.__samplingrate = samplingrate
+        if labels is None:
+            self.__labels = ()
+        else:
+            self.__labels = tuple(labels)
+        self.__tuples = None
+
+    @staticmethod
+    def FromSignal(signal, dtype=None):
+        """
+        Create an array signal from a sumpf signal. If the given signal is already an array signal, its array is taken
+        without a copy, unless it has to be converted to another data type.
+
+        :param signal: the sumpf signal or array signal
+        :param dtype: the data type of the array, if it is None, numpy.float64 is used for sumpf signals
+        :return: the array signal
+        :rtype: ArraySignal
+        """
+        return ArraySignal(channels=signal_to_array(signal, dtype=dtype), samplingrate=signal.GetSamplingRate(),
+                           labels=signal.GetLabels())
+
+    def GetArray(self):
+        """
+        Get the channels as a numpy array, which must not be modified, since it is shared with the signal.
+
+        :return: the array of the shape (channels, samples)
+        """
+        return self.__channels
+
+    def GetChannels(self):
+        """
+        Get the channels as a tuple of tuples like sumpf.Signal.GetChannels.
+
+        :return: the channels
+        """
+        if self.__tuples is None:
+            self.__tuples = tuple(tuple(c) for c in self.__channels.tolist())
+        return self.__tuples
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate.
+
+        :return: the sampling rate
+        """
+        return self.__samplingrate
+
+    def GetLabels(self):
+        """
+        Get the labels of the channels.
+
+        :return: the labels
+        """
+        return self.__labels
+
+    def GetNumberOfChannels(self):
+        """
+        Get the number of channels.
+
+        :return: the number of channels
+        """
+        return self.__channels.shape[0]
+
+    def GetSignal(self):
+        """
+        Convert the array signal to a sumpf signal.
+
+        :return: the sumpf signal
+        :rtype: sumpf.Signal
+        """
+        return sumpf.Signal(channels=self.GetChannels(), samplingrate=self.__samplingrate, labels=self.__labels)
+
+    def __len__(self):
+        return self.__channels.shape[-1]
+
+
+def signal_to_array(signal, dtype=None):
+    """
+    Get the channels of a signal as a numpy array. The array of an ArraySignal is returned without a copy, if it has
+    the requested data type.
+
+    :param signal: the sumpf signal or array signal
+    :param dtype: the data type of the array, if it is None, the data type of an array signal is kept and
+                  numpy.float64 is used for sumpf signals
+    :return: the array of the shape (channels, samples)
+    """
+    if isinstance(signal, ArraySignal):
+        array = signal.GetArray()
+        if dtype is None or array.dtype == dtype:
+            return array
+        return array.astype(dtype)
+    if dtype is None:
+        dtype = numpy.float64
+    return numpy.array(signal.GetChannels(), dtype=dtype)
+
+
+def array_to_signal(channels, samplingrate, labels=()):
+    """
+    Convert an array of channels to a sumpf signal. The samples are converted with numpy.ndarray.tolist, which is much
+    faster than creating a tuple from the numpy scalars of each channel.
+
+    :param channels: the channels Eg, numpy.array([channel1, channel2, ...])
+    :param samplingrate: the sampling rate
+    :param labels: the labels of the channels
+    :return: the sumpf signal
+    :rtype: sumpf.Signal
+    """
+    channels = numpy.atleast_2d(numpy.asarray(channels))
+    return sumpf.Signal(channels=tuple(tuple(c) for c in channels.tolist()), samplingrate=samplingrate,
+                        labels=labels)
+
+
 class CheckEqualLength(object):
     """
     Check the length of two signals. In case of mismatch it will append zeros to make it equal.
@@ -181,6 +360,343 @@ class CheckEqualLength(object):
         self._changelength()
 
 
+class FilterSpectrumCache(object):
+    """
+    A cache for the spectra of a filter impulse response. The impulse response is resampled to the sampling rate of the
+    signal, which shall be filtered, and zero padded to the transform length, before its spectrum is computed. Since the
+    impulse response does not change between the inputs of a model, the resampled impulse responses and their spectra
+    are kept for the most recently used sampling rates and transform lengths.
+    """
+
+    def __init__(self, filter_impulseresponse=None, maximum_entries=4):
+        """
+        :param filter_impulseresponse: the filter impulse response
+        :param maximum_entries: the maximum number of spectra, which are kept in the cache
+        """
+        if filter_impulseresponse is None:
+            self.__filter_impulseresponse = sumpf.modules.ImpulseGenerator(length=2 ** 8).GetSignal()
+        else:
+            self.__filter_impulseresponse = filter_impulseresponse
+        self.__maximum_entries = maximum_entries
+        self.__resampled = collections.OrderedDict()
+        self.__kernels = collections.OrderedDict()
+        self.__spectra = collections.OrderedDict()
+
+    def SetFilterImpulseResponse(self, filter_impulseresponse):
+        """
+        Set the filter impulse response and clear the cache.
+
+        :param filter_impulseresponse: the filter impulse response
+        """
+        self.__filter_impulseresponse = filter_impulseresponse
+        self.__resampled.clear()
+        self.__kernels.clear()
+        self.__spectra.clear()
+
+    def GetFilterImpulseResponse(self, sampling_rate=None):
+        """
+        Get the filter impulse response, which has been resampled to the given sampling rate.
+
+        :param sampling_rate: the sampling rate, if it is None, the original impulse response is returned
+        :return: the filter impulse response
+        :rtype: sumpf.Signal
+        """
+        if sampling_rate is None or sampling_rate == self.__filter_impulseresponse.GetSamplingRate():
+            return self.__filter_impulseresponse
+        return self.__GetCached(self.__resampled, sampling_rate, lambda: sumpf.modules.ResampleSignal(
+            signal=self.__filter_impulseresponse, samplingrate=sampling_rate).GetOutput())
+
+    def GetSpectrum(self, length, sampling_rate, dtype=numpy.complex128):
+        """
+        Get the spectrum of the resampled and zero padded filter impulse response as a numpy array of the shape
+        (channels, length // 2 + 1).
+
+        :param length: the transform length
+        :param sampling_rate: the sampling rate
+        :param dtype: the data type of the spectrum Eg, numpy.complex128 or numpy.complex64
+        :return: the spectrum
+        """
+        return self.__GetCached(self.__spectra, (length, sampling_rate, numpy.dtype(dtype)), lambda: numpy.fft.rfft(
+            signal_to_array(self.GetFilterImpulseResponse(sampling_rate)), n=length).astype(dtype, copy=False))
+
+    def GetLinearConvolution(self, channels, sampling_rate, output_length, convolution_strategy):
+        """
+        Compute the linear convolution of an array of channels with the resampled filter impulse response and crop it
+        to the given length. The convolution method is chosen by the given strategy, and the filter spectra for the
+        fast convolution are taken from the cache.
+
+        :param channels: the channels as a numpy array Eg, numpy.array([channel1, channel2, ...])
+        :param sampling_rate: the sampling rate of the channels
+        :param output_length: the length of the result
+        :param convolution_strategy: the convolution strategy
+        :type convolution_strategy: nlsp.common.convolution_strategy.ConvolutionStrategy
+        :return: the convolved channels
+        """
+        channels = numpy.atleast_2d(channels)
+        kernel = self.__GetCached(self.__kernels, sampling_rate,
+                                  lambda: signal_to_array(self.GetFilterImpulseResponse(sampling_rate)))
+        complex_dtype = numpy.result_type(channels.dtype, numpy.complex64)
+        return convolution_strategy.Convolve(channels, kernel, output_length=output_length,
+                                             get_kernel_spectrum=lambda length: self.GetSpectrum(length, sampling_rate,
+                                                                                                 dtype=complex_dtype))
+
+    def __GetCached(self, cache, key, compute):
+        """
+        Get an entry from the cache and mark it as most recently used. If the entry does not exist, it is computed and
+        the least recently used entry is evicted, if the cache is full.
+        """
+        if key in cache:
+            value = cache.pop(key)
+        else:
+            value = compute()
+            while len(cache) >= self.__maximum_entries:
+                cache.popitem(last=False)
+        cache[key] = value
+        return value
+
+
+class FilterConvolution(object):
+    """
+    Convolve a signal with a filter impulse response in the frequency domain. Like in the chain of CheckEqualLength,
+    FourierTransform, Multiply and InverseFourierTransform, both are zero padded to the length of the longer one and the
+    impulse response is resampled to the sampling rate of the signal. The filter spectra are taken from a
+    FilterSpectrumCache, so only the spectrum of the signal has to be computed for every new input.
+    If a convolution strategy is given, the linear convolution is computed instead of the circular one and it is
+    cropped to the length of the longer one of the signal and the impulse response.
+    """
+
+    def __init__(self, input_signal=None, filter_impulseresponse=None, cache_size=4, precision=None,
+                 convolution_strategy=None):
+        """
+        :param input_signal: the input signal
+        :param filter_impulseresponse: the filter impulse response
+        :param cache_size: the maximum number of filter spectra, which are kept in the cache
+        :param precision: the precision of the convolution Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken at the time of the convolution
+        :param convolution_strategy: the strategy for the linear convolution or None for the circular convolution
+        :type convolution_strategy: nlsp.common.convolution_strategy.ConvolutionStrategy
+        """
+        self.__precision = precision
+        self.__convolution_strategy = convolution_strategy
+        if input_signal is None:
+            self.__input_signal = sumpf.Signal()
+        else:
+            self.__input_signal = input_signal
+        self.__cache = FilterSpectrumCache(filter_impulseresponse=filter_impulseresponse, maximum_entries=cache_size)
+
+    @sumpf.Input(sumpf.Signal, "GetOutput")
+    def SetInput(self, input_signal):
+        """
+        Set the input signal.
+
+        :param input_signal: the input signal
+        :type input_signal: sumpf.Signal
+        """
+        self.__input_signal = input_signal
+
+    @sumpf.Input(sumpf.Signal, "GetOutput")
+    def SetFilterImpulseResponse(self, filter_impulseresponse):
+        """
+        Set the filter impulse response.
+
+        :param filter_impulseresponse: the filter impulse response
+        :type filter_impulseresponse: sumpf.Signal
+        """
+        self.__cache.SetFilterImpulseResponse(filter_impulseresponse)
+
+    @sumpf.Output(sumpf.Signal)
+    def GetOutput(self):
+        """
+        Get the filtered signal.
+
+        :return: the output signal
+        :rtype: sumpf.Signal
+        """
+        sampling_rate = self.__input_signal.GetSamplingRate()
+        length = max(len(self.__input_signal), len(self.__cache.GetFilterImpulseResponse(sampling_rate)))
+        complex_dtype = nlsp.common.precision.get_complex_dtype(self.__precision)
+        input_array = signal_to_array(self.__input_signal, dtype=nlsp.common.precision.get_real_dtype(self.__precision))
+        if self.__convolution_strategy is not None:
+            output = self.__cache.GetLinearConvolution(input_array, sampling_rate, length, self.__convolution_strategy)
+        else:
+            spectrum = numpy.fft.rfft(input_array, n=length).astype(complex_dtype, copy=False) * \
+                       self.__cache.GetSpectrum(length, sampling_rate, dtype=complex_dtype)
+            output = numpy.fft.irfft(spectrum, n=length)
+        return array_to_signal(output, samplingrate=sampling_rate, labels=self.__input_signal.GetLabels())
+
+
+class OutputCache(object):
+    """
+    A bounded cache for the outputs of nonlinear blocks and of the preprocessing units of aliasing compensations, which
+    is shared by all models. The outputs are identified by a hash of the content of the input and by a key of the
+    parameters of the computation, so that the outputs are reused, when the same excitation is processed again, Eg.
+    by new models during a system identification. The least recently used outputs are evicted, when the estimated
+    size of all cached outputs exceeds the given number of bytes. The cached outputs must not be modified.
+
+    Arrays and array signals are hashed on every request, since their content can be changed in place, while the
+    hashes of the immutable sumpf signals are kept for the most recent signals. The cache is not used by default, it
+    has to be enabled with set_output_cache, Eg. for repeated identifications with the same excitation.
+    """
+
+    def __init__(self, maximum_bytes=None, maximum_digests=16):
+        """
+        :param maximum_bytes: the maximum estimated size of the cached outputs in bytes, if it is None, 128MiB are taken
+        :param maximum_digests: the number of sumpf signals, whose hashes are kept, so that the same signal does not
+                                have to be hashed again
+        """
+        if maximum_bytes is None:
+            self.__maximum_bytes = 2 ** 27
+        else:
+            self.__maximum_bytes = maximum_bytes
+        self.__maximum_digests = maximum_digests
+        self.__outputs = collections.OrderedDict()
+        self.__digests = collections.OrderedDict()
+        self.__cached_bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+
+    def GetOutput(self, input_data, key, compute):
+        """
+        Get the cached output for the given input and parameters, or compute and cache it.
+
+        :param input_data: the input signal, array signal or array of the computation
+        :param key: a hashable key, which identifies the parameters of the computation
+        :param compute: a function without parameters, which computes the output
+        :return: the output
+        """
+        digest = self.__GetDigest(input_data)
+        with self.__lock:
+            entry = self.__outputs.pop((digest, key), None)
+            if entry is not None:
+                self.__outputs[(digest, key)] = entry
+                self.__hits += 1
+                return entry[0]
+            self.__misses += 1
+        output = compute()
+        size = self.__GetSize(output)
+        if size <= self.__maximum_bytes:
+            with self.__lock:
+                if (digest, key) not in self.__outputs:
+                    while self.__cached_bytes + size > self.__maximum_bytes:
+                        self.__cached_bytes -= self.__outputs.popitem(last=False)[1][1]
+                    self.__outputs[(digest, key)] = (output, size)
+                    self.__cached_bytes += size
+        return output
+
+    def GetHits(self):
+        """
+        Get the number of requests, which have been answered from the cache.
+
+        :return: the number of hits
+        """
+        return self.__hits
+
+    def GetMisses(self):
+        """
+        Get the number of requests, for which the output had to be computed.
+
+        :return: the number of misses
+        """
+        return self.__misses
+
+    def GetCachedBytes(self):
+        """
+        Get the estimated size of the cached outputs.
+
+        :return: the size in bytes
+        """
+        return self.__cached_bytes
+
+    def GetMaximumBytes(self):
+        """
+        Get the maximum estimated size of the cached outputs.
+
+        :return: the size in bytes
+        """
+        return self.__maximum_bytes
+
+    def ResetStatistics(self):
+        """
+        Reset the numbers of hits and misses.
+        """
+        self.__hits = 0
+        self.__misses = 0
+
+    def Clear(self):
+        """
+        Remove all outputs from the cache.
+        """
+        with self.__lock:
+            self.__outputs.clear()
+            self.__digests.clear()
+            self.__cached_bytes = 0
+
+    def __GetDigest(self, input_data):
+        """
+        Get a hash of the content of the input. The hashes of the most recent sumpf signals are kept together with the
+        signals, so that their identities cannot be reused by other objects. Arrays and array signals are always hashed
+        again, since their content may have been changed in place.
+        """
+        immutable = isinstance(input_data, sumpf.Signal)
+        if immutable:
+            with self.__lock:
+                if id(input_data) in self.__digests:
+                    entry = self.__digests.pop(id(input_data))
+                    self.__digests[id(input_data)] = entry
+                    return entry[1]
+        if isinstance(input_data, numpy.ndarray):
+            array = input_data
+            properties = ()
+        else:
+            array = signal_to_array(input_data)
+            properties = (input_data.GetSamplingRate(), tuple(input_data.GetLabels()))
+        array = numpy.ascontiguousarray(array)
+        digest = (hashlib.sha1(array.view(numpy.uint8)).hexdigest(), array.shape, array.dtype.str, properties)
+        if immutable:
+            with self.__lock:
+                self.__digests[id(input_data)] = (input_data, digest)
+                while len(self.__digests) > self.__maximum_digests:
+                    self.__digests.popitem(last=False)
+        return digest
+
+    def __GetSize(self, output):
+        """
+        Estimate the size of an output in bytes.
+        """
+        if isinstance(output, numpy.ndarray):
+            return output.nbytes
+        elif isinstance(output, ArraySignal):
+            return output.GetArray().nbytes
+        # the samples of a sumpf signal are Python floats, which take about 32 bytes including their tuple reference
+        return 32 * len(output) * max(len(output.GetChannels()), 1)
+
+
+# the output cache, which is shared by all models, or None, if the outputs shall not be cached
+__output_cache = [None]
+
+
+def set_output_cache(output_cache):
+    """
+    Set the output cache, which is shared by all nonlinear blocks and aliasing compensations. By default, no output
+    cache is set, so the caching has to be enabled explicitly Eg, set_output_cache(OutputCache()).
+
+    :param output_cache: the output cache or None to disable the caching
+    :type output_cache: OutputCache
+    """
+    __output_cache[0] = output_cache
+
+
+def get_output_cache():
+    """
+    Get the output cache, which is shared by all nonlinear blocks and aliasing compensations.
+
+    :return: the output cache or None, if the caching is disabled
+    :rtype: OutputCache
+    """
+    return __output_cache[0]
+
+
 def change_length_signal(signal, length=None):
     """
     A function to change the length of signal. If the length of the signal is greater than the length then signal length
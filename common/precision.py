@@ -0,0 +1,65 @@
+import numpy
+
+DOUBLE = "double"
+SINGLE = "single"
+
+# The lower bound of the Signal to Error Ratio in dB between the output of a model, that is simulated in single
+# precision, and the output of the same model in double precision, as it is computed by
+# nlsp.evaluations.CompareWithReference.GetSignaltoErrorRatio. The rounding errors of single precision are in the
+# order of 1e-7, which corresponds to roughly 140dB, but they are amplified by the powers of the nonlinear functions
+# and accumulated in the Fourier transforms, so 60dB are guaranteed for the models of this package, while the typical
+# Signal to Error Ratio is above 100dB.
+SINGLE_PRECISION_SER = 60.0
+
+__default_precision = [DOUBLE]
+
+
+def set_default_precision(precision):
+    """
+    Set the precision, which is used by the models and algorithms, that have not been given a precision explicitly.
+
+    :param precision: the precision Eg, DOUBLE or SINGLE
+    """
+    __check_precision(precision)
+    __default_precision[0] = precision
+
+
+def get_default_precision():
+    """
+    Get the precision, which is used by the models and algorithms, that have not been given a precision explicitly.
+
+    :return: the precision Eg, DOUBLE or SINGLE
+    """
+    return __default_precision[0]
+
+
+def get_real_dtype(precision=None):
+    """
+    Get the numpy data type of the real valued arrays for the given precision.
+
+    :param precision: the precision Eg, DOUBLE or SINGLE, if it is None, the default precision is taken
+    :return: numpy.float64 or numpy.float32
+    """
+    if precision is None:
+        precision = get_default_precision()
+    __check_precision(precision)
+    if precision == SINGLE:
+        return numpy.float32
+    return numpy.float64
+
+
+def get_complex_dtype(precision=None):
+    """
+    Get the numpy data type of the complex valued arrays, Eg. spectra, for the given precision.
+
+    :param precision: the precision Eg, DOUBLE or SINGLE, if it is None, the default precision is taken
+    :return: numpy.complex128 or numpy.complex64
+    """
+    if get_real_dtype(precision) == numpy.float32:
+        return numpy.complex64
+    return numpy.complex128
+
+
+def __check_precision(precision):
+    if precision not in (DOUBLE, SINGLE):
+        raise ValueError("The precision must either be DOUBLE or SINGLE")
@@ -1,3 +1,4 @@
+import numpy
 import sumpf
 
 
@@ -42,17 +43,13 @@ class SoftClipSignal(object):
         :return: the output signal
         :rtype: sumpf.Signal
         """
-        channels = []
-        for c in self.__signal.GetChannels():
-            channel = []
-            for s in c:
-                if s <= self.__thresholds[0]:
-                    channel.append(-1.0 + self.__power)
-                elif s >= self.__thresholds[1]:
-                    channel.append(1.0 - self.__power)
-                else:
-                    channel.append((1 - abs(s) * self.__power) * s)
-            channels.append(tuple(channel))
+        channels = numpy.array(self.__signal.GetChannels(), dtype=numpy.float64)
+        numpy.clip(channels, self.__thresholds[0], self.__thresholds[1], out=channels)
+        correction = numpy.abs(channels)
+        correction *= channels
+        correction *= self.__power
+        channels -= correction
+        channels = tuple(tuple(c) for c in channels.tolist())
         return sumpf.Signal(channels=tuple(channels), labels=self.__signal.GetLabels())
 
     @sumpf.Input(tuple, "GetOutput")
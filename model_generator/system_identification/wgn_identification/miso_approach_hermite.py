@@ -14,8 +14,10 @@ class MISOapproachusingHermite(WhiteGaussianNoiseIdentification):
         Get the array of decorrelated input signals using Hermite polynomial expansion.
         """
         decorrelated = []
+        hermite_series = nlsp.nonlinear_functions.PolynomialSeries()
         for branch in range(branches):
             nl = nlsp.nonlinear_function.Hermite(degree=branch + 1, input_signal=input_signal)
+            nl._SetPolynomialSeries(hermite_series)
             decorrelated.append(nl.GetOutput())
         return decorrelated
 
@@ -1 +1,7 @@
 from generate_nonlinearmodels import HammersteinGroupModel, HammersteinModel
+from streaming_models import StreamingHammersteinModel, StreamingHammersteinGroupModel, create_streaming_model
+from file_simulation import simulate_file
+from compiled_models import CompiledHammersteinGroupModel
+from parallel_simulation import simulate_parallel
+from realtime_processor import RealtimeProcessor
+from multirate_models import MultirateHammersteinGroupModel
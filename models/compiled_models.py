@@ -0,0 +1,204 @@
+import collections
+import numpy
+import nlsp
+
+
+class CompiledHammersteinGroupModel(object):
+    """
+    A flat execution plan of a Hammerstein group model for input signals of a fixed length and sampling rate. The
+    upsampling factors, the transform lengths, the resampled filter impulse responses and their spectra are determined
+    once, when the plan is compiled, and the buffers for the input, the branch signals and the output are allocated
+    in advance. Processing a signal does not involve the sumpf connector graph, so the effort per call does not depend
+    on the number of sumpf modules of the model, which makes the plan suitable for simulating many short signals.
+
+    The plan is a snapshot of the model. Changes of the nonlinear functions or filter impulse responses of the model
+    after the compilation are not reflected by the plan.
+    """
+
+    def __init__(self, nonlinear_functions, filter_impulseresponses, aliasing_compensation=None,
+                 downsampling_position=1, length=None, sampling_rate=None, signals=1, precision=None):
+        """
+        :param nonlinear_functions: the nonlinear functions Eg, [nonlinear_function1, nonlinear_function2, ...]
+        :param filter_impulseresponses: the filter impulse responses Eg, [impulse_response1, impulse_response2, ...]
+        :param aliasing_compensation: the aliasing compensation technique, instances of which are created for the
+                                      branches of the plan
+        :param downsampling_position: the downsampling position Eg, AFTERNONLINEARBLOCK or AFTERLINEARBLOCK
+        :param length: the number of samples of the input signals
+        :param sampling_rate: the sampling rate of the input signals
+        :param signals: the number of input signals, which are processed at once
+        :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE
+        """
+        if aliasing_compensation is None:
+            aliasing_compensation = nlsp.aliasing_compensation.NoAliasingCompensation()
+        if length is None:
+            length = 2 ** 12
+        if sampling_rate is None:
+            sampling_rate = filter_impulseresponses[0].GetSamplingRate()
+        self.__length = length
+        self.__sampling_rate = sampling_rate
+        self.__signals = signals
+        self.__after_nonlinear_block = downsampling_position == nlsp.HammersteinGroupModel.AFTERNONLINEARBLOCK
+        self.__dtype = nlsp.common.precision.get_real_dtype(precision)
+        self.__complex_dtype = nlsp.common.precision.get_complex_dtype(precision)
+        self.__input = numpy.zeros((signals, length), dtype=self.__dtype)
+
+        # create the branches and group them by their preprocessing, so that it is computed only once per group
+        groups = collections.OrderedDict()
+        branches = []
+        for nl, ir in zip(nonlinear_functions, filter_impulseresponses):
+            harmonics = nl.GetMaximumHarmonics()
+            alias = aliasing_compensation.CreateModified(maximum_harmonics=harmonics)
+            factor = alias._GetUpsamplingFactor()
+            # only the lowpass filter depends on the maximum harmonics, the resampling depends only on the factor
+            if isinstance(alias, nlsp.aliasing_compensation.LowpassAliasingCompensation):
+                key = (factor, harmonics)
+            else:
+                key = (factor, None)
+            if key not in groups:
+                groups[key] = _BranchGroup(aliasing_compensation=alias, factor=factor,
+                                           buffer=numpy.zeros((signals, length * factor), dtype=self.__dtype))
+            branch = _CompiledBranch(nonlinear_function=nl, group=groups[key])
+            if self.__after_nonlinear_block:
+                branch_rate = sampling_rate
+            else:
+                branch_rate = sampling_rate * factor
+            kernel = nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=ir)
+            branch.transform_length = max(length * (1 if self.__after_nonlinear_block else factor),
+                                          len(kernel.GetFilterImpulseResponse(branch_rate)))
+            branch.spectrum = kernel.GetSpectrum(branch.transform_length, branch_rate, dtype=self.__complex_dtype)
+            groups[key].branches.append(branch)
+            branches.append(branch)
+        for group in groups.values():
+            group.branches.sort(key=lambda b: b.degree if b.degree is not None else numpy.inf)
+        self.__groups = list(groups.values())
+
+        # allocate the buffers, in which the branch signals are stacked for the convolution
+        if self.__after_nonlinear_block:
+            stacks = collections.OrderedDict()
+            for branch in branches:
+                stacks.setdefault(branch.transform_length, []).append(branch)
+            self.__stacks = []
+            for transform_length, stacked_branches in stacks.items():
+                buffer = numpy.zeros((len(stacked_branches), signals, length), dtype=self.__dtype)
+                for i, branch in enumerate(stacked_branches):
+                    branch.target = buffer[i]
+                spectra = numpy.array([b.spectrum for b in stacked_branches])
+                self.__stacks.append((transform_length, buffer, spectra))
+            output_length = max(stacks.keys())
+        else:
+            self.__stacks = []
+            for branch in branches:
+                branch.target = numpy.zeros((signals, length * branch.group.factor), dtype=self.__dtype)
+            output_length = max([b.transform_length // b.group.factor for b in branches])
+        self.__branches = branches
+        self.__output = numpy.zeros((signals, output_length), dtype=self.__dtype)
+
+    def GetInputShape(self):
+        """
+        Get the shape of the arrays, which can be processed by the plan.
+
+        :return: the tuple (signals, length)
+        """
+        return self.__input.shape
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate of the input signals.
+
+        :return: the sampling rate
+        """
+        return self.__sampling_rate
+
+    def Process(self, input_signals):
+        """
+        Simulate the model for the given input signals. The returned array is a buffer of the plan, which is
+        overwritten by the next call of this method, so it has to be copied, if it shall be kept.
+
+        :param input_signals: the input signals as an array of the shape (signals, length) or a one dimensional array,
+                              if the plan has been compiled for a single signal
+        :return: the output signals as an array of the shape (signals, output length)
+        """
+        input_signals = numpy.asarray(input_signals)
+        if numpy.shape(numpy.atleast_2d(input_signals)) != self.__input.shape:
+            raise ValueError("The shape of the input signals must be equal to the shape, for which the plan has been "
+                             "compiled")
+        self.__input[:] = input_signals
+        for group in self.__groups:
+            self.__ProcessGroup(group)
+        self.__output[:] = 0.0
+        if self.__after_nonlinear_block:
+            for transform_length, buffer, spectra in self.__stacks:
+                spectrum = numpy.fft.rfft(buffer, n=transform_length).astype(self.__complex_dtype, copy=False)
+                spectrum *= spectra
+                self.__output[:, :transform_length] += numpy.fft.irfft(numpy.sum(spectrum, axis=0),
+                                                                       n=transform_length)
+        else:
+            for branch in self.__branches:
+                spectrum = numpy.fft.rfft(branch.target, n=branch.transform_length).astype(self.__complex_dtype,
+                                                                                          copy=False)
+                spectrum *= branch.spectrum
+                output = branch.group.aliasing_compensation._PostprocessArray(
+                    numpy.fft.irfft(spectrum, n=branch.transform_length), self.__sampling_rate)
+                self.__output[:, :output.shape[-1]] += output
+        if input_signals.ndim == 1:
+            return self.__output[0]
+        return self.__output
+
+    def __ProcessGroup(self, group):
+        """
+        Compute the branch signals of all branches of a group. The powers of the Power blocks are computed
+        recursively in the power buffer of the group, from the lowest to the highest degree.
+        """
+        upsampled = group.aliasing_compensation._PreprocessArray(self.__input, self.__sampling_rate)
+        degree = None
+        for branch in group.branches:
+            if branch.degree is None:
+                if branch.memoryless:
+                    result = numpy.reshape(branch.function(numpy.ravel(upsampled)), upsampled.shape)
+                else:
+                    result = branch.function(upsampled)
+            else:
+                if degree is None:
+                    group.buffer[:] = upsampled
+                    degree = 1
+                while degree < branch.degree:
+                    numpy.multiply(group.buffer, upsampled, out=group.buffer)
+                    degree += 1
+                result = group.buffer
+            if self.__after_nonlinear_block:
+                if group.factor == 1:
+                    branch.target[:] = result
+                else:
+                    branch.target[:] = group.aliasing_compensation._PostprocessArray(result, self.__sampling_rate)
+            else:
+                numpy.multiply(result, 1.0 / group.factor, out=branch.target, casting="unsafe")
+
+
+class _BranchGroup(object):
+    """
+    A helper class for the branches of a compiled model, which share the same preprocessing of the input signal.
+    """
+
+    def __init__(self, aliasing_compensation, factor, buffer):
+        self.aliasing_compensation = aliasing_compensation
+        self.factor = factor
+        self.buffer = buffer
+        self.branches = []
+
+
+class _CompiledBranch(object):
+    """
+    A helper class for a branch of a compiled model.
+    """
+
+    def __init__(self, nonlinear_function, group):
+        self.group = group
+        if isinstance(nonlinear_function, nlsp.nonlinear_functions.Power):
+            self.degree = nonlinear_function.GetMaximumHarmonics()
+        else:
+            self.degree = None
+        self.function = nonlinear_function._GetNonlinearFunction()
+        self.memoryless = nonlinear_function._IsMemoryless()
+        self.transform_length = None
+        self.spectrum = None
+        self.target = None
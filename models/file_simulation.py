@@ -0,0 +1,262 @@
+import os
+import struct
+import numpy
+import nlsp
+from streaming_models import StreamingModel, create_streaming_model
+
+
+def simulate_file(model, input_filename, output_filename, sampling_rate=None, block_length=None, chunk_length=None,
+                  convolution_method=StreamingModel.OVERLAP_SAVE, maximum_partition_length=None, precision=None):
+    """
+    Simulate a Hammerstein group model for an input signal, which is stored in a .npy or .wav file, and write the output
+    signal to a .npy or .wav file. The files are accessed through memory maps, which are only created for one chunk of
+    the signal at a time, and the model is simulated block by block with a streaming model, so the memory consumption
+    does not depend on the length of the signal. Like in the streaming models, the filtering is a linear convolution,
+    so the output does not contain the circular wrap around of the filter tail. The delay of the resampling of an
+    aliasing compensation is compensated, so the output file is aligned with the input file.
+
+    A .npy input file must contain a one dimensional array or a two dimensional array of the shape (channels, samples)
+    in C order. A .wav input file may contain 16 or 32 bit integer or 32 or 64 bit floating point samples. The output
+    file has the same number of channels and samples as the input file. A .npy output file contains a float64 or
+    float32 array of the shape (channels, samples), depending on the precision, and a .wav output file contains 32 bit
+    floating point samples. The size of a .wav file is limited to 4 GiB, so longer outputs have to be written to a .npy
+    file.
+
+    :param model: the Hammerstein group model Eg, a model, that has been retrieved with nlsp.RetrieveHGMModel
+    :type model: nlsp.HammersteinGroupModel
+    :param input_filename: the name of the input file
+    :param output_filename: the name of the output file
+    :param sampling_rate: the sampling rate of the input signal, which is taken from the header of a .wav file. For
+                          .npy files, the sampling rate of the first filter impulse response is taken, if it is None
+    :param block_length: the number of samples per block of the streaming model
+    :param chunk_length: the number of samples, which are mapped into memory at once, it is rounded up to a multiple
+                         of the block length
+    :param convolution_method: the convolution method Eg, OVERLAP_SAVE or PARTITIONED
+    :param maximum_partition_length: the maximum partition length of the PARTITIONED convolution method
+    :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE
+    """
+    input_file = _MappedSignalFile.Open(input_filename)
+    if input_file.GetSamplingRate() is not None:
+        sampling_rate = input_file.GetSamplingRate()
+    streaming_model = create_streaming_model(model=model, block_length=block_length, sampling_rate=sampling_rate,
+                                             convolution_method=convolution_method,
+                                             maximum_partition_length=maximum_partition_length, precision=precision)
+    block_length = streaming_model.GetBlockLength()
+    if chunk_length is None:
+        chunk_length = 2 ** 16
+    chunk_length = max(1, int(numpy.ceil(float(chunk_length) / block_length))) * block_length
+    output_file = _MappedSignalFile.Create(output_filename, channels=input_file.GetNumberOfChannels(),
+                                           samples=input_file.GetNumberOfSamples(),
+                                           sampling_rate=streaming_model.GetSamplingRate(),
+                                           dtype=nlsp.common.precision.get_real_dtype(precision))
+    samples = input_file.GetNumberOfSamples()
+    delay = streaming_model.GetDelay()
+    streaming_model.Reset()
+    # the output of the streaming model is delayed, so the processing continues until the delayed end of the signal
+    for start in range(0, samples + delay, chunk_length):
+        stop = min(start + chunk_length, samples + delay)
+        if start < samples:
+            chunk = nlsp.common.helper_functions_private.append_zeros_array(
+                input_file.Read(start, min(stop, samples)), chunk_length)
+        else:
+            chunk = numpy.zeros((input_file.GetNumberOfChannels(), chunk_length))
+        output = []
+        for i in range(0, chunk_length, block_length):
+            output.append(numpy.atleast_2d(streaming_model.ProcessBlock(chunk[:, i:i + block_length])))
+        # the output samples of the chunk belong to the samples start - delay ... stop - delay of the output file
+        first = max(start, delay)
+        if first < stop:
+            output_file.Write(first - delay, numpy.concatenate(output, axis=-1)[:, first - start:stop - start])
+
+
+class _MappedSignalFile(object):
+    """
+    A helper class to read and write the samples of a .npy or .wav file through memory maps. Every access maps only
+    the requested range of samples, so the memory, that is occupied by the mapped pages, is released after each access.
+    """
+    WAVE_PCM = 1
+    WAVE_IEEE_FLOAT = 3
+    WAVE_EXTENSIBLE = 0xFFFE
+    WAVE_DTYPES = {(WAVE_PCM, 16): (numpy.dtype("<i2"), 1.0 / 2 ** 15),
+                   (WAVE_PCM, 32): (numpy.dtype("<i4"), 1.0 / 2 ** 31),
+                   (WAVE_IEEE_FLOAT, 32): (numpy.dtype("<f4"), 1.0),
+                   (WAVE_IEEE_FLOAT, 64): (numpy.dtype("<f8"), 1.0)}
+
+    def __init__(self, filename, offset, dtype, channels, samples, interleaved, scale=1.0, sampling_rate=None):
+        """
+        :param filename: the name of the file
+        :param offset: the position of the first sample in the file in bytes
+        :param dtype: the data type of the samples in the file
+        :param channels: the number of channels
+        :param samples: the number of samples per channel
+        :param interleaved: True, if the samples of the channels are interleaved like in .wav files, False, if the
+                            channels are stored one after another like in a .npy file with the shape (channels, samples)
+        :param scale: the factor, with which the samples are multiplied, when they are read
+        :param sampling_rate: the sampling rate, if it is stored in the file, otherwise None
+        """
+        self.__filename = filename
+        self.__offset = offset
+        self.__dtype = numpy.dtype(dtype)
+        self.__channels = channels
+        self.__samples = samples
+        self.__interleaved = interleaved
+        self.__scale = scale
+        self.__sampling_rate = sampling_rate
+
+    @staticmethod
+    def Open(filename):
+        """
+        Open an existing .npy or .wav file for reading.
+
+        :param filename: the name of the file
+        :return: the mapped signal file
+        """
+        if os.path.splitext(filename)[1].lower() == ".wav":
+            return _MappedSignalFile.__OpenWave(filename)
+        return _MappedSignalFile.__OpenNumpy(filename)
+
+    @staticmethod
+    def Create(filename, channels, samples, sampling_rate, dtype=numpy.float64):
+        """
+        Create a .npy or .wav file with the given number of channels and samples, which are initialized with zeros.
+
+        :param filename: the name of the file
+        :param channels: the number of channels
+        :param samples: the number of samples per channel
+        :param sampling_rate: the sampling rate, which is stored in the header of a .wav file
+        :param dtype: the data type of the samples in a .npy file
+        :return: the mapped signal file
+        """
+        if os.path.splitext(filename)[1].lower() == ".wav":
+            data_size = channels * samples * 4
+            # the sizes of the chunks after the RIFF header: WAVE, the 18 byte fmt chunk, the fact chunk and the data
+            riff_size = 4 + 26 + 12 + 8 + data_size
+            if riff_size > 0xFFFFFFFF:
+                raise ValueError("The output signal is too long for a .wav file, whose size is limited to 4 GiB, the "
+                                 "output can be written to a .npy file instead")
+            with open(filename, "wb") as f:
+                f.write(b"RIFF" + struct.pack("<I", riff_size) + b"WAVE")
+                # the format chunk of the non-PCM formats contains the size of its extension, which is empty
+                f.write(b"fmt " + struct.pack("<IHHIIHHH", 18, _MappedSignalFile.WAVE_IEEE_FLOAT, channels,
+                                              int(sampling_rate), int(sampling_rate) * channels * 4, channels * 4, 32,
+                                              0))
+                # the non-PCM formats require a fact chunk with the number of samples per channel
+                f.write(b"fact" + struct.pack("<II", 4, samples))
+                f.write(b"data" + struct.pack("<I", data_size))
+                f.truncate(8 + riff_size)
+            return _MappedSignalFile.__OpenWave(filename)
+        array = numpy.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=(channels, samples))
+        del array
+        return _MappedSignalFile.__OpenNumpy(filename)
+
+    @staticmethod
+    def __OpenNumpy(filename):
+        with open(filename, "rb") as f:
+            major, minor = numpy.lib.format.read_magic(f)
+            if major == 1:
+                shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+        if fortran_order and len(shape) > 1:
+            raise ValueError("The array in the .npy file must be stored in C order")
+        if len(shape) == 1:
+            shape = (1,) + shape
+        elif len(shape) != 2:
+            raise ValueError("The array in the .npy file must have the shape (samples,) or (channels, samples)")
+        return _MappedSignalFile(filename=filename, offset=offset, dtype=dtype, channels=shape[0], samples=shape[1],
+                                 interleaved=False)
+
+    @staticmethod
+    def __OpenWave(filename):
+        with open(filename, "rb") as f:
+            header = f.read(12)
+            if len(header) != 12 or header[0:4] != b"RIFF" or header[8:12] != b"WAVE":
+                raise ValueError("The file is not a valid .wav file")
+            wave_format = None
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) != 8:
+                    raise ValueError("The .wav file does not contain a data chunk")
+                chunk_id = chunk_header[0:4]
+                chunk_size = struct.unpack("<I", chunk_header[4:8])[0]
+                if chunk_id == b"fmt ":
+                    chunk = f.read(chunk_size + chunk_size % 2)
+                    tag, channels, sampling_rate, _, frame_size, bits = struct.unpack("<HHIIHH", chunk[:16])
+                    if tag == _MappedSignalFile.WAVE_EXTENSIBLE:
+                        tag = struct.unpack("<H", chunk[24:26])[0]
+                    wave_format = (tag, bits)
+                elif chunk_id == b"data":
+                    offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, 1)
+        if wave_format not in _MappedSignalFile.WAVE_DTYPES:
+            raise ValueError("The sample format of the .wav file is not supported")
+        dtype, scale = _MappedSignalFile.WAVE_DTYPES[wave_format]
+        return _MappedSignalFile(filename=filename, offset=offset, dtype=dtype, channels=channels,
+                                 samples=chunk_size // frame_size, interleaved=True, scale=scale,
+                                 sampling_rate=sampling_rate)
+
+    def GetNumberOfChannels(self):
+        """
+        Get the number of channels.
+        """
+        return self.__channels
+
+    def GetNumberOfSamples(self):
+        """
+        Get the number of samples per channel.
+        """
+        return self.__samples
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate, which is stored in the file, or None.
+        """
+        return self.__sampling_rate
+
+    def Read(self, start, stop):
+        """
+        Read a range of samples.
+
+        :param start: the index of the first sample
+        :param stop: the index after the last sample
+        :return: the samples as a float64 array of the shape (channels, stop - start)
+        """
+        length = stop - start
+        result = numpy.empty((self.__channels, length))
+        if self.__interleaved:
+            mapped = self.__Map(start * self.__channels, (length, self.__channels), "r")
+            result[:] = mapped.T
+        else:
+            for c in range(self.__channels):
+                mapped = self.__Map(c * self.__samples + start, (length,), "r")
+                result[c] = mapped
+        del mapped
+        if self.__scale != 1.0:
+            result *= self.__scale
+        return result
+
+    def Write(self, start, channels):
+        """
+        Write a range of samples.
+
+        :param start: the index of the first sample
+        :param channels: the samples as an array of the shape (channels, samples)
+        """
+        length = channels.shape[-1]
+        if self.__interleaved:
+            mapped = self.__Map(start * self.__channels, (length, self.__channels), "r+")
+            mapped[:] = channels.T
+            mapped.flush()
+        else:
+            for c in range(self.__channels):
+                mapped = self.__Map(c * self.__samples + start, (length,), "r+")
+                mapped[:] = channels[c]
+                mapped.flush()
+        del mapped
+
+    def __Map(self, index, shape, mode):
+        return numpy.memmap(self.__filename, dtype=self.__dtype, mode=mode,
+                            offset=self.__offset + index * self.__dtype.itemsize, shape=shape)
@@ -1,5 +1,7 @@
+import numpy
 import sumpf
 import nlsp
+import compiled_models
 
 
 class HammersteinGroupModel(object):
@@ -10,13 +12,29 @@ class HammersteinGroupModel(object):
     AFTERLINEARBLOCK = 2
 
     def __init__(self, input_signal=None, nonlinear_functions=None, filter_impulseresponses=None,
-                 aliasing_compensation=None, downsampling_position=AFTERNONLINEARBLOCK):
+                 aliasing_compensation=None, downsampling_position=AFTERNONLINEARBLOCK, fused_summation=False,
+                 executor=None, precision=None, convolution_strategy=None):
         """
         :param input_signal: the input signal
         :param nonlinear_functions: the nonlinear functions Eg, [nonlinear_function1, nonlinear_function2, ...]
         :param filter_impulseresponse: the filter impulse responses Eg, [impulse_response1, impulse_response2, ...]
         :param aliasing_compensation: the aliasin compensation technique Eg, nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation()
         :param downsampling_position: the downsampling position Eg, AFTER_NONLINEAR_BLOCK or AFTER_LINEAR_BLOCK
+        :param fused_summation: if True, the spectra of all branches are summed up and transformed back to the time
+                                domain with a single inverse Fourier transform, instead of adding the outputs of
+                                separate Hammerstein models. Only available with AFTERNONLINEARBLOCK downsampling.
+        :param executor: an optional executor, whose map method is used to process the branches in parallel in the
+                         fused summation and in ProcessBatch Eg, multiprocessing.pool.ThreadPool(processes=4). The
+                         branches must not share nonlinear function or aliasing compensation instances.
+        :param precision: the precision of the nonlinear functions, the convolutions and the summation Eg,
+                          nlsp.common.precision.DOUBLE or SINGLE, if it is None, the default precision is taken at the
+                          time of the simulation. See nlsp.common.precision.SINGLE_PRECISION_SER for the accuracy of
+                          the single precision.
+        :param convolution_strategy: if it is given, the branches are filtered with a linear convolution, which is
+                                     cropped to the length of the longer one of the signal and the impulse response,
+                                     instead of a circular convolution. The strategy chooses between the direct and the
+                                     fast convolution Eg, nlsp.common.convolution_strategy.ConvolutionStrategy().
+                                     Not available with the fused summation.
         """
         # interpret the input parameters
         if input_signal is None:
@@ -34,13 +52,21 @@ class HammersteinGroupModel(object):
         else:
             self.__filter_irs = filter_impulseresponses
         self._downsampling_position = downsampling_position
+        self._fused_summation = fused_summation
+        self.__executor = executor
+        self._precision = precision
+        self._convolution_strategy = convolution_strategy
+        if self._fused_summation and self._downsampling_position != self.AFTERNONLINEARBLOCK:
+            raise NotImplementedError("The fused summation is only supported for downsampling after the nonlinear "
+                                      "block")
+        if self._fused_summation and self._convolution_strategy is not None:
+            raise NotImplementedError("The fused summation is only supported for the circular convolution")
 
         # check if the filter ir length and the nonlinear functions length is same
         if len(self.__nonlinear_functions) == len(self.__filter_irs):
             self.__branches = len(self.__nonlinear_functions)
         else:
             print "the given arguments dont have same length"
-        self.__passsignal = sumpf.modules.PassThroughSignal(signal=self.__input_signal)
 
         # create multiple aliasing compensation instances which is similar to the aliasing compensation parameter received
         if aliasing_compensation is None:
@@ -48,36 +74,26 @@ class HammersteinGroupModel(object):
         else:
             self.__aliasingcompensation = aliasing_compensation
 
+        # the instances are created with CreateModified, so that they keep the parameters, Eg. the resampling algorithm
         aliasing_comp = []
         while len(aliasing_comp) != self.__branches:
-            classname = self.__aliasingcompensation.__class__()
-            aliasing_comp.append(classname)
+            aliasing_comp.append(self.__aliasingcompensation.CreateModified())
         self.__aliasingcompensations = aliasing_comp
-        self.__hmodels = []
-        for i, (nl, ir, alias) in enumerate(
-                zip(self.__nonlinear_functions, self.__filter_irs, self.__aliasingcompensations)):
-            h = HammersteinModel(input_signal=self.__passsignal.GetSignal(), nonlinear_function=nl,
-                                 filter_impulseresponse=ir, aliasing_compensation=alias,
-                                 downsampling_position=self._downsampling_position)
-            self.__hmodels.append(h)
-
-        self.__sums = [None] * self.__branches
-        for i in reversed(range(len(self.__hmodels) - 1)):
-            self.__a = sumpf.modules.Add()
-            # print "connecting hammerstein model %i to adder %i" % (i, i)
-            sumpf.connect(self.__hmodels[i].GetOutput, self.__a.SetValue1)
-            if i == len(self.__hmodels) - 2:
-                # print "connecting hammerstein model %i to adder %i" % (i+1, i)
-                sumpf.connect(self.__hmodels[i + 1].GetOutput, self.__a.SetValue2)
-            else:
-                # print "connecting adder %i to adder %i" % (i+1, i)
-                sumpf.connect(self.__sums[i + 1].GetResult, self.__a.SetValue2)
-            self.__sums[i] = self.__a
-        if len(self.__hmodels) == 1:
-            self.__sums[0] = self.__hmodels[0]
-            self.GetOutput = self.__sums[0].GetOutput
-        else:
-            self.GetOutput = self.__sums[0].GetResult
+        # branches with the same preprocessing parameters share the preprocessed input signal
+        self.__preprocessing_cache = nlsp.aliasing_compensation.PreprocessingCache()
+        for alias in self.__aliasingcompensations:
+            alias._SetPreprocessingCache(self.__preprocessing_cache)
+        # the polynomial blocks of the same family share the recurrence of the polynomials of their common inputs
+        self.__polynomial_series = nlsp.nonlinear_functions.PolynomialSeries()
+        for nl in self.__nonlinear_functions:
+            if isinstance(nl, nlsp.nonlinear_functions.nonlinear_functions.PolynomialNonlinearBlock):
+                nl._SetPolynomialSeries(self.__polynomial_series)
+        self.__filter_caches = [nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=ir)
+                                for ir in self.__filter_irs]
+        # the Hammerstein models of the branches are created on the first request of the output
+        self.__hmodels = None
+        if self._fused_summation:
+            self.GetOutput = self._GetFusedOutput
 
     def _get_aliasing_compensation(self):
         """
@@ -88,6 +104,247 @@ class HammersteinGroupModel(object):
         """
         return self.__aliasingcompensation
 
+    @sumpf.Output(sumpf.Signal)
+    def GetOutput(self):
+        """
+        Get the output of the model, which is the sum of the outputs of the Hammerstein models of the branches. The
+        Hammerstein models are only created, when the output is requested for the first time, so that models, which are
+        only used as containers for the nonlinear functions and the filter impulse responses, are cheap to create. The
+        branch outputs are summed pairwise in a balanced tree instead of a chain of adders.
+
+        :return: the output signal
+        :rtype: sumpf.Signal
+        """
+        outputs = [h.GetOutput() for h in self.__GetHammersteinModels()]
+        if len(outputs) == 1:
+            return outputs[0]
+        dtype = nlsp.common.precision.get_real_dtype(self._precision)
+        arrays = [nlsp.common.helper_functions_private.signal_to_array(output, dtype=dtype) for output in outputs]
+        while len(arrays) > 1:
+            arrays = [self.__AddPadded(arrays[i], arrays[i + 1]) if i + 1 < len(arrays) else arrays[i]
+                      for i in range(0, len(arrays), 2)]
+        return nlsp.common.helper_functions_private.array_to_signal(arrays[0],
+                                                                    samplingrate=outputs[0].GetSamplingRate(),
+                                                                    labels=outputs[0].GetLabels())
+
+    def __GetHammersteinModels(self):
+        """
+        Get the Hammerstein models of the branches and create them, if they do not exist yet.
+
+        :return: the list of Hammerstein models
+        """
+        if self.__hmodels is None:
+            self.__hmodels = []
+            for nl, ir, alias in zip(self.__nonlinear_functions, self.__filter_irs, self.__aliasingcompensations):
+                h = HammersteinModel(input_signal=self.__input_signal, nonlinear_function=nl,
+                                     filter_impulseresponse=ir, aliasing_compensation=alias,
+                                     downsampling_position=self._downsampling_position, precision=self._precision,
+                                     convolution_strategy=self._convolution_strategy)
+                self.__hmodels.append(h)
+        return self.__hmodels
+
+    @sumpf.Output(sumpf.Signal)
+    def _GetFusedOutput(self):
+        """
+        Get the output of the model by accumulating the products of the branch spectra and the filter spectra and
+        transforming the accumulated spectrum back to the time domain with a single inverse Fourier transform. Branches
+        whose transform lengths differ are accumulated separately, so that the result equals the sum of the branch
+        outputs of the unfused model.
+
+        :return: the output signal
+        :rtype: sumpf.Signal
+        """
+        branches = zip(self.__nonlinear_functions, self.__filter_caches, self.__aliasingcompensations)
+        results = self.__MapBranches(self.__ProcessFusedBranch, branches)
+        accumulated_spectra = {}
+        for length, product, branch_signal in results:
+            self.__AccumulateSpectrum(accumulated_spectra, length, product)
+        output = self.__TransformAccumulatedSpectra(accumulated_spectra).astype(
+            nlsp.common.precision.get_real_dtype(self._precision), copy=False)
+        return nlsp.common.helper_functions_private.array_to_signal(output,
+                                                                    samplingrate=branch_signal.GetSamplingRate(),
+                                                                    labels=branch_signal.GetLabels())
+
+    def __ProcessFusedBranch(self, branch):
+        """
+        Compute the product of the spectrum of the nonlinearly processed input signal and the filter spectrum of a
+        branch for the fused summation.
+
+        :param branch: a tuple of the nonlinear function, the filter spectrum cache and the aliasing compensation
+        :return: a tuple of the transform length, the spectrum product and the postprocessed branch signal
+        """
+        nl, cache, alias = branch
+        alias.SetMaximumHarmonics(nl.GetMaximumHarmonics())
+        alias.SetPreprocessingInput(self.__input_signal)
+        nl.SetInput(alias.GetPreprocessingOutput())
+        alias.SetPostprocessingInput(nl.GetOutput())
+        branch_signal = alias.GetPostprocessingOutput()
+        sampling_rate = branch_signal.GetSamplingRate()
+        length = max(len(branch_signal), len(cache.GetFilterImpulseResponse(sampling_rate)))
+        branch_array = nlsp.common.helper_functions_private.signal_to_array(
+            branch_signal, dtype=nlsp.common.precision.get_real_dtype(self._precision))
+        return length, self.__MultiplySpectrum(branch_array, length, cache, sampling_rate), branch_signal
+
+    def ProcessBatch(self, input_signals, sampling_rate=None):
+        """
+        Simulate the model for a batch of input signals at once. The nonlinear functions, the aliasing compensation and
+        the convolutions are computed on the whole two dimensional array, so that no sumpf signals have to be created
+        for the individual input signals. The filter impulse responses must either have one channel, or as many
+        channels as there are input signals.
+
+        :param input_signals: the input signals as a two dimensional array of the shape (signals, samples) or as an
+                              array signal, whose channels are the input signals
+        :param sampling_rate: the sampling rate of the input signals, if it is None, the sampling rate of the array
+                              signal or of the input signal of the model is taken
+        :return: the output signals as a two dimensional array of the shape (signals, samples)
+        """
+        if isinstance(input_signals, nlsp.common.helper_functions_private.ArraySignal):
+            if sampling_rate is None:
+                sampling_rate = input_signals.GetSamplingRate()
+            input_signals = input_signals.GetArray()
+        input_signals = numpy.atleast_2d(numpy.asarray(input_signals,
+                                                       dtype=nlsp.common.precision.get_real_dtype(self._precision)))
+        if sampling_rate is None:
+            sampling_rate = self.__input_signal.GetSamplingRate()
+        # the array may have been changed in place since the last call, so its preprocessing must not be reused
+        self.__preprocessing_cache.Clear()
+        branches = zip(self.__nonlinear_functions, self.__filter_caches, self.__aliasingcompensations)
+        results = self.__MapBranches(lambda branch: self.__ProcessBatchBranch(branch, input_signals, sampling_rate),
+                                     branches)
+        accumulated_spectra = {}
+        output = 0.0
+        for length, product, branch_output in results:
+            if product is not None:
+                self.__AccumulateSpectrum(accumulated_spectra, length, product)
+            else:
+                output = self.__AddPadded(output, branch_output)
+        if accumulated_spectra:
+            output = self.__AddPadded(output, self.__TransformAccumulatedSpectra(accumulated_spectra))
+        return output.astype(input_signals.dtype, copy=False)
+
+    def __ProcessBatchBranch(self, branch, input_signals, sampling_rate):
+        """
+        Simulate a branch of the model for a batch of input signals.
+
+        :param branch: a tuple of the nonlinear function, the filter spectrum cache and the aliasing compensation
+        :param input_signals: the two dimensional array of input signals
+        :param sampling_rate: the sampling rate of the input signals
+        :return: a tuple of the transform length and the spectrum product, which still has to be transformed to the
+                 time domain, or a tuple (None, None, output) with the time domain output of the branch, if the
+                 downsampling is done after the linear block
+        """
+        nl, cache, alias = branch
+        dtype = input_signals.dtype
+        alias.SetMaximumHarmonics(nl.GetMaximumHarmonics())
+        factor = alias._GetUpsamplingFactor()
+        upsampled = alias._PreprocessArray(input_signals, sampling_rate).astype(dtype, copy=False)
+        branch_signals = nl._GetArrayOutput(upsampled)
+        if self._downsampling_position == self.AFTERNONLINEARBLOCK:
+            branch_signals = alias._PostprocessArray(branch_signals, sampling_rate)
+            branch_rate = sampling_rate
+        else:
+            branch_signals = branch_signals / dtype.type(factor)
+            branch_rate = sampling_rate * factor
+        length = max(branch_signals.shape[-1], len(cache.GetFilterImpulseResponse(branch_rate)))
+        if self._convolution_strategy is not None:
+            output = cache.GetLinearConvolution(branch_signals.astype(dtype, copy=False), branch_rate, length,
+                                                self._convolution_strategy)
+            if self._downsampling_position == self.AFTERLINEARBLOCK:
+                output = alias._PostprocessArray(output, sampling_rate)
+            return None, None, output
+        product = self.__MultiplySpectrum(branch_signals.astype(dtype, copy=False), length, cache, branch_rate)
+        if self._downsampling_position == self.AFTERNONLINEARBLOCK:
+            return length, product, None
+        else:
+            return None, None, alias._PostprocessArray(numpy.fft.irfft(product, n=length), sampling_rate)
+
+    def __MultiplySpectrum(self, branch_signals, length, cache, sampling_rate):
+        """
+        Compute the product of the spectrum of the branch signals and the filter spectrum in the precision of the
+        branch signals.
+
+        :param branch_signals: the array of the branch signals
+        :param length: the transform length
+        :param cache: the filter spectrum cache of the branch
+        :param sampling_rate: the sampling rate of the branch signals
+        :return: the spectrum product
+        """
+        complex_dtype = numpy.result_type(branch_signals.dtype, numpy.complex64)
+        spectrum = numpy.fft.rfft(branch_signals, n=length).astype(complex_dtype, copy=False)
+        return spectrum * cache.GetSpectrum(length, sampling_rate, dtype=complex_dtype)
+
+    def __MapBranches(self, function, branches):
+        """
+        Apply the given function to all branches. If an executor has been given to the model, the branches are
+        processed in parallel.
+
+        :param function: the function, which takes a branch as parameter
+        :param branches: the list of branches
+        :return: the list of results in the order of the branches
+        """
+        if self.__executor is None:
+            return [function(branch) for branch in branches]
+        else:
+            return list(self.__executor.map(function, branches))
+
+    def __AccumulateSpectrum(self, accumulated_spectra, length, product):
+        """
+        Add a spectrum product to the accumulated spectrum of the given transform length.
+        """
+        if length in accumulated_spectra:
+            accumulated_spectra[length] = accumulated_spectra[length] + product
+        else:
+            accumulated_spectra[length] = product
+
+    def __TransformAccumulatedSpectra(self, accumulated_spectra):
+        """
+        Transform the spectra, which have been accumulated for each transform length, to the time domain and sum them.
+
+        :param accumulated_spectra: a dictionary, which maps the transform lengths to the accumulated spectra
+        :return: the summed time domain array
+        """
+        output = 0.0
+        for length, spectrum in accumulated_spectra.items():
+            dtype = numpy.float32 if spectrum.dtype == numpy.complex64 else numpy.float64
+            output = self.__AddPadded(output, numpy.fft.irfft(spectrum, n=length).astype(dtype, copy=False))
+        return output
+
+    def __AddPadded(self, array1, array2):
+        """
+        Add two arrays of channels, after the shorter one has been zero padded to the length of the longer one.
+        """
+        if numpy.ndim(array1) == 0:
+            return array2 + array1
+        length = max(numpy.shape(array1)[-1], numpy.shape(array2)[-1])
+        return nlsp.common.helper_functions_private.append_zeros_array(array1, length) + \
+               nlsp.common.helper_functions_private.append_zeros_array(array2, length)
+
+    def Compile(self, length=None, sampling_rate=None, signals=1):
+        """
+        Compile the model into a flat execution plan with preallocated buffers, which simulates the model for input
+        signals of a fixed length without the sumpf connector graph. See CompiledHammersteinGroupModel.
+
+        :param length: the number of samples of the input signals, if it is None, the length of the input signal of the
+                       model is taken
+        :param sampling_rate: the sampling rate of the input signals, if it is None, the sampling rate of the input
+                              signal of the model is taken
+        :param signals: the number of input signals, which are processed at once
+        :return: the compiled model
+        :rtype: nlsp.CompiledHammersteinGroupModel
+        """
+        if self._convolution_strategy is not None:
+            raise NotImplementedError("The compiled models are only supported for the circular convolution")
+        if length is None:
+            length = len(self.__input_signal)
+        if sampling_rate is None:
+            sampling_rate = self.__input_signal.GetSamplingRate()
+        return compiled_models.CompiledHammersteinGroupModel(nonlinear_functions=self.__nonlinear_functions,
+                                                             filter_impulseresponses=self.__filter_irs,
+                                                             aliasing_compensation=self.__aliasingcompensation,
+                                                             downsampling_position=self._downsampling_position,
+                                                             length=length, sampling_rate=sampling_rate,
+                                                             signals=signals, precision=self._precision)
+
     @sumpf.Output(tuple)
     def GetFilterImpulseResponses(self):
         """
@@ -108,20 +365,23 @@ class HammersteinGroupModel(object):
         """
         return self.__nonlinear_functions
 
-    @sumpf.Input(sumpf.Signal)
+    @sumpf.Input(sumpf.Signal, ["GetOutput", "_GetFusedOutput"])
     def SetInput(self, input_signal=None):
         """
         Set the input to the model.
 
         :param input_signal: the input signal
         """
-        inputs = []
-        for i in range(len(self.__hmodels)):
-            inputs.append((self.__hmodels[i].SetInput, input_signal))
-        sumpf.set_multiple_values(inputs)
+        self.__input_signal = input_signal
+        if self.__hmodels is not None:
+            inputs = []
+            for i in range(len(self.__hmodels)):
+                inputs.append((self.__hmodels[i].SetInput, input_signal))
+            sumpf.set_multiple_values(inputs)
 
     def CreateModified(self, input_signal=None, nonlinear_functions=None, filter_impulseresponses=None,
-                       aliasing_compensation=None, downsampling_position=None):
+                       aliasing_compensation=None, downsampling_position=None, fused_summation=None, executor=None,
+                       precision=None, convolution_strategy=None):
         """
         This method creates a new instance of the class with or without modification.
 
@@ -130,6 +390,10 @@ class HammersteinGroupModel(object):
         :param filter_impulseresponse: the filter impulse responses Eg, [impulse_response1, impulse_response2, ...]
         :param aliasing_compensation: the aliasin compensation technique Eg, nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation()
         :param downsampling_position: the downsampling position Eg, AFTER_NONLINEAR_BLOCK or AFTER_LINEAR_BLOCK
+        :param fused_summation: True, if the spectra of the branches shall be summed before the inverse transform
+        :param executor: the executor to process the branches in parallel
+        :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE
+        :param convolution_strategy: the strategy for the linear convolution of the branches
         :return: the modified instance of the class
         """
         if input_signal is None:
@@ -142,9 +406,19 @@ class HammersteinGroupModel(object):
             aliasing_compensation = self.__aliasingcompensation
         if downsampling_position is None:
             downsampling_position = self._downsampling_position
+        if fused_summation is None:
+            fused_summation = self._fused_summation
+        if executor is None:
+            executor = self.__executor
+        if precision is None:
+            precision = self._precision
+        if convolution_strategy is None:
+            convolution_strategy = self._convolution_strategy
         return self.__class__(input_signal=input_signal, nonlinear_functions=nonlinear_functions,
                               filter_impulseresponses=filter_impulseresponses,
-                              aliasing_compensation=aliasing_compensation, downsampling_position=downsampling_position)
+                              aliasing_compensation=aliasing_compensation, downsampling_position=downsampling_position,
+                              fused_summation=fused_summation, executor=executor, precision=precision,
+                              convolution_strategy=convolution_strategy)
 
 
 class HammersteinModel(object):
@@ -155,13 +429,18 @@ class HammersteinModel(object):
     AFTER_LINEAR_BLOCK = 2
 
     def __init__(self, input_signal=None, nonlinear_function=None, filter_impulseresponse=None,
-                 aliasing_compensation=None, downsampling_position=AFTER_NONLINEAR_BLOCK):
+                 aliasing_compensation=None, downsampling_position=AFTER_NONLINEAR_BLOCK, precision=None,
+                 convolution_strategy=None):
         """
         :param input_signal: the input signal
         :param nonlinear_function: the nonlinear function
         :param filter_impulseresponse: the impulse response
         :param aliasing_compensation: the aliasing compensation technique
         :param downsampling_position: the downsampling position Eg. AFTER_NONLINEAR_BLOCK or AFTER_LINEAR_BLOCK
+        :param precision: the precision of the convolution Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken at the time of the simulation
+        :param convolution_strategy: the strategy for a linear convolution, which is cropped to the length of the longer
+                                     one of the signal and the impulse response, or None for the circular convolution
         """
         if input_signal is None:
             self.__input_signal = sumpf.Signal()
@@ -184,18 +463,9 @@ class HammersteinModel(object):
 
         self.__passsignal = sumpf.modules.PassThroughSignal(signal=self.__input_signal)
         self.__passfilter = sumpf.modules.PassThroughSignal(signal=self.__filterir)
-        self.__prop_signal = sumpf.modules.ChannelDataProperties()
-        self.__prop_filter = sumpf.modules.ChannelDataProperties()
-        self.__resampler = sumpf.modules.ResampleSignal()
-        self.__transform_signal = sumpf.modules.FourierTransform()
-        self.__transform_filter = sumpf.modules.FourierTransform()
-        self.__multiplier = sumpf.modules.Multiply()
-        self.__itransform = sumpf.modules.InverseFourierTransform()
+        self.__filter_convolution = nlsp.common.helper_functions_private.FilterConvolution(
+            filter_impulseresponse=self.__filterir, precision=precision, convolution_strategy=convolution_strategy)
         self.__passoutput = sumpf.modules.PassThroughSignal()
-        self.__change_length = nlsp.common.helper_functions_private.CheckEqualLength()
-        self.__merger = sumpf.modules.MergeSignals(on_length_conflict=sumpf.modules.MergeSignals.FILL_WITH_ZEROS)
-        self.__splitsignal = sumpf.modules.SplitSignal(channels=[0])
-        self.__splitfilter = sumpf.modules.SplitSignal(channels=[1])
         self.__attenuator = sumpf.modules.Multiply()
         self._ConnectHM()
         self.SetInput = self.__passsignal.SetSignal
@@ -210,17 +480,9 @@ class HammersteinModel(object):
             sumpf.connect(self.__nonlin_function.GetMaximumHarmonics, self.__signalaliascomp.SetMaximumHarmonics)
             sumpf.connect(self.__signalaliascomp.GetPreprocessingOutput, self.__nonlin_function.SetInput)
             sumpf.connect(self.__nonlin_function.GetOutput, self.__signalaliascomp.SetPostprocessingInput)
-            sumpf.connect(self.__signalaliascomp.GetPostprocessingOutput, self.__prop_signal.SetSignal)
-            sumpf.connect(self.__signalaliascomp.GetPostprocessingOutput, self.__change_length.SetFirstInput)
-            sumpf.connect(self.__prop_signal.GetSamplingRate, self.__resampler.SetSamplingRate)
-            sumpf.connect(self.__passfilter.GetSignal, self.__resampler.SetInput)
-            sumpf.connect(self.__resampler.GetOutput, self.__change_length.SetSecondInput)
-            sumpf.connect(self.__change_length.GetSecondOutput, self.__transform_filter.SetSignal)
-            sumpf.connect(self.__change_length.GetFirstOutput, self.__transform_signal.SetSignal)
-            sumpf.connect(self.__transform_signal.GetSpectrum, self.__multiplier.SetValue1)
-            sumpf.connect(self.__transform_filter.GetSpectrum, self.__multiplier.SetValue2)
-            sumpf.connect(self.__multiplier.GetResult, self.__itransform.SetSpectrum)
-            sumpf.connect(self.__itransform.GetSignal, self.__passoutput.SetSignal)
+            sumpf.connect(self.__passfilter.GetSignal, self.__filter_convolution.SetFilterImpulseResponse)
+            sumpf.connect(self.__signalaliascomp.GetPostprocessingOutput, self.__filter_convolution.SetInput)
+            sumpf.connect(self.__filter_convolution.GetOutput, self.__passoutput.SetSignal)
 
         elif self._downsampling_position == 2:
             sumpf.connect(self.__passsignal.GetSignal, self.__signalaliascomp.SetPreprocessingInput)
@@ -228,15 +490,7 @@ class HammersteinModel(object):
             sumpf.connect(self.__signalaliascomp.GetPreprocessingOutput, self.__nonlin_function.SetInput)
             sumpf.connect(self.__signalaliascomp._GetAttenuation, self.__attenuator.SetValue1)
             sumpf.connect(self.__nonlin_function.GetOutput, self.__attenuator.SetValue2)
-            sumpf.connect(self.__attenuator.GetResult, self.__prop_signal.SetSignal)
-            sumpf.connect(self.__attenuator.GetResult, self.__change_length.SetFirstInput)
-            sumpf.connect(self.__prop_signal.GetSamplingRate, self.__resampler.SetSamplingRate)
-            sumpf.connect(self.__passfilter.GetSignal, self.__resampler.SetInput)
-            sumpf.connect(self.__resampler.GetOutput, self.__change_length.SetSecondInput)
-            sumpf.connect(self.__change_length.GetFirstOutput, self.__transform_signal.SetSignal)
-            sumpf.connect(self.__change_length.GetSecondOutput, self.__transform_filter.SetSignal)
-            sumpf.connect(self.__transform_signal.GetSpectrum, self.__multiplier.SetValue1)
-            sumpf.connect(self.__transform_filter.GetSpectrum, self.__multiplier.SetValue2)
-            sumpf.connect(self.__multiplier.GetResult, self.__itransform.SetSpectrum)
-            sumpf.connect(self.__itransform.GetSignal, self.__signalaliascomp.SetPostprocessingInput)
+            sumpf.connect(self.__passfilter.GetSignal, self.__filter_convolution.SetFilterImpulseResponse)
+            sumpf.connect(self.__attenuator.GetResult, self.__filter_convolution.SetInput)
+            sumpf.connect(self.__filter_convolution.GetOutput, self.__signalaliascomp.SetPostprocessingInput)
             sumpf.connect(self.__signalaliascomp.GetPostprocessingOutput, self.__passoutput.SetSignal)
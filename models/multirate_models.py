@@ -0,0 +1,293 @@
+import math
+import numpy
+import nlsp
+
+
+class MultirateHammersteinGroupModel(object):
+    """
+    A multirate version of a Hammerstein group model, in which the linear filters of the branches, whose filter kernels
+    are band-limited, are computed at a reduced sampling rate. The output of the nonlinear block of such a branch is
+    decimated with a polyphase lowpass filter, convolved with the decimated filter kernel and the outputs of all
+    branches with the same decimation factor are interpolated with a polyphase lowpass filter. Since the convolution
+    at the reduced rate is shorter by the square of the decimation factor, this is much faster for long filter kernels.
+
+    The decimation factor of each branch is chosen by analysing the bandwidth of its filter kernel and verifying, that
+    the expected signal to error ratio of the branch with respect to the full rate filter is not lower than the given
+    minimum. The expected signal to error ratio is computed from the responses of the multirate filter to impulses at
+    all polyphase positions, which is the signal to error ratio for a white branch signal.
+
+    The filtering is a linear convolution, which is cropped to the length of the input signal, like in a model with a
+    convolution strategy. Only models with downsampling after the nonlinear block are supported.
+    """
+
+    def __init__(self, model, sampling_rate=None, minimum_ser=None, maximum_factor=None, taps_per_phase=None,
+                 convolution_strategy=None):
+        """
+        :param model: the Hammerstein group model
+        :type model: nlsp.HammersteinGroupModel
+        :param sampling_rate: the sampling rate of the input signals, if it is None, the sampling rate of the first
+                              filter impulse response is taken
+        :param minimum_ser: the minimum expected signal to error ratio of each branch in dB
+        :param maximum_factor: the maximum decimation factor
+        :param taps_per_phase: the half length of the polyphase components of the decimation and interpolation filters
+        :param convolution_strategy: the strategy of the convolutions, if it is None, the method is chosen
+                                     automatically by the default cost model
+        """
+        if model._downsampling_position != nlsp.HammersteinGroupModel.AFTERNONLINEARBLOCK:
+            raise NotImplementedError("The multirate model is only supported for downsampling after the nonlinear "
+                                      "block")
+        if sampling_rate is None:
+            sampling_rate = model.GetFilterImpulseResponses()[0].GetSamplingRate()
+        if minimum_ser is None:
+            minimum_ser = 80.0
+        if maximum_factor is None:
+            maximum_factor = 8
+        if taps_per_phase is None:
+            taps_per_phase = 16
+        if convolution_strategy is None:
+            convolution_strategy = nlsp.common.convolution_strategy.ConvolutionStrategy()
+        self.__sampling_rate = sampling_rate
+        self.__minimum_ser = minimum_ser
+        self.__taps = taps_per_phase
+        self.__strategy = convolution_strategy
+        self.__dtype = nlsp.common.precision.get_real_dtype(model._precision)
+        self.__lowpass_filters = {}
+        self.__branches = []
+        for nl, ir in zip(model.GetNonlinearFunctions(), model.GetFilterImpulseResponses()):
+            branch = _MultirateBranch(nonlinear_function=nl,
+                                      aliasing_compensation=model._get_aliasing_compensation().CreateModified(
+                                          maximum_harmonics=nl.GetMaximumHarmonics()))
+            branch.kernel = nlsp.common.helper_functions_private.signal_to_array(
+                nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=ir).
+                    GetFilterImpulseResponse(sampling_rate), dtype=self.__dtype)
+            branch.signal_energy = numpy.sum(numpy.square(branch.kernel, dtype=numpy.float64))
+            factor = min(maximum_factor, self.__GetBandwidthFactor(branch.kernel))
+            while factor > 1:
+                branch.factor = factor
+                branch.decimated_kernel = factor * self.__Decimate(branch.kernel, factor)
+                branch.error_energy = self.__EstimateErrorEnergy(branch)
+                if self.__GetRatio(branch.signal_energy, branch.error_energy) >= minimum_ser:
+                    break
+                factor -= 1
+            if factor <= 1:
+                branch.factor = 1
+                branch.decimated_kernel = None
+                branch.error_energy = 0.0
+            self.__branches.append(branch)
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate of the input signals.
+
+        :return: the sampling rate
+        """
+        return self.__sampling_rate
+
+    def GetDecimationFactors(self):
+        """
+        Get the decimation factors of the branches, a factor of 1 means, that the branch is computed at the full rate.
+
+        :return: the list of decimation factors in the order of the branches
+        """
+        return [b.factor for b in self.__branches]
+
+    def GetExpectedBranchSignalToErrorRatios(self):
+        """
+        Get the expected signal to error ratios of the branches with respect to the full rate filters for white branch
+        signals. The ratio of a branch, that is computed at the full rate, is infinite.
+
+        :return: the list of signal to error ratios in dB
+        """
+        return [self.__GetRatio(b.signal_energy, b.error_energy) for b in self.__branches]
+
+    def GetExpectedSignalToErrorRatio(self):
+        """
+        Get the expected signal to error ratio of the model with respect to the full rate model under the assumption,
+        that the branch signals are uncorrelated white signals of equal power. For a given input signal, the ratio
+        can be measured with EvaluateSignalToErrorRatio.
+
+        :return: the signal to error ratio in dB
+        """
+        return self.__GetRatio(sum([b.signal_energy for b in self.__branches]),
+                               sum([b.error_energy for b in self.__branches]))
+
+    def Process(self, input_signals):
+        """
+        Simulate the model for the given input signals.
+
+        :param input_signals: the input signals as an array of the shape (signals, samples) or a one dimensional array
+        :return: the output signals as an array of the same shape as the input signals
+        """
+        return self.__Process(input_signals, multirate=True)
+
+    def EvaluateSignalToErrorRatio(self, input_signals):
+        """
+        Measure the signal to error ratio of the output of the multirate model with respect to the output of the full
+        rate model for the given input signals.
+
+        :param input_signals: the input signals as an array of the shape (signals, samples) or a one dimensional array
+        :return: the signal to error ratio in dB
+        """
+        reference = self.__Process(input_signals, multirate=False)
+        error = self.__Process(input_signals, multirate=True) - reference
+        return self.__GetRatio(numpy.sum(numpy.square(reference, dtype=numpy.float64)),
+                               numpy.sum(numpy.square(error, dtype=numpy.float64)))
+
+    def __Process(self, input_signals, multirate):
+        """
+        Simulate the model with or without computing the band-limited branches at their reduced sampling rates.
+        """
+        input_signals = numpy.asarray(input_signals, dtype=self.__dtype)
+        channels = numpy.atleast_2d(input_signals)
+        length = channels.shape[-1]
+        output = 0.0
+        decimated_outputs = {}
+        for branch in self.__branches:
+            upsampled = branch.aliasing_compensation._PreprocessArray(channels, self.__sampling_rate)
+            branch_signals = branch.aliasing_compensation._PostprocessArray(
+                branch.nonlinear_function._GetArrayOutput(upsampled.astype(self.__dtype, copy=False)),
+                self.__sampling_rate).astype(self.__dtype, copy=False)
+            branch_output = self.__FilterBranch(branch, branch_signals, multirate)
+            if not multirate or branch.factor == 1:
+                output = output + branch_output
+            elif branch.factor in decimated_outputs:
+                decimated_outputs[branch.factor] = decimated_outputs[branch.factor] + branch_output
+            else:
+                decimated_outputs[branch.factor] = branch_output
+        # the outputs of the branches with the same decimation factor are interpolated at once
+        for factor, decimated in decimated_outputs.items():
+            output = output + self.__Interpolate(decimated, factor, length)
+        output = numpy.asarray(output, dtype=self.__dtype)
+        if input_signals.ndim == 1:
+            return output[0]
+        return output
+
+    def __FilterBranch(self, branch, branch_signals, multirate):
+        """
+        Filter the signals of a branch either at the full rate, or at the reduced rate of the branch, in which case
+        the result is not interpolated yet.
+
+        :return: the filtered signals at the full rate, or the decimated filtered signals
+        """
+        length = branch_signals.shape[-1]
+        if not multirate or branch.factor == 1:
+            return self.__strategy.Convolve(branch_signals, branch.kernel, output_length=length)
+        decimated = self.__Decimate(branch_signals, branch.factor)
+        output_length = -(-length // branch.factor) + self.__taps
+        return self.__strategy.Convolve(decimated, branch.decimated_kernel, output_length=output_length)
+
+    def __GetBandwidthFactor(self, kernel):
+        """
+        Get the largest decimation factor, for which the energy of the filter kernel above 80% of the reduced Nyquist
+        frequency is below the minimum signal to error ratio.
+        """
+        energy = numpy.sum(numpy.abs(numpy.fft.rfft(kernel, n=max(2 * kernel.shape[-1], 2 ** 10))) ** 2, axis=0)
+        remaining = numpy.cumsum(energy[::-1])[::-1]
+        if remaining[0] == 0.0:
+            return len(energy)
+        allowed = remaining[0] * 10.0 ** (-self.__minimum_ser / 10.0)
+        bandwidth = numpy.nonzero(remaining > allowed)[0][-1] + 1
+        return int(0.8 * len(energy) / bandwidth)
+
+    def __EstimateErrorEnergy(self, branch):
+        """
+        Compute the energy of the difference between the responses of the multirate filter and the full rate filter
+        to an impulse, averaged over the polyphase positions of the impulse.
+        """
+        factor = branch.factor
+        delay = (2 * self.__taps + 1) * factor
+        kernel_length = branch.kernel.shape[-1]
+        impulses = numpy.zeros((factor, delay + factor + kernel_length + 2 * self.__taps * factor), dtype=self.__dtype)
+        for p in range(factor):
+            impulses[p, delay + p] = 1.0
+        decimated = self.__Decimate(impulses, factor)
+        error_energy = 0.0
+        for kernel, decimated_kernel in zip(branch.kernel, branch.decimated_kernel):
+            filtered = self.__strategy.Convolve(decimated, decimated_kernel,
+                                                output_length=-(-impulses.shape[-1] // factor) + self.__taps)
+            output = self.__Interpolate(filtered, factor, impulses.shape[-1]).astype(numpy.float64)
+            for p in range(factor):
+                output[p, delay + p:delay + p + kernel_length] -= kernel
+            error_energy += numpy.sum(numpy.square(output)) / factor
+        return error_energy
+
+    def __GetLowpassPhases(self, factor):
+        """
+        Get the polyphase components of the Kaiser windowed sinc lowpass filter with the cutoff frequency at the
+        Nyquist frequency of the reduced sampling rate and a gain of 1.
+
+        :return: an array of the shape (factor, 2 * taps_per_phase + 1), whose rows are the polyphase components
+        """
+        if factor not in self.__lowpass_filters:
+            center = self.__taps * factor
+            n = numpy.arange(2 * center + 1) - center
+            lowpass = numpy.sinc(n / float(factor)) * numpy.kaiser(2 * center + 1, 8.0)
+            lowpass /= numpy.sum(lowpass)
+            padded = numpy.zeros((2 * self.__taps + 1) * factor)
+            padded[:len(lowpass)] = lowpass
+            self.__lowpass_filters[factor] = padded.reshape(2 * self.__taps + 1, factor).T.astype(self.__dtype)
+        return self.__lowpass_filters[factor]
+
+    def __Decimate(self, channels, factor):
+        """
+        Lowpass filter the channels without a delay and keep every factor-th sample. The polyphase components of the
+        signal are convolved with the polyphase components of the lowpass filter, so only the kept samples are computed.
+
+        :param channels: the array of the shape (channels, samples)
+        :param factor: the decimation factor
+        :return: the decimated array, which includes the decay of the lowpass filter
+        """
+        phases = self.__GetLowpassPhases(factor)
+        number_of_channels, length = channels.shape
+        center = self.__taps * factor
+        decimated_length = -(-(length + center) // factor)
+        phase_length = decimated_length + 1
+        # arrange the signal, so that polyphase[:, j, factor - 1 - p] is the sample at j * factor - p - center
+        polyphase = numpy.zeros((number_of_channels, phase_length * factor), dtype=channels.dtype)
+        polyphase[:, factor - 1 + center:factor - 1 + center + length] = channels
+        polyphase = polyphase.reshape(number_of_channels, phase_length, factor)[:, :, ::-1]
+        polyphase = numpy.ascontiguousarray(polyphase.transpose(0, 2, 1)).reshape(number_of_channels * factor,
+                                                                                 phase_length)
+        convolved = self.__strategy.Convolve(polyphase, numpy.tile(phases, (number_of_channels, 1)),
+                                             output_length=2 * self.__taps + decimated_length)
+        return numpy.sum(convolved.reshape(number_of_channels, factor, -1), axis=1)[:, 2 * self.__taps:]
+
+    def __Interpolate(self, channels, factor, length):
+        """
+        Insert factor - 1 zeros between the samples and lowpass filter the channels without a delay. Each polyphase
+        component of the output is computed by convolving the channels with a polyphase component of the lowpass filter.
+
+        :param channels: the decimated array of the shape (channels, samples)
+        :param factor: the interpolation factor
+        :param length: the number of samples of the result
+        :return: the interpolated array of the shape (channels, length)
+        """
+        phases = self.__GetLowpassPhases(factor)
+        number_of_channels = channels.shape[0]
+        interpolated_length = -(-length // factor)
+        convolved = self.__strategy.Convolve(numpy.repeat(channels, factor, axis=0),
+                                             numpy.tile(phases, (number_of_channels, 1)),
+                                             output_length=interpolated_length + self.__taps)
+        convolved = convolved.reshape(number_of_channels, factor, -1)[:, :, self.__taps:]
+        output = numpy.reshape(convolved.transpose(0, 2, 1), (number_of_channels, -1))[:, :length]
+        return factor * output
+
+    def __GetRatio(self, signal_energy, error_energy):
+        if error_energy <= 0.0:
+            return float("inf")
+        return 10.0 * math.log10(signal_energy / error_energy)
+
+
+class _MultirateBranch(object):
+    """
+    A helper class for a branch of a multirate model.
+    """
+
+    def __init__(self, nonlinear_function, aliasing_compensation):
+        self.nonlinear_function = nonlinear_function
+        self.aliasing_compensation = aliasing_compensation
+        self.kernel = None
+        self.factor = 1
+        self.decimated_kernel = None
+        self.signal_energy = 0.0
+        self.error_energy = 0.0
@@ -0,0 +1,204 @@
+import multiprocessing
+import multiprocessing.sharedctypes
+import numpy
+import nlsp
+
+# the state of a worker process, which is set by _initialize_worker, when the process is started
+_worker_state = {}
+
+
+def simulate_parallel(model, input_signal, sampling_rate=None, processes=None, segment_length=None,
+                      convolution_strategy=None):
+    """
+    Simulate a Hammerstein group model for a long input signal in a pool of processes. The input signal is split into
+    segments, whose length is a multiple of the length of the longest filter impulse response. Each process computes
+    the nonlinear functions and the linear convolutions of a segment and writes the middle part of the result to the
+    output buffer, while the head and the tail, which overlap with the neighboring segments, are written to separate
+    buffers. They are added to the output afterwards, so the result is the overlap-add of the segments, which is equal
+    to the simulation of the whole signal, apart from rounding errors. The input and the output are kept in shared
+    memory, so they are not copied to the processes.
+
+    The filtering is a linear convolution, which is cropped to the length of the input signal, like in a model with a
+    convolution strategy. The aliasing compensation is supported, if its resampling only depends on a limited number
+    of neighboring samples, like the upsampling compensations with nlsp.aliasing_compensation.PolyphaseResampling. The
+    segments are extended by these samples and zero padded to the same length, so that all segments are convolved with
+    the same transform length. The other resampling algorithms and the lowpass compensation transform the whole signal,
+    so they are not supported, and neither are nonlinear functions, which depend on more than the current sample, like
+    the soft clipping, which normalizes the whole signal, or the clipping with antiderivative anti-aliasing, since the
+    segments are processed independently.
+
+    :param model: the Hammerstein group model
+    :type model: nlsp.HammersteinGroupModel
+    :param input_signal: the input signal as a sumpf signal, an array signal or a numpy array of the shape
+                         (channels, samples)
+    :param sampling_rate: the sampling rate of a numpy array input, for signals, their sampling rate is taken
+    :param processes: the number of processes, if it is None, the number of processors is taken
+    :param segment_length: the number of samples per segment, if it is None, it is chosen, so that each process
+                           computes about four segments, but at least eight times the length of the longest filter
+    :param convolution_strategy: the strategy of the convolution of the segments, if it is None, the method is chosen
+                                 automatically by the default cost model
+    :return: the output signal
+    :rtype: nlsp.common.helper_functions_private.ArraySignal
+    """
+    nonlinear_functions = model.GetNonlinearFunctions()
+    aliasing_compensations = [model._get_aliasing_compensation().CreateModified(
+        maximum_harmonics=nl.GetMaximumHarmonics()) for nl in nonlinear_functions]
+    supports = [alias._GetArraySupport() for alias in aliasing_compensations]
+    if None in supports:
+        raise NotImplementedError("The parallel simulation only supports aliasing compensations, whose resampling "
+                                  "depends on a limited number of samples, Eg. the upsampling compensations with "
+                                  "nlsp.aliasing_compensation.PolyphaseResampling")
+    if not all([nl._IsMemoryless() for nl in nonlinear_functions]):
+        raise NotImplementedError("The parallel simulation only supports nonlinear functions, whose output samples "
+                                  "depend only on the corresponding input samples, Eg. no soft clipping, which "
+                                  "normalizes the whole signal, and no clipping with antiderivative anti-aliasing")
+    dtype = nlsp.common.precision.get_real_dtype(model._precision)
+    if isinstance(input_signal, numpy.ndarray):
+        labels = ()
+        channels = numpy.atleast_2d(input_signal)
+        if sampling_rate is None:
+            sampling_rate = model.GetFilterImpulseResponses()[0].GetSamplingRate()
+    else:
+        labels = input_signal.GetLabels()
+        channels = nlsp.common.helper_functions_private.signal_to_array(input_signal)
+        sampling_rate = input_signal.GetSamplingRate()
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if convolution_strategy is None:
+        convolution_strategy = nlsp.common.convolution_strategy.ConvolutionStrategy()
+    after_nonlinear_block = model._downsampling_position == nlsp.HammersteinGroupModel.AFTERNONLINEARBLOCK
+    branches = []
+    extents = []
+    for nl, ir, alias in zip(nonlinear_functions, model.GetFilterImpulseResponses(), aliasing_compensations):
+        factor = alias._GetUpsamplingFactor()
+        branch_rate = sampling_rate if after_nonlinear_block else sampling_rate * factor
+        kernel = nlsp.common.helper_functions_private.signal_to_array(
+            nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=ir).
+                GetFilterImpulseResponse(branch_rate), dtype=dtype)
+        branches.append((nl._GetNonlinearFunction(), kernel, alias))
+        # the number of samples, by which the result of a branch reaches beyond the extended segment
+        if after_nonlinear_block:
+            extents.append(kernel.shape[-1] - 1)
+        else:
+            extents.append(max(supports) - (-(kernel.shape[-1] - 1) // factor))
+    support = max(supports)
+    kernel_length = max(extents) + 1
+    input_channels, length = channels.shape
+    output_channels = max([input_channels] + [b[1].shape[0] for b in branches])
+    if segment_length is None:
+        segment_length = max(8 * kernel_length, -(-length // (4 * processes)))
+    segment_length = max(segment_length, kernel_length)
+    segments = -(-length // segment_length)
+
+    # allocate the buffers in shared memory
+    typecode = "f" if dtype == numpy.float32 else "d"
+    shared_input = _CreateSharedArray(typecode, (input_channels, length), dtype)
+    shared_output = _CreateSharedArray(typecode, (output_channels, length), dtype)
+    shared_heads = _CreateSharedArray(typecode, (segments, output_channels, support), dtype)
+    shared_tails = _CreateSharedArray(typecode, (segments, output_channels, support + kernel_length - 1), dtype)
+    shared_input[1][:] = channels
+
+    pool = multiprocessing.Pool(processes=processes, initializer=_initialize_worker,
+                                initargs=(shared_input, shared_output, shared_heads, shared_tails, branches,
+                                          after_nonlinear_block, sampling_rate, segment_length, support,
+                                          convolution_strategy))
+    try:
+        pool.map(_process_segment, range(segments))
+    finally:
+        pool.close()
+        pool.join()
+
+    # overlap-add the heads and the tails of the segments
+    output = shared_output[1]
+    heads = shared_heads[1]
+    tails = shared_tails[1]
+    for index in range(segments):
+        start = index * segment_length
+        head_start = max(start - support, 0)
+        output[:, head_start:start] += heads[index, :, head_start - start + support:]
+        stop = start + segment_length
+        overlap = min(tails.shape[-1], length - stop)
+        if overlap > 0:
+            output[:, stop:stop + overlap] += tails[index, :, :overlap]
+    return nlsp.common.helper_functions_private.ArraySignal(channels=output.copy(), samplingrate=sampling_rate,
+                                                            labels=labels)
+
+
+def _CreateSharedArray(typecode, shape, dtype):
+    """
+    Create an array in shared memory.
+
+    :return: a tuple of the shared ctypes array and a numpy array, which uses its memory
+    """
+    size = int(numpy.prod(shape))
+    shared = multiprocessing.sharedctypes.RawArray(typecode, max(size, 1))
+    return shared, numpy.frombuffer(shared, dtype=dtype)[:size].reshape(shape)
+
+
+def _initialize_worker(shared_input, shared_output, shared_heads, shared_tails, branches, after_nonlinear_block,
+                       sampling_rate, segment_length, support, convolution_strategy):
+    """
+    Store the shared buffers and the parameters of the model in the state of the worker process.
+    """
+    for name, (shared, array) in (("input", shared_input), ("output", shared_output), ("heads", shared_heads),
+                                  ("tails", shared_tails)):
+        _worker_state[name] = numpy.frombuffer(shared, dtype=array.dtype)[:array.size].reshape(array.shape)
+    _worker_state["branches"] = branches
+    _worker_state["after_nonlinear_block"] = after_nonlinear_block
+    _worker_state["sampling_rate"] = sampling_rate
+    _worker_state["segment_length"] = segment_length
+    _worker_state["support"] = support
+    _worker_state["convolution_strategy"] = convolution_strategy
+
+
+def _process_segment(index):
+    """
+    Simulate the model for a segment of the input signal in a worker process.
+
+    :param index: the index of the segment
+    """
+    input_channels = _worker_state["input"]
+    output_channels = _worker_state["output"]
+    heads = _worker_state["heads"]
+    tails = _worker_state["tails"]
+    sampling_rate = _worker_state["sampling_rate"]
+    segment_length = _worker_state["segment_length"]
+    support = _worker_state["support"]
+    convolution_strategy = _worker_state["convolution_strategy"]
+    length = input_channels.shape[-1]
+    start = index * segment_length
+    stop = min(start + segment_length, length)
+    # the segment is extended by the samples, which are needed for the resampling at its borders, and zero padded
+    # outside of the signal, so that all segments have the same length
+    window_start = start - support
+    window = numpy.zeros((input_channels.shape[0], segment_length + 2 * support), dtype=output_channels.dtype)
+    window[:, max(-window_start, 0):min(stop + support, length) - window_start] = \
+        input_channels[:, max(window_start, 0):stop + support]
+    result = numpy.zeros((output_channels.shape[0], support + segment_length + tails.shape[-1]),
+                         dtype=output_channels.dtype)
+    for function, kernel, alias in _worker_state["branches"]:
+        factor = alias._GetUpsamplingFactor()
+        upsampled = alias._PreprocessArray(window, sampling_rate)
+        processed = numpy.reshape(function(numpy.ravel(upsampled)), upsampled.shape)
+        # only the samples of the segment itself belong to this segment, the extensions belong to the neighbors
+        branch = numpy.zeros(upsampled.shape, dtype=window.dtype)
+        branch[:, support * factor:(stop - window_start) * factor] = \
+            processed[:, support * factor:(stop - window_start) * factor]
+        if _worker_state["after_nonlinear_block"]:
+            downsampled = alias._PostprocessArray(branch, sampling_rate)
+            # the model downsamples the whole signal, so there are no samples outside of it, that could be filtered
+            downsampled[:, :max(-window_start, 0)] = 0.0
+            downsampled[:, max(length - window_start, 0):] = 0.0
+            convolved = convolution_strategy.Convolve(downsampled, kernel)
+        else:
+            branch /= factor
+            filtered = convolution_strategy.Convolve(branch, kernel)
+            # the model crops the filtered signal at the upsampled sampling rate before the downsampling
+            filtered[:, max(max(length * factor, kernel.shape[-1]) - window_start * factor, 0):] = 0.0
+            padded = numpy.zeros((filtered.shape[0], result.shape[-1] * factor), dtype=filtered.dtype)
+            padded[:, :filtered.shape[-1]] = filtered
+            convolved = alias._PostprocessArray(padded, sampling_rate)
+        result[:, :convolved.shape[-1]] += convolved
+    output_channels[:, start:stop] = result[:, support:support + stop - start]
+    heads[index] = result[:, :support]
+    tails[index] = result[:, support + segment_length:]
@@ -0,0 +1,317 @@
+import collections
+import timeit
+import numpy
+import nlsp
+
+
+class RealtimeProcessor(object):
+    """
+    A class to run a Hammerstein group model in a real-time audio callback. All buffers are allocated, when the
+    processor is created, so that the processing of a block allocates as few arrays as possible, since allocations
+    could cause dropouts.
+
+    The filter kernels are split into partitions of the block length. The first partition is computed as a direct
+    convolution by multiplying the current and the previous block of nonlinearly processed samples with a precomputed
+    Toeplitz matrix, so there is no latency in addition to the block length. The other partitions are computed with a
+    uniformly partitioned frequency domain delay line, which only needs the spectra of the previous blocks. The spectra
+    of the branches are accumulated in a preallocated buffer, so that only one inverse transform is computed per block.
+    The only arrays, which are allocated per block, are the results of the numpy Fourier transforms, whose size is
+    bounded by the number of branches times the block length and does not depend on the length of the kernels.
+
+    The powers of the Power blocks and the polynomials of the Chebyshev, Hermite, Legendre and Laguerre blocks are
+    computed recursively in place and the HardClip blocks are computed with numpy.clip in place. The other nonlinear
+    blocks, whose functions allocate their results, are not supported, and neither are the soft clipping, which
+    normalizes the whole signal, and the clipping with antiderivative anti-aliasing. Only mono signals are supported.
+    The upsampling aliasing compensations are supported with nlsp.aliasing_compensation.PolyphaseResampling and the
+    downsampling after the nonlinear block. Their causal resamplers add a delay to the latency, by which the branches
+    without resampling are delayed as well, so that the branches stay aligned.
+    """
+
+    def __init__(self, model, block_length=None, sampling_rate=None):
+        """
+        :param model: the Hammerstein group model
+        :type model: nlsp.HammersteinGroupModel
+        :param block_length: the number of samples per block
+        :param sampling_rate: the sampling rate of the blocks, if it is None, the sampling rate of the first filter
+                              impulse response is taken
+        """
+        aliasing_compensation = model._get_aliasing_compensation()
+        if not isinstance(aliasing_compensation, nlsp.aliasing_compensation.NoAliasingCompensation) and \
+                model._downsampling_position != model.AFTERNONLINEARBLOCK:
+            raise NotImplementedError("The real-time processor only supports the downsampling after the nonlinear "
+                                      "block")
+        if not all([nl._IsMemoryless() for nl in model.GetNonlinearFunctions()]):
+            raise NotImplementedError("The real-time processor only supports nonlinear functions, whose output samples "
+                                      "depend only on the corresponding input samples, Eg. no soft clipping, which "
+                                      "normalizes the whole signal, and no clipping with antiderivative anti-aliasing")
+        in_place_functions = (nlsp.nonlinear_functions.Power, nlsp.nonlinear_functions.HardClip,
+                              nlsp.nonlinear_functions.Chebyshev, nlsp.nonlinear_functions.Hermite,
+                              nlsp.nonlinear_functions.Legendre, nlsp.nonlinear_functions.Laguerre)
+        if not all([isinstance(nl, in_place_functions) for nl in model.GetNonlinearFunctions()]):
+            raise NotImplementedError("The real-time processor only supports nonlinear functions, which can be "
+                                      "computed in place, Eg. Power, HardClip, Chebyshev, Hermite, Legendre and "
+                                      "Laguerre")
+        if block_length is None:
+            block_length = 2 ** 8
+        if sampling_rate is None:
+            sampling_rate = model.GetFilterImpulseResponses()[0].GetSamplingRate()
+        self.__block_length = block_length
+        self.__sampling_rate = sampling_rate
+        self.__dtype = nlsp.common.precision.get_real_dtype(model._precision)
+        complex_dtype = nlsp.common.precision.get_complex_dtype(model._precision)
+        compensations = [aliasing_compensation.CreateModified(maximum_harmonics=nl.GetMaximumHarmonics())
+                         for nl in model.GetNonlinearFunctions()]
+        delays = [alias._GetBlockDelay() for alias in compensations]
+        self.__delay = max(delays)
+        # the kernels of the branches with a shorter resampling delay are prefixed with zeros to align the branches
+        kernels = []
+        for ir, delay in zip(model.GetFilterImpulseResponses(), delays):
+            kernel = nlsp.common.helper_functions_private.signal_to_array(
+                nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=ir).
+                    GetFilterImpulseResponse(sampling_rate))[0]
+            kernels.append(numpy.concatenate((numpy.zeros(self.__delay - delay), kernel)))
+        partitions = max([-(-len(k) // block_length) for k in kernels]) - 1
+        self.__input = numpy.zeros((1, block_length), dtype=self.__dtype)
+        # the previous and the current block of the branch signals
+        self.__windows = numpy.zeros((len(kernels), 2 * block_length), dtype=self.__dtype)
+        self.__filtered = numpy.zeros(block_length, dtype=self.__dtype)
+        self.__output = numpy.zeros(block_length, dtype=self.__dtype)
+        # the spectra of the partitions after the first one, in the reversed order of the delay line
+        self.__filter_spectra = numpy.zeros((partitions, len(kernels), block_length + 1), dtype=complex_dtype)
+        for i, kernel in enumerate(kernels):
+            for k in range(1, -(-len(kernel) // block_length)):
+                self.__filter_spectra[partitions - k, i] = numpy.fft.rfft(
+                    kernel[k * block_length:(k + 1) * block_length], n=2 * block_length)
+        # every spectrum is stored twice, so that the last spectra are a contiguous view in the order of the time
+        self.__delay_line = numpy.zeros((2 * partitions, len(kernels), block_length + 1), dtype=complex_dtype)
+        self.__spectrum = numpy.zeros(block_length + 1, dtype=complex_dtype)
+        self.__partitions = partitions
+
+        # group the branches by their upsampling factor, so that the upsampling and the powers are computed once
+        groups = collections.OrderedDict()
+        self.__branches = []
+        for nl, kernel, alias in zip(model.GetNonlinearFunctions(), kernels, compensations):
+            factor = alias._GetUpsamplingFactor()
+            resamplers = alias._CreateBlockResamplers(channels=1, dtype=self.__dtype)
+            if factor not in groups:
+                groups[factor] = _RealtimeGroup()
+                if resamplers is None:
+                    groups[factor].upsampled = self.__input
+                else:
+                    groups[factor].upsampler = resamplers[0]
+                    groups[factor].upsampled = numpy.zeros((1, block_length * factor), dtype=self.__dtype)
+                groups[factor].power = numpy.zeros((1, block_length * factor), dtype=self.__dtype)
+            branch = _RealtimeBranch(nonlinear_function=nl)
+            if branch.recurrence is not None:
+                if branch.recurrence not in groups[factor].series:
+                    groups[factor].series[branch.recurrence] = _RealtimeSeries(
+                        length=block_length * factor, dtype=self.__dtype)
+                branch.series = groups[factor].series[branch.recurrence]
+            # the Toeplitz matrix, whose rows contain the reversed first partition at the output positions
+            head = kernel[:block_length]
+            branch.matrix = numpy.zeros((block_length, 2 * block_length), dtype=self.__dtype)
+            for n in range(block_length):
+                branch.matrix[n, n + block_length - len(head) + 1:n + block_length + 1] = head[::-1]
+            branch.window = self.__windows[len(self.__branches)]
+            branch.target = branch.window[block_length:].reshape(1, -1)
+            if resamplers is not None:
+                branch.downsampler = resamplers[1]
+                branch.upsampled = numpy.zeros((1, block_length * factor), dtype=self.__dtype)
+            groups[factor].branches.append(branch)
+            self.__branches.append(branch)
+        for group in groups.values():
+            group.branches.sort(key=lambda b: b.degree if b.degree is not None else numpy.inf)
+        self.__groups = list(groups.values())
+        self.__position = 0
+        self.__timer = timeit.default_timer
+        self.__worst_case_time = 0.0
+
+    def GetBlockLength(self):
+        """
+        Get the number of samples per block.
+
+        :return: the block length
+        """
+        return self.__block_length
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate of the blocks.
+
+        :return: the sampling rate
+        """
+        return self.__sampling_rate
+
+    def GetLatency(self):
+        """
+        Get the latency of the processor in samples, which is the time to collect a block plus the delay of the
+        resamplers of the aliasing compensation, since the direct convolution does not add latency.
+
+        :return: the latency in samples
+        """
+        return self.__block_length + self.__delay
+
+    def GetWorstCaseProcessingTime(self):
+        """
+        Get the longest time, which the processing of a block has taken since the creation of the processor or the
+        last call of ResetStatistics. It must be shorter than the duration of a block to avoid dropouts.
+
+        :return: the processing time in seconds
+        """
+        return self.__worst_case_time
+
+    def GetWorstCaseLatency(self):
+        """
+        Get the worst case latency of a block, which is the latency of the processor plus the worst case processing
+        time.
+
+        :return: the latency in seconds
+        """
+        return float(self.GetLatency()) / self.__sampling_rate + self.__worst_case_time
+
+    def ResetStatistics(self):
+        """
+        Reset the measurement of the worst case processing time.
+        """
+        self.__worst_case_time = 0.0
+
+    def Reset(self):
+        """
+        Reset the state of the filters, so the next block is treated as the beginning of a new signal.
+        """
+        for group in self.__groups:
+            if group.upsampler is not None:
+                group.upsampler.Reset()
+        self.__windows[:] = 0.0
+        self.__delay_line[:] = 0.0
+        for branch in self.__branches:
+            if branch.downsampler is not None:
+                branch.downsampler.Reset()
+        self.__position = 0
+
+    def ProcessBlock(self, in_buffer, out_buffer):
+        """
+        Process a block of samples.
+
+        :param in_buffer: the one dimensional array with the input samples
+        :param out_buffer: the one dimensional array, to which the output samples are written
+        """
+        start = self.__timer()
+        self.__windows[:, :self.__block_length] = self.__windows[:, self.__block_length:]
+        self.__input[0] = in_buffer
+        self.__output[:] = 0.0
+        for group in self.__groups:
+            if group.upsampler is not None:
+                group.upsampler.ProcessBlock(self.__input, out=group.upsampled)
+            degree = None
+            for series in group.series.values():
+                series.degree = None
+            for branch in group.branches:
+                if branch.downsampler is None:
+                    result = branch.target
+                else:
+                    result = branch.upsampled
+                if branch.recurrence is not None:
+                    branch.series.Compute(group.upsampled, branch.degree, branch.recurrence)
+                    result[:] = branch.series.current
+                elif branch.degree is not None:
+                    if degree is None:
+                        group.power[:] = group.upsampled
+                        degree = 1
+                    while degree < branch.degree:
+                        numpy.multiply(group.power, group.upsampled, out=group.power)
+                        degree += 1
+                    result[:] = group.power
+                else:
+                    numpy.clip(group.upsampled, branch.thresholds[0], branch.thresholds[1], out=result)
+                if branch.downsampler is not None:
+                    branch.downsampler.ProcessBlock(result, out=branch.target)
+                numpy.dot(branch.matrix, branch.window, out=self.__filtered)
+                numpy.add(self.__output, self.__filtered, out=self.__output)
+        if self.__partitions:
+            # the delay line contains the spectra of the previous blocks, whose oldest one is at the current position
+            position = self.__position
+            numpy.einsum("kib,kib->b", self.__filter_spectra,
+                         self.__delay_line[position:position + self.__partitions], out=self.__spectrum)
+            numpy.add(self.__output, numpy.fft.irfft(self.__spectrum)[self.__block_length:], out=self.__output)
+            spectra = numpy.fft.rfft(self.__windows)
+            self.__delay_line[position] = spectra
+            self.__delay_line[position + self.__partitions] = spectra
+            self.__position = (position + 1) % self.__partitions
+        out_buffer[:] = self.__output
+        elapsed = self.__timer() - start
+        if elapsed > self.__worst_case_time:
+            self.__worst_case_time = elapsed
+
+
+class _RealtimeBranch(object):
+    """
+    A helper class for the buffers and the nonlinear function of a branch of the real-time processor.
+    """
+
+    def __init__(self, nonlinear_function):
+        self.degree = None
+        self.recurrence = None
+        self.thresholds = None
+        if isinstance(nonlinear_function, nlsp.nonlinear_functions.HardClip):
+            self.thresholds = tuple(nonlinear_function.GetThresholds())
+        else:
+            self.degree = nonlinear_function.GetMaximumHarmonics()
+            if not isinstance(nonlinear_function, nlsp.nonlinear_functions.Power):
+                self.recurrence = nonlinear_function._GetRecurrence()
+        self.series = None
+        self.matrix = None
+        self.window = None
+        self.target = None
+        self.upsampled = None
+        self.downsampler = None
+
+
+class _RealtimeGroup(object):
+    """
+    A helper class for the branches of the real-time processor, which share the same upsampling of the input signal.
+    """
+
+    def __init__(self):
+        self.upsampler = None
+        self.upsampled = None
+        self.power = None
+        self.series = {}
+        self.branches = []
+
+
+class _RealtimeSeries(object):
+    """
+    A helper class for the in-place computation of the polynomials of a family, which is defined by a three-term
+    recurrence, for the branches of a group of the real-time processor.
+    """
+
+    def __init__(self, length, dtype):
+        self.current = numpy.zeros((1, length), dtype=dtype)
+        self.previous = numpy.zeros((1, length), dtype=dtype)
+        self.scratch = numpy.zeros((1, length), dtype=dtype)
+        self.degree = None
+
+    def Compute(self, x, degree, recurrence):
+        """
+        Continue the recurrence from the last computed degree of the current block to the given degree. If the degree
+        is None, the recurrence starts with the polynomial of the degree 0.
+
+        :param x: the array of samples
+        :param degree: the degree of the polynomial, which is in the current buffer afterwards
+        :param recurrence: the recurrence function of the polynomial family
+        """
+        if self.degree is None:
+            self.current[:] = 1.0
+            self.previous[:] = 0.0
+            self.degree = 0
+        while self.degree < degree:
+            a, b, c = recurrence(self.degree)
+            numpy.multiply(x, a, out=self.scratch)
+            if b != 0.0:
+                self.scratch += b
+            self.scratch *= self.current
+            self.previous *= -c
+            self.previous += self.scratch
+            self.previous, self.current = self.current, self.previous
+            self.degree += 1
@@ -0,0 +1,340 @@
+import numpy
+import sumpf
+import nlsp
+
+
+class StreamingModel(object):
+    """
+    An abstract base class for models, which are simulated block by block. The input signal is given in blocks of fixed
+    length and the state of the convolutions is kept between the blocks, so that signals of arbitrary length can be
+    processed with bounded memory. In contrast to the HammersteinModel class, the filtering is a linear convolution, so
+    the output does not contain the circular wrap around of the filter tail. The nonlinear functions are applied to
+    each block separately, so they must be memoryless, which excludes the soft clipping, since it normalizes the whole
+    signal, and the clipping with antiderivative anti-aliasing. The upsampling aliasing compensations are supported
+    with nlsp.aliasing_compensation.PolyphaseResampling, whose causal resamplers delay the output by GetDelay samples.
+    """
+    OVERLAP_SAVE = 1
+    PARTITIONED = 2
+
+    def __init__(self, block_length=None, sampling_rate=None, convolution_method=OVERLAP_SAVE,
+                 maximum_partition_length=None, precision=None):
+        """
+        :param block_length: the number of samples per block
+        :param sampling_rate: the sampling rate of the input blocks
+        :param convolution_method: the convolution method Eg, OVERLAP_SAVE or PARTITIONED
+        :param maximum_partition_length: the maximum partition length of the PARTITIONED convolution method
+        :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken
+        """
+        if block_length is None:
+            self._block_length = 2 ** 10
+        else:
+            self._block_length = block_length
+        self._sampling_rate = sampling_rate
+        self._convolution_method = convolution_method
+        self._maximum_partition_length = maximum_partition_length
+        self._precision = precision
+        self._dtype = nlsp.common.precision.get_real_dtype(precision)
+
+    def _CreateConvolution(self, filter_impulseresponse, delay=0):
+        """
+        Create the block convolution for the given filter impulse response. The impulse response is resampled to the
+        sampling rate of the model, if necessary.
+
+        :param filter_impulseresponse: the filter impulse response
+        :type filter_impulseresponse: sumpf.Signal
+        :param delay: the number of zeros, which are prepended to the impulse response to delay the output
+        :return: the block convolution object
+        """
+        if filter_impulseresponse.GetSamplingRate() != self._sampling_rate:
+            filter_impulseresponse = sumpf.modules.ResampleSignal(signal=filter_impulseresponse,
+                                                                  samplingrate=self._sampling_rate).GetOutput()
+        kernel = numpy.asarray(filter_impulseresponse.GetChannels())
+        if delay:
+            kernel = numpy.concatenate((numpy.zeros((kernel.shape[0], delay)), kernel), axis=-1)
+        if self._convolution_method == self.PARTITIONED:
+            return nlsp.common.block_convolution.PartitionedConvolution(
+                filter_kernel=kernel, block_length=self._block_length,
+                maximum_partition_length=self._maximum_partition_length, dtype=self._dtype)
+        else:
+            return nlsp.common.block_convolution.OverlapSaveConvolution(filter_kernel=kernel,
+                                                                        block_length=self._block_length,
+                                                                        dtype=self._dtype)
+
+    def GetBlockLength(self):
+        """
+        Get the number of samples per block.
+
+        :return: the block length
+        """
+        return self._block_length
+
+    def GetSamplingRate(self):
+        """
+        Get the sampling rate of the input and output blocks.
+
+        :return: the sampling rate
+        """
+        return self._sampling_rate
+
+    def GetDelay(self):
+        """
+        Get the delay of the output blocks in samples, which is caused by the resampling of the aliasing compensation.
+        The output of ProcessSignal is not delayed.
+
+        :return: the delay
+        """
+        return 0
+
+    def Reset(self):
+        """
+        This method should be overridden in the derived classes. Reset the state of the model, so the next block is
+        treated as the beginning of a new signal.
+        """
+        raise NotImplementedError("This method should have been overridden in a derived class")
+
+    def ProcessBlock(self, block):
+        """
+        This method should be overridden in the derived classes. Process the next block of the input signal.
+
+        :param block: the input block Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :return: the output block
+        """
+        raise NotImplementedError("This method should have been overridden in a derived class")
+
+    def ProcessSignal(self, input_signal):
+        """
+        Process a whole signal block by block. The signal is zero padded to a multiple of the block length and the
+        output is cut to the length of the input signal after skipping the delay of the model. The state of the model
+        is reset before the processing.
+
+        :param input_signal: the input signal
+        :type input_signal: sumpf.Signal
+        :return: the output signal
+        :rtype: sumpf.Signal
+        """
+        self.Reset()
+        channels = nlsp.common.helper_functions_private.signal_to_array(input_signal, dtype=self._dtype)
+        delay = self.GetDelay()
+        blocks = int(numpy.ceil(float(channels.shape[-1] + delay) / self._block_length))
+        channels = nlsp.common.helper_functions_private.append_zeros_array(channels, blocks * self._block_length)
+        output = []
+        for i in range(blocks):
+            output.append(numpy.atleast_2d(
+                self.ProcessBlock(channels[:, i * self._block_length:(i + 1) * self._block_length])))
+        output = numpy.concatenate(output, axis=-1)[:, delay:delay + len(input_signal)]
+        return nlsp.common.helper_functions_private.array_to_signal(output, samplingrate=self._sampling_rate,
+                                                                    labels=input_signal.GetLabels())
+
+
+class StreamingHammersteinModel(StreamingModel):
+    """
+    A class to simulate a Hammerstein model block by block.
+    """
+
+    def __init__(self, nonlinear_function=None, filter_impulseresponse=None, block_length=None, sampling_rate=None,
+                 convolution_method=StreamingModel.OVERLAP_SAVE, maximum_partition_length=None, precision=None,
+                 aliasing_compensation=None, delay=None):
+        """
+        :param nonlinear_function: the nonlinear function
+        :param filter_impulseresponse: the impulse response
+        :param block_length: the number of samples per block
+        :param sampling_rate: the sampling rate of the input blocks, if it differs from the sampling rate of the filter
+                              impulse response, the impulse response is resampled
+        :param convolution_method: the convolution method Eg, OVERLAP_SAVE or PARTITIONED
+        :param maximum_partition_length: the maximum partition length of the PARTITIONED convolution method
+        :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken
+        :param aliasing_compensation: the aliasing compensation Eg, an upsampling compensation with
+                                      nlsp.aliasing_compensation.PolyphaseResampling. The downsampling is done after
+                                      the nonlinear block.
+        :param delay: the delay of the output in samples, which may be longer than the delay of the resampling of the
+                      aliasing compensation to align the output with the outputs of other models
+        """
+        if nonlinear_function is None:
+            self.__nonlin_function = nlsp.nonlinear_functions.Power(degree=1)
+        else:
+            self.__nonlin_function = nonlinear_function
+        if not self.__nonlin_function._IsMemoryless():
+            raise NotImplementedError("The streaming models only support nonlinear functions, whose output samples "
+                                      "depend only on the corresponding input samples, Eg. no soft clipping, which "
+                                      "normalizes the whole signal, and no clipping with antiderivative anti-aliasing")
+        if filter_impulseresponse is None:
+            if sampling_rate is None:
+                sampling_rate = sumpf.config.get("default_samplingrate")
+            filter_impulseresponse = sumpf.modules.ImpulseGenerator(samplingrate=sampling_rate,
+                                                                    length=2 ** 8).GetSignal()
+        if sampling_rate is None:
+            sampling_rate = filter_impulseresponse.GetSamplingRate()
+        StreamingModel.__init__(self, block_length=block_length, sampling_rate=sampling_rate,
+                                convolution_method=convolution_method,
+                                maximum_partition_length=maximum_partition_length, precision=precision)
+        self.__nonlinear_function = self.__nonlin_function._GetNonlinearFunction()
+        if aliasing_compensation is None:
+            aliasing_compensation = nlsp.aliasing_compensation.NoAliasingCompensation()
+        self.__aliasing_compensation = aliasing_compensation.CreateModified(
+            maximum_harmonics=self.__nonlin_function.GetMaximumHarmonics())
+        resampling_delay = self.__aliasing_compensation._GetBlockDelay()
+        if delay is None:
+            self.__delay = resampling_delay
+        elif delay < resampling_delay:
+            raise ValueError("The delay must not be shorter than the delay of the resampling of the aliasing "
+                             "compensation")
+        else:
+            self.__delay = delay
+        self.__resamplers = self.__aliasing_compensation._CreateBlockResamplers(channels=1, dtype=self._dtype)
+        self.__resampled_channels = 1
+        self.__convolution = self._CreateConvolution(filter_impulseresponse, delay=self.__delay - resampling_delay)
+
+    def GetDelay(self):
+        """
+        Get the delay of the output blocks in samples, which is caused by the resampling of the aliasing compensation.
+
+        :return: the delay
+        """
+        return self.__delay
+
+    def Reset(self):
+        """
+        Reset the state of the model, so the next block is treated as the beginning of a new signal.
+        """
+        self.__convolution.Reset()
+        if self.__resamplers is not None:
+            for resampler in self.__resamplers:
+                resampler.Reset()
+
+    def ProcessBlock(self, block):
+        """
+        Process the next block of the input signal.
+
+        :param block: the input block Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :return: the output block
+        """
+        block = numpy.asarray(block, dtype=self._dtype)
+        if self.__resamplers is not None:
+            channels = numpy.atleast_2d(block)
+            if len(channels) != self.__resampled_channels:
+                # the number of channels has changed, so the blocks belong to a new signal
+                self.__resamplers = self.__aliasing_compensation._CreateBlockResamplers(channels=len(channels),
+                                                                                        dtype=self._dtype)
+                self.__resampled_channels = len(channels)
+            upsampled = self.__resamplers[0].ProcessBlock(channels)
+            nonlinear_block = self.__resamplers[1].ProcessBlock(
+                numpy.array([self.__nonlinear_function(c) for c in upsampled], dtype=self._dtype))
+            if block.ndim == 1:
+                nonlinear_block = nonlinear_block[0]
+        elif block.ndim == 1:
+            nonlinear_block = numpy.asarray(self.__nonlinear_function(block), dtype=self._dtype)
+        else:
+            nonlinear_block = numpy.array([self.__nonlinear_function(c) for c in block], dtype=self._dtype)
+        return self.__convolution.ProcessBlock(nonlinear_block)
+
+
+class StreamingHammersteinGroupModel(StreamingModel):
+    """
+    A class to simulate a Hammerstein group model block by block.
+    """
+
+    def __init__(self, nonlinear_functions=None, filter_impulseresponses=None, block_length=None, sampling_rate=None,
+                 convolution_method=StreamingModel.OVERLAP_SAVE, maximum_partition_length=None, precision=None,
+                 aliasing_compensation=None):
+        """
+        :param nonlinear_functions: the nonlinear functions Eg, [nonlinear_function1, nonlinear_function2, ...]
+        :param filter_impulseresponses: the filter impulse responses Eg, [impulse_response1, impulse_response2, ...]
+        :param block_length: the number of samples per block
+        :param sampling_rate: the sampling rate of the input blocks, if it is None, the sampling rate of the first
+                              filter impulse response is taken
+        :param convolution_method: the convolution method Eg, OVERLAP_SAVE or PARTITIONED
+        :param maximum_partition_length: the maximum partition length of the PARTITIONED convolution method
+        :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE, if it is None,
+                          the default precision is taken
+        :param aliasing_compensation: the aliasing compensation, instances of which are created for the branches Eg,
+                                      an upsampling compensation with nlsp.aliasing_compensation.PolyphaseResampling.
+                                      The branches without resampling are delayed like the resampled ones.
+        """
+        if nonlinear_functions is None:
+            nonlinear_functions = (nlsp.nonlinear_functions.Power(degree=1),)
+        if filter_impulseresponses is None:
+            if sampling_rate is None:
+                sampling_rate = sumpf.config.get("default_samplingrate")
+            filter_impulseresponses = (sumpf.modules.ImpulseGenerator(samplingrate=sampling_rate,
+                                                                      length=2 ** 10).GetSignal(),) * \
+                                      len(nonlinear_functions)
+        if sampling_rate is None:
+            sampling_rate = filter_impulseresponses[0].GetSamplingRate()
+        StreamingModel.__init__(self, block_length=block_length, sampling_rate=sampling_rate,
+                                convolution_method=convolution_method,
+                                maximum_partition_length=maximum_partition_length, precision=precision)
+        if aliasing_compensation is None:
+            aliasing_compensation = nlsp.aliasing_compensation.NoAliasingCompensation()
+        self.__delay = max([aliasing_compensation.CreateModified(maximum_harmonics=nl.GetMaximumHarmonics()).
+                           _GetBlockDelay() for nl in nonlinear_functions])
+        self.__branches = []
+        for nl, ir in zip(nonlinear_functions, filter_impulseresponses):
+            self.__branches.append(StreamingHammersteinModel(nonlinear_function=nl, filter_impulseresponse=ir,
+                                                             block_length=self._block_length,
+                                                             sampling_rate=self._sampling_rate,
+                                                             convolution_method=convolution_method,
+                                                             maximum_partition_length=maximum_partition_length,
+                                                             precision=self._precision,
+                                                             aliasing_compensation=aliasing_compensation,
+                                                             delay=self.__delay))
+
+    def GetDelay(self):
+        """
+        Get the delay of the output blocks in samples, which is caused by the resampling of the aliasing compensation.
+
+        :return: the delay
+        """
+        return self.__delay
+
+    def Reset(self):
+        """
+        Reset the state of the model, so the next block is treated as the beginning of a new signal.
+        """
+        for branch in self.__branches:
+            branch.Reset()
+
+    def ProcessBlock(self, block):
+        """
+        Process the next block of the input signal.
+
+        :param block: the input block Eg, numpy.array([channel1, channel2, ...]) or a one dimensional array
+        :return: the output block
+        """
+        output = self.__branches[0].ProcessBlock(block)
+        for branch in self.__branches[1:]:
+            output = output + branch.ProcessBlock(block)
+        return output
+
+
+def create_streaming_model(model, block_length=None, sampling_rate=None, convolution_method=StreamingModel.OVERLAP_SAVE,
+                           maximum_partition_length=None, precision=None):
+    """
+    Create a streaming Hammerstein group model with the nonlinear functions, the filter impulse responses and the
+    aliasing compensation of the given Hammerstein group model, Eg. of a model, that has been retrieved with
+    nlsp.RetrieveHGMModel. Models with aliasing compensation are supported, if they use an upsampling compensation
+    with nlsp.aliasing_compensation.PolyphaseResampling and the downsampling after the nonlinear block. The output
+    blocks of the streaming model are delayed by its GetDelay method.
+
+    :param model: the Hammerstein group model
+    :type model: nlsp.HammersteinGroupModel
+    :param block_length: the number of samples per block
+    :param sampling_rate: the sampling rate of the input blocks
+    :param convolution_method: the convolution method Eg, OVERLAP_SAVE or PARTITIONED
+    :param maximum_partition_length: the maximum partition length of the PARTITIONED convolution method
+    :param precision: the precision of the computation Eg, nlsp.common.precision.DOUBLE or SINGLE
+    :return: the streaming model
+    :rtype: StreamingHammersteinGroupModel
+    """
+    aliasing_compensation = model._get_aliasing_compensation()
+    if not isinstance(aliasing_compensation, nlsp.aliasing_compensation.NoAliasingCompensation) and \
+            model._downsampling_position != model.AFTERNONLINEARBLOCK:
+        raise NotImplementedError("The streaming models only support the downsampling after the nonlinear block")
+    nonlinear_functions = [nl.CreateModified() for nl in model.GetNonlinearFunctions()]
+    return StreamingHammersteinGroupModel(nonlinear_functions=nonlinear_functions,
+                                          filter_impulseresponses=model.GetFilterImpulseResponses(),
+                                          block_length=block_length, sampling_rate=sampling_rate,
+                                          convolution_method=convolution_method,
+                                          maximum_partition_length=maximum_partition_length, precision=precision,
+                                          aliasing_compensation=aliasing_compensation)
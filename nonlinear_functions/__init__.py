@@ -1 +1,3 @@
-from nonlinear_functions import Power, Chebyshev, Hermite, Legendre, Laguerre, HardClip, SoftClip
+from nonlinear_functions import Power, Chebyshev, Hermite, Legendre, Laguerre, HardClip, SoftClip, LookupTable, \
+    PolynomialSeries, evaluate_polynomial_basis, power_recurrence, chebyshev_recurrence, \
+    hermite_recurrence, legendre_recurrence, laguerre_recurrence
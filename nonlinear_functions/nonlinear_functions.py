@@ -1,3 +1,6 @@
+import collections
+import hashlib
+import threading
 import sumpf
 import nlsp
 import numpy
@@ -31,6 +34,81 @@ class NonlinearBlock(object):
         """
         raise NotImplementedError("This method should have been overridden in a derived class")
 
+    def _GetNonlinearFunction(self):
+        """
+        This method should be overridden in the derived classes. Get the function which is applied to the samples of
+        each channel, so the nonlinear block can be evaluated on plain arrays, Eg. in block based processing.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        raise NotImplementedError("This method should have been overridden in a derived class")
+
+    def _IsMemoryless(self):
+        """
+        Find out, whether each output sample of the nonlinear function depends only on the corresponding input sample.
+        Otherwise, the function processes the channels along the last axis and keeps no state between its calls, so it
+        can not be applied to the concatenated channels or to the blocks of a signal.
+
+        :return: True, if the nonlinear function is memoryless
+        """
+        return True
+
+    def _GetArrayOutput(self, channels):
+        """
+        Evaluate the nonlinear block on an array of channels instead of a sumpf signal.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :return: the output array, which has the same shape as the input array
+        """
+        channels = numpy.asarray(channels)
+        if not self._IsMemoryless():
+            return self._GetNonlinearFunction()(channels)
+        return numpy.reshape(self._GetNonlinearFunction()(channels.ravel()), channels.shape)
+
+    def GetArrayOutput(self):
+        """
+        Get the output of the nonlinear block as an array signal, so the samples are not converted to tuples, if the
+        output is processed further as an array. The input may be a sumpf signal or an array signal.
+
+        :return: the output signal
+        :rtype: nlsp.common.helper_functions_private.ArraySignal
+        """
+        return nlsp.common.helper_functions_private.ArraySignal(
+            channels=self._GetArrayOutput(self._GetInputArray()), samplingrate=self._input_signal.GetSamplingRate(),
+            labels=self._input_signal.GetLabels())
+
+    def _GetCacheKey(self):
+        """
+        Get a hashable key, which identifies the nonlinear function of the block, so that its outputs can be taken from
+        the shared output cache. See nlsp.common.helper_functions_private.OutputCache.
+
+        :return: the key or None, if the outputs shall not be cached
+        """
+        return None
+
+    def _GetCachedOutput(self):
+        """
+        Get the output signal from the shared output cache, or compute it, if it has not been cached for the content of
+        the input signal.
+
+        :return: the output signal
+        :rtype: sumpf.Signal
+        """
+        cache = nlsp.common.helper_functions_private.get_output_cache()
+        key = self._GetCacheKey()
+        if cache is None or key is None:
+            return self.GetArrayOutput().GetSignal()
+        return cache.GetOutput(input_data=self._input_signal, key=key,
+                               compute=lambda: self.GetArrayOutput().GetSignal())
+
+    def _GetInputArray(self):
+        """
+        Get the channels of the input signal as an array.
+
+        :return: the array of the shape (channels, samples)
+        """
+        return nlsp.common.helper_functions_private.signal_to_array(self._input_signal)
+
     def CreateModified(self, *args, **kwargs):
         """
         This method should be overridden in the derived classes. Get a new instance of the class with or without modified
@@ -44,16 +122,23 @@ class ClippingNonlinearBlock(NonlinearBlock):
     A base class to create nonlinear block by clipping signals.
     """
 
-    def __init__(self, input_signal=None, clipping_threshold=None):
+    def __init__(self, input_signal=None, clipping_threshold=None, antiderivative_order=None):
         """
         :param input_signal: the input signal
         :param clipping_threshold: the clipping threshold
+        :param antiderivative_order: the order of the antiderivative anti-aliasing Eg, 0, 1 or 2. The antiderivative
+                                     anti-aliasing reduces the aliasing of the clipping at the original sampling rate
+                                     instead of oversampling, at the cost of a delay of half a sample per order.
         """
         NonlinearBlock.__init__(self, input_signal=input_signal)
         if clipping_threshold is None:
             self._clipping_threshold = [-1.0, 1.0]
         else:
             self._clipping_threshold = clipping_threshold
+        if antiderivative_order is None:
+            self._antiderivative_order = 0
+        else:
+            self._antiderivative_order = antiderivative_order
 
     @sumpf.Input(data_type=tuple, observers=["GetMaximumHarmonics", "GetThresholds"])
     def SetClippingThreshold(self, clipping_threshold=None):
@@ -84,18 +169,47 @@ class ClippingNonlinearBlock(NonlinearBlock):
         """
         return self._clipping_threshold
 
-    def CreateModified(self, input_signal=None, clipping_threshold=None):
+    def GetAntiderivativeOrder(self):
+        """
+        Get the order of the antiderivative anti-aliasing, 0 means, that the clipping is computed without it.
+
+        :return: the order
+        """
+        return self._antiderivative_order
+
+    def _GetCacheKey(self):
+        """
+        Get a hashable key, which identifies the clipping function of the block.
+
+        :return: the key
+        """
+        return self.__class__, tuple(self._clipping_threshold), self._antiderivative_order
+
+    def _IsMemoryless(self):
+        """
+        Find out, whether each output sample depends only on the corresponding input sample, which is not the case
+        with the antiderivative anti-aliasing, since it uses the previous samples of the channel.
+
+        :return: True, if the clipping is computed without the antiderivative anti-aliasing
+        """
+        return self._antiderivative_order == 0
+
+    def CreateModified(self, input_signal=None, clipping_threshold=None, antiderivative_order=None):
         """
         Create a new instance of the class with or without modified parameters.
 
         :param signal: the input signal
         :param clipping_threshold: the clipping threshold
+        :param antiderivative_order: the order of the antiderivative anti-aliasing
         """
         if input_signal is None:
             input_signal = self._input_signal
         if clipping_threshold is None:
             clipping_threshold = self._clipping_threshold
-        return self.__class__(input_signal=input_signal, clipping_threshold=clipping_threshold)
+        if antiderivative_order is None:
+            antiderivative_order = self._antiderivative_order
+        return self.__class__(input_signal=input_signal, clipping_threshold=clipping_threshold,
+                              antiderivative_order=antiderivative_order)
 
 
 class HardClip(ClippingNonlinearBlock):
@@ -103,6 +217,14 @@ class HardClip(ClippingNonlinearBlock):
     A class to create a nonlinear block using hard clipper.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the hard clipping function which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return hard_clip(thresholds=self._clipping_threshold, antiderivative_order=self._antiderivative_order)
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -110,13 +232,7 @@ class HardClip(ClippingNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = hard_clip(thresholds=self._clipping_threshold)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
 
 
 class SoftClip(ClippingNonlinearBlock):
@@ -124,6 +240,23 @@ class SoftClip(ClippingNonlinearBlock):
     A class to create a nonlinear block using soft clipper.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the soft clipping function which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return soft_clip(thresholds=self._clipping_threshold, antiderivative_order=self._antiderivative_order)
+
+    def _IsMemoryless(self):
+        """
+        Find out, whether each output sample depends only on the corresponding input sample, which is not the case for
+        the soft clipping, since the samples are normalized to the peak of their channel.
+
+        :return: False
+        """
+        return False
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -131,13 +264,133 @@ class SoftClip(ClippingNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = soft_clip(thresholds=self._clipping_threshold)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
+
+
+class LookupTable(NonlinearBlock):
+    """
+    A class to create a nonlinear block from a tabulated transfer curve, Eg. a measured static nonlinearity. The curve
+    is sampled once on a uniform grid of input values, so that the samples are evaluated by a vectorized linear or
+    cubic interpolation between the neighboring grid points. The input values outside the range of the grid are clamped
+    to the range. Since the maximum harmonics can not be derived from a tabulated curve, it has to be specified, so that
+    the aliasing compensation can upsample the input signal accordingly.
+    """
+    LINEAR = 1
+    CUBIC = 3
+
+    def __init__(self, input_signal=None, transfer_curve=None, input_range=None, table_length=None,
+                 interpolation=LINEAR, maximum_harmonics=None):
+        """
+        :param input_signal: the input signal
+        :param transfer_curve: the transfer curve, either as a function, which takes an array of input values and
+                               returns the array of output values, or as a tuple of the arrays of input values in
+                               increasing order and the corresponding output values Eg, (inputs, outputs)
+        :param input_range: the range of the grid Eg, [-1.0, 1.0], if it is None, the range of the tabulated input
+                            values is taken, or [-1.0, 1.0] for a function
+        :param table_length: the number of grid points
+        :param interpolation: the interpolation method Eg, LINEAR or CUBIC
+        :param maximum_harmonics: the maximum harmonics introduced by the nonlinear block
+        """
+        NonlinearBlock.__init__(self, input_signal=input_signal)
+        if transfer_curve is None:
+            transfer_curve = lambda x: x
+        if input_range is None:
+            if callable(transfer_curve):
+                input_range = [-1.0, 1.0]
+            else:
+                input_range = [numpy.min(transfer_curve[0]), numpy.max(transfer_curve[0])]
+        if table_length is None:
+            table_length = 2 ** 12 + 1
+        if maximum_harmonics is None:
+            self._maximum_harmonics = 1
+        else:
+            self._maximum_harmonics = maximum_harmonics
+        self._interpolation = interpolation
+        grid = numpy.linspace(input_range[0], input_range[1], table_length)
+        if callable(transfer_curve):
+            self._table = numpy.asarray(transfer_curve(grid), dtype=numpy.float64)
+        else:
+            self._table = numpy.interp(grid, transfer_curve[0], transfer_curve[1])
+        self._input_range = (float(input_range[0]), float(input_range[1]))
+
+    @sumpf.Input(data_type=int, observers=["GetMaximumHarmonics"])
+    def SetMaximumHarmonics(self, maximum_harmonics=None):
+        """
+        Set the maximum harmonics introduced by the lookup table.
+
+        :param maximum_harmonics: the maximum harmonics
+        """
+        self._maximum_harmonics = maximum_harmonics
+
+    @sumpf.Output(data_type=int)
+    def GetMaximumHarmonics(self):
+        """
+        Get the maximum harmonics introduced by the lookup table.
+
+        :return: the maximum harmonics
+        """
+        return self._maximum_harmonics
+
+    def GetTable(self):
+        """
+        Get the grid of input values and the tabulated output values.
+
+        :return: a tuple of the arrays (inputs, outputs)
+        """
+        return numpy.linspace(self._input_range[0], self._input_range[1], len(self._table)), self._table.copy()
+
+    def _GetCacheKey(self):
+        """
+        Get a hashable key, which identifies the tabulated curve and the interpolation of the block.
+
+        :return: the key
+        """
+        return self.__class__, hashlib.sha1(self._table).hexdigest(), self._input_range, self._interpolation
+
+    def _GetNonlinearFunction(self):
+        """
+        Get the interpolation of the lookup table which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return lookup_table(table=self._table, input_range=self._input_range, interpolation=self._interpolation)
+
+    @sumpf.Output(data_type=sumpf.Signal)
+    def GetOutput(self):
+        """
+        Get the output of the nonlinear block using the lookup table.
+
+        :return: the output signal
+        """
+        return self._GetCachedOutput()
+
+    def CreateModified(self, input_signal=None, transfer_curve=None, input_range=None, table_length=None,
+                       interpolation=None, maximum_harmonics=None):
+        """
+        Create a new instance of the class with or without modified parameters.
+
+        :param input_signal: the input signal
+        :param transfer_curve: the transfer curve, if it is None, the table of this block is taken
+        :param input_range: the range of the grid
+        :param table_length: the number of grid points
+        :param interpolation: the interpolation method Eg, LINEAR or CUBIC
+        :param maximum_harmonics: the maximum harmonics
+        """
+        if input_signal is None:
+            input_signal = self._input_signal
+        if transfer_curve is None:
+            transfer_curve = self.GetTable()
+        if input_range is None:
+            input_range = self._input_range
+        if table_length is None:
+            table_length = len(self._table)
+        if interpolation is None:
+            interpolation = self._interpolation
+        if maximum_harmonics is None:
+            maximum_harmonics = self._maximum_harmonics
+        return self.__class__(input_signal=input_signal, transfer_curve=transfer_curve, input_range=input_range,
+                              table_length=table_length, interpolation=interpolation,
+                              maximum_harmonics=maximum_harmonics)
 
 
 class PolynomialNonlinearBlock(NonlinearBlock):
@@ -155,6 +408,7 @@ class PolynomialNonlinearBlock(NonlinearBlock):
             self._degree = 1
         else:
             self._degree = degree
+        self._polynomial_series = None
 
     @sumpf.Input(data_type=int, observers=["GetMaximumHarmonics"])
     def SetDegree(self, degree=None):
@@ -187,12 +441,89 @@ class PolynomialNonlinearBlock(NonlinearBlock):
             degree = self._degree
         return self.__class__(input_signal=input_signal, degree=degree)
 
+    def _GetCacheKey(self):
+        """
+        Get a hashable key, which identifies the polynomial of the block.
+
+        :return: the key
+        """
+        return self.__class__, self._degree
+
+    def _GetRecurrence(self):
+        """
+        Get the function, which returns the coefficients of the three-term recurrence of the polynomial family, or
+        None, if the polynomial is not defined by such a recurrence. See evaluate_recurrence.
+
+        :return: the recurrence function or None
+        """
+        return None
+
+    def _SetPolynomialSeries(self, polynomial_series):
+        """
+        Set a polynomial series, which is shared with the other polynomial blocks of a model, so that the polynomials
+        of a common input are computed with a single recurrence instead of separately for every block.
+
+        :param polynomial_series: the shared polynomial series or None
+        :type polynomial_series: PolynomialSeries
+        """
+        self._polynomial_series = polynomial_series
+
+    def _GetArrayOutput(self, channels):
+        """
+        Evaluate the polynomial on an array of channels. If a shared polynomial series has been set, the result is
+        taken from it and must not be modified.
+
+        :param channels: the input channels Eg, numpy.array([channel1, channel2, ...])
+        :return: the output array
+        """
+        if self._polynomial_series is None or self._GetRecurrence() is None:
+            return NonlinearBlock._GetArrayOutput(self, channels)
+        return self._polynomial_series.GetPolynomial(input_data=channels, degree=self._degree,
+                                                     recurrence=self._GetRecurrence())
+
+    def GetArrayOutput(self):
+        """
+        Get the output of the nonlinear block as an array signal. If a shared polynomial series has been set, the
+        polynomials are computed from the input signal object, so that the blocks of the same family with the same input
+        share the recurrence.
+
+        :return: the output signal
+        :rtype: nlsp.common.helper_functions_private.ArraySignal
+        """
+        if self._polynomial_series is None or self._GetRecurrence() is None:
+            return NonlinearBlock.GetArrayOutput(self)
+        polynomial = self._polynomial_series.GetPolynomial(
+            input_data=self._input_signal, degree=self._degree, recurrence=self._GetRecurrence(),
+            get_array=nlsp.common.helper_functions_private.signal_to_array)
+        return nlsp.common.helper_functions_private.ArraySignal(channels=polynomial,
+                                                                samplingrate=self._input_signal.GetSamplingRate(),
+                                                                labels=self._input_signal.GetLabels())
+
 
 class Power(PolynomialNonlinearBlock):
     """
     A class to create a nonlinear block using powers.
     """
 
+    def _GetRecurrence(self):
+        """
+        Get the recurrence of the powers. The power of the degree 0 is the identity, like in the power function, so it
+        is not taken from a polynomial series.
+
+        :return: the recurrence function or None
+        """
+        if self._degree < 1:
+            return None
+        return power_recurrence
+
+    def _GetNonlinearFunction(self):
+        """
+        Get the power function which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return power(degree=self._degree)
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -200,13 +531,7 @@ class Power(PolynomialNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = power(degree=self._degree)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
 
 
 class Chebyshev(PolynomialNonlinearBlock):
@@ -214,6 +539,22 @@ class Chebyshev(PolynomialNonlinearBlock):
     A class to create a nonlinear block using Chebyshev polynomials.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the Chebyshev polynomial which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return chebyshev_polynomial(degree=self._degree)
+
+    def _GetRecurrence(self):
+        """
+        Get the recurrence of the Chebyshev polynomials.
+
+        :return: the recurrence function
+        """
+        return chebyshev_recurrence
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -221,13 +562,7 @@ class Chebyshev(PolynomialNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = chebyshev_polynomial(degree=self._degree)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
 
 
 class Hermite(PolynomialNonlinearBlock):
@@ -235,6 +570,22 @@ class Hermite(PolynomialNonlinearBlock):
     A class to create a nonlinear block using Hermite polynomials.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the Hermite polynomial which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return hermite_polynomial(degree=self._degree)
+
+    def _GetRecurrence(self):
+        """
+        Get the recurrence of the probabilists' Hermite polynomials.
+
+        :return: the recurrence function
+        """
+        return hermite_recurrence
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -242,13 +593,7 @@ class Hermite(PolynomialNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = hermite_polynomial(degree=self._degree)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
 
 
 class Legendre(PolynomialNonlinearBlock):
@@ -256,6 +601,22 @@ class Legendre(PolynomialNonlinearBlock):
     A class to create a nonlinear block using Legendre polynomials.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the Legendre polynomial which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return legendre_polynomial(degree=self._degree)
+
+    def _GetRecurrence(self):
+        """
+        Get the recurrence of the Legendre polynomials.
+
+        :return: the recurrence function
+        """
+        return legendre_recurrence
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -263,13 +624,7 @@ class Legendre(PolynomialNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = legendre_polynomial(degree=self._degree)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
 
 
 class Laguerre(PolynomialNonlinearBlock):
@@ -277,6 +632,22 @@ class Laguerre(PolynomialNonlinearBlock):
     A class to create a nonlinear block using Legendre polynomials.
     """
 
+    def _GetNonlinearFunction(self):
+        """
+        Get the Laguerre polynomial which is applied to the samples of each channel.
+
+        :return: the function which takes an array of samples and returns the processed array
+        """
+        return laguerre_polynomial(degree=self._degree)
+
+    def _GetRecurrence(self):
+        """
+        Get the recurrence of the Laguerre polynomials.
+
+        :return: the recurrence function
+        """
+        return laguerre_recurrence
+
     @sumpf.Output(data_type=sumpf.Signal)
     def GetOutput(self):
         """
@@ -284,13 +655,98 @@ class Laguerre(PolynomialNonlinearBlock):
 
         :return: the output signal
         """
-        nl_function = laguerre_polynomial(degree=self._degree)
-        new_channels = []
-        for c in self._input_signal.GetChannels():
-            self.__dummy = c
-            new_channels.append(tuple(nl_function((c))))
-        return sumpf.Signal(channels=new_channels, samplingrate=self._input_signal.GetSamplingRate(),
-                            labels=self._input_signal.GetLabels())
+        return self._GetCachedOutput()
+
+
+class PolynomialSeries(object):
+    """
+    A class which computes the polynomials of an input for all polynomial blocks of a model, that share the same input.
+    The polynomials of a family, which is defined by a three-term recurrence, are computed from the two polynomials of
+    the next lower degrees, that have already been computed for the input, so that the polynomials up to the degree N
+    are computed in a single pass of the recurrence instead of separately for every block. The polynomials of the most
+    recently used combinations of inputs and families are kept. The immutable sumpf signals are identified by the
+    object identity, while arrays and array signals are identified by a hash of their content, since they may be
+    changed in place between two calls. So branches at different (oversampled) sampling rates have separate
+    recursions.
+    """
+
+    def __init__(self, maximum_inputs=4):
+        """
+        :param maximum_inputs: the maximum number of combinations of inputs and families, whose polynomials are kept
+        """
+        self.__maximum_inputs = maximum_inputs
+        self.__series = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def GetPolynomial(self, input_data, degree, recurrence, get_array=None):
+        """
+        Get the polynomial of the given degree of the given input.
+
+        :param input_data: the input signal or array
+        :param degree: the degree of the polynomial
+        :param recurrence: the recurrence function of the polynomial family Eg, power_recurrence
+        :param get_array: a function, which converts the input to an array, if the input is not an array
+        :return: the polynomial as an array, which must not be modified, since it is shared with the other blocks
+        """
+        with self.__lock:
+            x, values = self.__GetValues(input_data, degree, recurrence, get_array)
+            if degree == 0:
+                return numpy.ones_like(x)
+            return values[degree + 1]
+
+    def GetPolynomials(self, input_data, degree, recurrence, get_array=None):
+        """
+        Get the polynomials of the degrees 1 to N of the given input.
+
+        :param input_data: the input signal or array
+        :param degree: the highest degree N
+        :param recurrence: the recurrence function of the polynomial family Eg, hermite_recurrence
+        :param get_array: a function, which converts the input to an array, if the input is not an array
+        :return: an array of the shape (N,) + the shape of the input array
+        """
+        with self.__lock:
+            x, values = self.__GetValues(input_data, degree, recurrence, get_array)
+            return numpy.array(values[2:degree + 2]).reshape((degree,) + x.shape)
+
+    def __GetValues(self, input_data, degree, recurrence, get_array):
+        """
+        Get the input array and the list of the polynomials of the input, which contains the polynomial of the degree
+        k at the index k + 1 up to at least the given degree. The polynomials of the degrees -1 and 0 are represented by
+        the scalars 0 and 1.
+        """
+        if isinstance(input_data, sumpf.Signal):
+            array = None
+            key = (id(input_data), recurrence)
+        else:
+            # the array is copied, so that changes of the input do not affect the cached polynomials
+            array = numpy.array(self.__GetArray(input_data, get_array))
+            key = (hashlib.sha1(array.view(numpy.uint8)).hexdigest(), array.shape, array.dtype.str, recurrence)
+        if key in self.__series and (array is not None or self.__series[key][0] is input_data):
+            entry = self.__series.pop(key)
+        else:
+            if array is None:
+                array = self.__GetArray(input_data, get_array)
+            entry = (input_data, array, [0.0, 1.0])
+            while len(self.__series) >= self.__maximum_inputs:
+                self.__series.popitem(last=False)
+        self.__series[key] = entry
+        x, values = entry[1], entry[2]
+        while len(values) <= degree + 1:
+            n = len(values) - 2
+            values.append(recurrence_step(x, n, values[n + 1], values[n], recurrence))
+        return x, values
+
+    def __GetArray(self, input_data, get_array):
+        """
+        Convert the input to an array of floats.
+        """
+        if get_array is None:
+            array = numpy.asarray(input_data)
+        else:
+            array = numpy.asarray(get_array(input_data))
+        if array.dtype not in (numpy.float32, numpy.float64):
+            array = array.astype(numpy.float64)
+        return array
 
 
 def power(degree=None):
@@ -310,6 +766,134 @@ def power(degree=None):
     return func
 
 
+def evaluate_recurrence(channel, degree, recurrence):
+    """
+    Evaluate a polynomial of an orthogonal family, which is defined by a three-term recurrence of the form
+    p_(n+1)(x) = (a_n * x + b_n) * p_n(x) - c_n * p_(n-1)(x) with p_0(x) = 1 and p_(-1)(x) = 0, on a whole array of
+    samples. The recurrence is computed with in-place operations on preallocated arrays, so that no temporary arrays
+    are created per degree.
+
+    :param channel: the array of samples
+    :param degree: the degree of the polynomial
+    :param recurrence: a function, which takes n and returns the coefficients (a_n, b_n, c_n)
+    :return: the array of the polynomial values
+    """
+    x = numpy.asarray(channel)
+    if x.dtype not in (numpy.float32, numpy.float64):
+        x = x.astype(numpy.float64)
+    current = numpy.ones_like(x)
+    previous = numpy.zeros_like(x)
+    scratch = numpy.empty_like(x)
+    for n in range(degree):
+        a, b, c = recurrence(n)
+        numpy.multiply(x, a, out=scratch)
+        if b != 0.0:
+            scratch += b
+        scratch *= current
+        previous *= -c
+        previous += scratch
+        previous, current = current, previous
+    return current
+
+
+def recurrence_step(x, n, current, previous, recurrence, out=None):
+    """
+    Compute the polynomial of the degree n + 1 from the polynomials of the degrees n and n - 1 with a three-term
+    recurrence. See evaluate_recurrence.
+
+    :param x: the array of samples
+    :param n: the degree of the current polynomial
+    :param current: the polynomial of the degree n as an array or a scalar
+    :param previous: the polynomial of the degree n - 1 as an array or a scalar
+    :param recurrence: the recurrence function of the polynomial family
+    :param out: an optional array for the result
+    :return: the polynomial of the degree n + 1
+    """
+    a, b, c = recurrence(n)
+    if out is None:
+        out = numpy.empty_like(x)
+    numpy.multiply(x, a, out=out)
+    if b != 0.0:
+        out += b
+    out *= current
+    if c != 0.0:
+        out -= numpy.multiply(previous, c)
+    return out
+
+
+def evaluate_polynomial_basis(channel, degree, recurrence):
+    """
+    Evaluate all polynomials of the degrees 1 to N of a family, which is defined by a three-term recurrence, in a
+    single pass of the recurrence.
+
+    :param channel: the array of samples
+    :param degree: the highest degree N
+    :param recurrence: the recurrence function of the polynomial family Eg, chebyshev_recurrence
+    :return: an array of the shape (N,) + the shape of the input array, whose k-th row is the polynomial of the
+             degree k + 1
+    """
+    x = numpy.asarray(channel)
+    if x.dtype not in (numpy.float32, numpy.float64):
+        x = x.astype(numpy.float64)
+    basis = numpy.empty((degree,) + x.shape, dtype=x.dtype)
+    previous, current = 0.0, 1.0
+    for n in range(degree):
+        previous, current = current, recurrence_step(x, n, current, previous, recurrence, out=basis[n])
+    return basis
+
+
+def power_recurrence(n):
+    """
+    Get the coefficients of the recurrence of the powers x^(n+1) = x * x^n.
+
+    :param n: the degree of the last computed power
+    :return: the coefficients (a_n, b_n, c_n)
+    """
+    return 1.0, 0.0, 0.0
+
+
+def chebyshev_recurrence(n):
+    """
+    Get the coefficients of the three-term recurrence of the Chebyshev polynomials of the first kind.
+
+    :param n: the degree of the last computed polynomial
+    :return: the coefficients (a_n, b_n, c_n)
+    """
+    if n == 0:
+        return 1.0, 0.0, 0.0
+    return 2.0, 0.0, 1.0
+
+
+def hermite_recurrence(n):
+    """
+    Get the coefficients of the three-term recurrence of the probabilists' Hermite polynomials.
+
+    :param n: the degree of the last computed polynomial
+    :return: the coefficients (a_n, b_n, c_n)
+    """
+    return 1.0, 0.0, float(n)
+
+
+def legendre_recurrence(n):
+    """
+    Get the coefficients of the three-term recurrence of the Legendre polynomials.
+
+    :param n: the degree of the last computed polynomial
+    :return: the coefficients (a_n, b_n, c_n)
+    """
+    return (2.0 * n + 1.0) / (n + 1.0), 0.0, n / (n + 1.0)
+
+
+def laguerre_recurrence(n):
+    """
+    Get the coefficients of the three-term recurrence of the Laguerre polynomials.
+
+    :param n: the degree of the last computed polynomial
+    :return: the coefficients (a_n, b_n, c_n)
+    """
+    return -1.0 / (n + 1.0), (2.0 * n + 1.0) / (n + 1.0), n / (n + 1.0)
+
+
 def chebyshev_polynomial(degree=None):
     """
     A function to generate chebyshev polynomial of an array of samples.
@@ -319,10 +903,7 @@ def chebyshev_polynomial(degree=None):
     """
 
     def func(channel):
-        channell = []
-        for i in range(0, len(channel)):
-            channell.append(numpy.polynomial.Chebyshev.basis(deg=degree)(channel[i]))
-        return numpy.asarray(channell)
+        return evaluate_recurrence(channel, degree, chebyshev_recurrence)
 
     return func
 
@@ -336,10 +917,7 @@ def hermite_polynomial(degree=None):
     """
 
     def func(channel):
-        channell = []
-        for i in range(0, len(channel)):
-            channell.append(numpy.polynomial.HermiteE.basis(deg=degree)(channel[i]))
-        return numpy.asarray(channell)
+        return evaluate_recurrence(channel, degree, hermite_recurrence)
 
     return func
 
@@ -353,10 +931,7 @@ def legendre_polynomial(degree=None):
     """
 
     def func(channel):
-        channell = []
-        for i in range(0, len(channel)):
-            channell.append(numpy.polynomial.Legendre.basis(deg=degree)(channel[i]))
-        return numpy.asarray(channell)
+        return evaluate_recurrence(channel, degree, legendre_recurrence)
 
     return func
 
@@ -370,41 +945,210 @@ def laguerre_polynomial(degree=None):
     """
 
     def func(channel):
-        channell = []
-        for i in range(0, len(channel)):
-            channell.append(numpy.polynomial.Laguerre.basis(deg=degree)(channel[i]))
-        return numpy.asarray(channell)
+        return evaluate_recurrence(channel, degree, laguerre_recurrence)
 
     return func
 
 
-def hard_clip(thresholds=None):
+def hard_clip(thresholds=None, antiderivative_order=0):
     """
     A function which hard clips an array of samples.
 
     :param thresholds: the thresholds of clipping
-    :return: the clipping function
+    :param antiderivative_order: the order of the antiderivative anti-aliasing Eg, 0, 1 or 2
+    :return: the clipping function, which takes an array of samples and an optional output array, which may be the
+             input array to clip the samples in place. With the antiderivative anti-aliasing, the function takes an
+             array of channels, which are processed along the last axis, and it has no output array.
     """
+    if thresholds is None:
+        thresholds = [-1.0, 1.0]
+    lower, upper = float(thresholds[0]), float(thresholds[1])
 
-    def func(channel):
-        signal = sumpf.Signal(channels=(channel,), samplingrate=48000, labels=("nl",))
-        clipped = sumpf.modules.ClipSignal(signal=signal, thresholds=thresholds)
-        return numpy.asarray(clipped.GetOutput().GetChannels()[0])
+    def func(channel, out=None):
+        return numpy.clip(channel, lower, upper, out=out)
 
-    return func
+    if antiderivative_order == 0:
+        return func
+
+    def antiderivative1(x):
+        clipped = numpy.clip(x, lower, upper)
+        return clipped * x - 0.5 * clipped * clipped
+
+    def antiderivative2(x):
+        clipped = numpy.clip(x, lower, upper)
+        return clipped * (0.5 * x * x - 0.5 * clipped * x + clipped * clipped / 6.0)
+
+    return antiderivative_antialiasing(function=func, antiderivative1=antiderivative1,
+                                       antiderivative2=antiderivative2, order=antiderivative_order)
 
 
-def soft_clip(thresholds=None):
+def soft_clip(thresholds=None, antiderivative_order=0):
     """
-    A function which soft clips an array of samples
+    A function which soft clips an array of samples. Like in nlsp.sumpf.SoftClipSignal, the samples of each channel are
+    normalized to a peak of 1 and processed with the function (1 - p * |x|) * x, in which p = 1 - threshold.
 
     :param thresholds: the thresholds of clipping
-    :return: the clipping function
+    :param antiderivative_order: the order of the antiderivative anti-aliasing Eg, 0, 1 or 2
+    :return: the clipping function, which takes an array of channels, which are normalized and processed along the
+             last axis, and an optional output array, which may be the input array to clip the samples in place. With
+             the antiderivative anti-aliasing, the function has no output array.
+    """
+    if thresholds is None:
+        power_factor = 0.0
+    else:
+        if abs(thresholds[0]) != thresholds[1]:
+            raise NotImplementedError("SoftClipSignal class only supports symmetric clipping")
+        power_factor = 1.0 - thresholds[1]
+
+    def normalize(channel, out=None):
+        channel = numpy.asarray(channel)
+        if channel.dtype not in (numpy.float32, numpy.float64):
+            channel = channel.astype(numpy.float64)
+        if channel.size == 0:
+            return channel.copy() if out is None else out
+        peak = numpy.max(numpy.abs(channel), axis=-1, keepdims=True)
+        peak[peak == 0.0] = 1.0
+        return numpy.divide(channel, peak, out=out)
+
+    def func(channel, out=None):
+        out = normalize(channel, out=out)
+        if power_factor != 0.0:
+            correction = numpy.abs(out)
+            correction *= out
+            correction *= power_factor
+            out -= correction
+        return out
+
+    if antiderivative_order == 0:
+        return func
+
+    # the antiderivatives of the curve inside [-1, 1], which are continued with the constant slope of the curve outside
+    def curve(x):
+        return x - power_factor * x * numpy.abs(x)
+
+    def antiderivative1(x):
+        clipped = numpy.clip(x, -1.0, 1.0)
+        return 0.5 * clipped ** 2 - power_factor * numpy.abs(clipped) ** 3 / 3.0 + curve(clipped) * (x - clipped)
+
+    def antiderivative2(x):
+        clipped = numpy.clip(x, -1.0, 1.0)
+        difference = x - clipped
+        return clipped ** 3 / 6.0 - power_factor * clipped * numpy.abs(clipped) ** 3 / 12.0 + \
+               (0.5 * clipped ** 2 - power_factor * numpy.abs(clipped) ** 3 / 3.0) * difference + \
+               curve(clipped) * difference ** 2 / 2.0
+
+    antialiased = antiderivative_antialiasing(function=lambda x: curve(numpy.clip(x, -1.0, 1.0)),
+                                              antiderivative1=antiderivative1, antiderivative2=antiderivative2,
+                                              order=antiderivative_order)
+    return lambda channels: antialiased(normalize(channels))
+
+
+def antiderivative_antialiasing(function, antiderivative1, antiderivative2=None, order=1, tolerance=None):
+    """
+    A function to evaluate a memoryless nonlinear function with the antiderivative anti-aliasing. Instead of the
+    function, the first order method computes the average of the function over the linear interpolation between two
+    successive samples, which is the difference quotient of the first antiderivative. The second order method computes
+    the average over two intervals with the second antiderivative. This suppresses the aliasing at the original
+    sampling rate, but it delays the output by half a sample per order and slightly attenuates the high frequencies.
+    If the samples are too close for a numerically stable difference quotient, the function is evaluated at the
+    midpoint instead. The sample before the first sample of each channel is assumed to be equal to the first sample.
+
+    :param function: the nonlinear function, which takes an array and returns an array
+    :param antiderivative1: the first antiderivative of the function
+    :param antiderivative2: the second antiderivative of the function, which is needed for the second order method
+    :param order: the order of the method Eg, 1 or 2
+    :param tolerance: the smallest distance of the samples, for which the difference quotients are computed, if it is
+                      None, a suitable tolerance for the order is taken
+    :return: the function, which takes an array of channels, that are processed along the last axis
+    """
+    if order not in (1, 2):
+        raise ValueError("The order of the antiderivative anti-aliasing must be 1 or 2")
+    if tolerance is None:
+        tolerance = 1e-5 if order == 1 else 1e-3
+
+    def delay(x, first):
+        delayed = numpy.empty_like(x)
+        delayed[..., 1:] = x[..., :-1]
+        delayed[..., :1] = first
+        return delayed
+
+    def difference_quotient(x, x1, f_x, f_x1, fallback):
+        difference = x - x1
+        ill_conditioned = numpy.abs(difference) < tolerance
+        result = (f_x - f_x1) / numpy.where(ill_conditioned, 1.0, difference)
+        if numpy.any(ill_conditioned):
+            result[ill_conditioned] = fallback(0.5 * (x[ill_conditioned] + x1[ill_conditioned]))
+        return result
+
+    def func(channels):
+        channels = numpy.asarray(channels)
+        dtype = channels.dtype if channels.dtype in (numpy.float32, numpy.float64) else numpy.float64
+        x = channels.astype(numpy.float64)
+        x1 = delay(x, x[..., :1])
+        if order == 1:
+            return difference_quotient(x, x1, antiderivative1(x), antiderivative1(x1), function).astype(dtype)
+        f2_x = antiderivative2(x)
+        f2_x1 = delay(f2_x, f2_x[..., :1])
+        quotient = difference_quotient(x, x1, f2_x, f2_x1, antiderivative1)
+        quotient1 = delay(quotient, quotient[..., :1])
+        x2 = delay(x1, x[..., :1])
+        difference = x - x2
+        ill_conditioned = numpy.abs(difference) < tolerance
+        result = 2.0 * (quotient - quotient1) / numpy.where(ill_conditioned, 1.0, difference)
+        if numpy.any(ill_conditioned):
+            mean = 0.5 * (x[ill_conditioned] + x2[ill_conditioned])
+            middle = x1[ill_conditioned]
+            delta = mean - middle
+            close = numpy.abs(delta) < tolerance
+            safe_delta = numpy.where(close, 1.0, delta)
+            result[ill_conditioned] = numpy.where(
+                close, function(0.5 * (mean + middle)),
+                2.0 / safe_delta * (antiderivative1(mean) +
+                                    (antiderivative2(middle) - antiderivative2(mean)) / safe_delta))
+        return result.astype(dtype)
+
+    return func
+
+
+def lookup_table(table, input_range, interpolation=LookupTable.LINEAR):
+    """
+    A function which evaluates a lookup table on a uniform grid with a linear or cubic interpolation. The coefficients
+    of the interpolation polynomials of all grid intervals are computed once, so that an evaluation takes one
+    gather and a few multiply-adds per sample. The cubic interpolation is a Catmull-Rom spline, whose tangents are
+    the central differences of the table.
+
+    :param table: the output values at the grid points
+    :param input_range: the input values of the first and the last grid point
+    :param interpolation: the interpolation method Eg, LookupTable.LINEAR or LookupTable.CUBIC
+    :return: the interpolation function
     """
+    table = numpy.asarray(table, dtype=numpy.float64)
+    intervals = len(table) - 1
+    scale = intervals / float(input_range[1] - input_range[0])
+    if interpolation == LookupTable.LINEAR:
+        coefficients = numpy.array([table[:-1], numpy.diff(table)])
+    elif interpolation == LookupTable.CUBIC:
+        padded = numpy.concatenate(([2.0 * table[0] - table[1]], table, [2.0 * table[-1] - table[-2]]))
+        tangents = (padded[2:] - padded[:-2]) / 2.0
+        difference = numpy.diff(table)
+        coefficients = numpy.array([table[:-1], tangents[:-1],
+                                    3.0 * difference - 2.0 * tangents[:-1] - tangents[1:],
+                                    tangents[:-1] + tangents[1:] - 2.0 * difference])
+    else:
+        raise ValueError("The interpolation method must be LookupTable.LINEAR or LookupTable.CUBIC")
 
     def func(channel):
-        signal = sumpf.Signal(channels=(channel,), samplingrate=48000, labels=("nl",))
-        clipped = nlsp.sumpf.SoftClipSignal(signal=signal, thresholds=thresholds)
-        return numpy.asarray(clipped.GetOutput().GetChannels()[0])
+        channel = numpy.asarray(channel)
+        dtype = channel.dtype if channel.dtype in (numpy.float32, numpy.float64) else numpy.float64
+        position = numpy.subtract(channel, input_range[0], dtype=numpy.float64)
+        position *= scale
+        numpy.clip(position, 0.0, intervals, out=position)
+        index = numpy.minimum(position.astype(numpy.intp), intervals - 1)
+        position -= index
+        result = coefficients[-1].take(index)
+        for c in coefficients[-2::-1]:
+            result *= position
+            result += c.take(index)
+        return result.astype(dtype, copy=False)
 
     return func
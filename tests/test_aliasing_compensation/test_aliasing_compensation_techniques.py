@@ -1,3 +1,4 @@
+import numpy
 import sumpf
 import nlsp
 import nlsp.common.helper_functions_private as private_functions
@@ -16,3 +17,79 @@ def test_noaliasingcompensation():
     preprocessing_energy = private_functions.calculateenergy_timedomain(preprocessing_output)
     postprocessing_energy = private_functions.calculateenergy_timedomain(postprocessing_output)
     assert preprocessing_energy == postprocessing_energy
+
+
+def test_shared_preprocessing():
+    """
+    Test whether aliasing compensations, which share a preprocessing cache, resample the same input signal only once for
+    the same target sampling rate.
+    """
+    input_signal = sumpf.modules.SweepGenerator(samplingrate=48000, length=2 ** 12).GetSignal()
+    cache = nlsp.aliasing_compensation.PreprocessingCache()
+    compensations = [nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(maximum_harmonics=h)
+                     for h in (2, 3, 4)]
+    outputs = []
+    for compensation in compensations:
+        compensation._SetPreprocessingCache(cache)
+        compensation.SetPreprocessingInput(input_signal)
+        outputs.append(compensation.GetPreprocessingOutput())
+    assert outputs[0] is outputs[1]
+    assert outputs[1] is not outputs[2]
+    uncached = nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(maximum_harmonics=3)
+    uncached.SetPreprocessingInput(input_signal)
+    assert private_functions.calculateenergy_timedomain(uncached.GetPreprocessingOutput()) == \
+           private_functions.calculateenergy_timedomain(outputs[1])
+
+
+def test_preprocessing_output_is_kept():
+    """
+    Test whether the output of the preprocessing unit is kept until the input signal or the maximum harmonics are
+    changed, and whether the attenuation factor matches the sampling rates of the preprocessing.
+    """
+    input_signal = sumpf.modules.SweepGenerator(samplingrate=48000, length=2 ** 12).GetSignal()
+    for compensation in (nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation(maximum_harmonics=3),
+                         nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(maximum_harmonics=3),
+                         nlsp.aliasing_compensation.LowpassAliasingCompensation(maximum_harmonics=3)):
+        compensation.SetPreprocessingInput(input_signal)
+        output = compensation.GetPreprocessingOutput()
+        assert compensation.GetPreprocessingOutput() is output
+        assert compensation._GetAttenuation() == float(input_signal.GetSamplingRate()) / output.GetSamplingRate()
+        compensation.SetMaximumHarmonics(3)
+        assert compensation.GetPreprocessingOutput() is output
+        compensation.SetMaximumHarmonics(5)
+        modified = compensation.GetPreprocessingOutput()
+        assert modified is not output
+        assert compensation._GetAttenuation() == float(input_signal.GetSamplingRate()) / modified.GetSamplingRate()
+        compensation.SetPreprocessingInput(sumpf.modules.SweepGenerator(samplingrate=48000, length=2 ** 11).GetSignal())
+        assert len(compensation.GetPreprocessingOutput()) != len(modified)
+
+
+def test_polyphase_resampling():
+    """
+    Test whether the polyphase resampling upsamples and downsamples a band-limited signal without a delay, whether the
+    block processing gives the same result as the processing of the whole signal, and whether the upsampling aliasing
+    compensations can use it as resampling algorithm.
+    """
+    sampling_rate = 48000.0
+    samples = numpy.sin(2.0 * numpy.pi * 1000.0 / sampling_rate * numpy.arange(2 ** 12))
+    resampling = nlsp.aliasing_compensation.PolyphaseResampling()
+    upsampled = resampling.Upsample([samples], 3)
+    reference = numpy.sin(2.0 * numpy.pi * 1000.0 / (3 * sampling_rate) * numpy.arange(3 * 2 ** 12))
+    assert numpy.max(numpy.abs(upsampled[0, 600:-600] - reference[600:-600])) < 1e-3
+    downsampled = resampling.Downsample(upsampled, 3)
+    assert numpy.max(numpy.abs(downsampled[0, 200:-200] - samples[200:-200])) < 1e-3
+    upsampler = resampling.GetUpsampler(3)
+    blocks = numpy.concatenate([upsampler.ProcessBlock([samples[i:i + 256]]) for i in range(0, len(samples), 256)],
+                               axis=-1)
+    assert numpy.allclose(blocks[:, upsampler.GetDelay():], upsampled[:, :-upsampler.GetDelay()])
+    signal = sumpf.Signal(channels=(tuple(samples),), samplingrate=sampling_rate, labels=("Sine",))
+    for compensation, factor in ((nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation, 3),
+                                 (nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation, 2)):
+        model = nlsp.HammersteinGroupModel(input_signal=signal,
+                                           nonlinear_functions=(nlsp.nonlinear_functions.Power(degree=3),),
+                                           aliasing_compensation=compensation(
+                                               resampling_algorithm=nlsp.aliasing_compensation.PolyphaseResampling()))
+        output = numpy.asarray(model.GetOutput().GetChannels()[0])
+        reference = resampling.Downsample(resampling.Upsample([samples], factor) ** 3, factor)[0]
+        assert len(output) == len(reference)
+        assert numpy.allclose(output, reference)
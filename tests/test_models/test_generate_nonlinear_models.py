@@ -1,3 +1,5 @@
+import multiprocessing.pool
+import numpy
 import sumpf
 import nlsp
 
@@ -181,3 +183,376 @@ def test_filterlength_signallength():
                                aliasing_compensation=nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation())
     ser = nlsp.evaluations.CompareWithReference(reference_signal=sample_signal, signal_to_be_evaluated=HM.GetOutput())
     assert ser.GetSignaltoErrorRatio()[0] >= 55
+
+
+def test_fused_summation():
+    """
+    Test whether the HGM with fused summation of the branch spectra gives the same output as the HGM with adders.
+    """
+    branches = 3
+    sweep = sumpf.modules.SweepGenerator(start_frequency=20.0, stop_frequency=20000.0, samplingrate=48000.0,
+                                         length=2 ** 14).GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=48000)
+    HGM = nlsp.HammersteinGroupModel(input_signal=sweep,
+                                     nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1) for i in range(branches)],
+                                     filter_impulseresponses=filter_irs,
+                                     aliasing_compensation=nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation())
+    HGM_fused = nlsp.HammersteinGroupModel(input_signal=sweep,
+                                           nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1) for i in
+                                                                range(branches)],
+                                           filter_impulseresponses=filter_irs,
+                                           aliasing_compensation=nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(),
+                                           fused_summation=True)
+    energy = nlsp.common.helper_functions_private.calculateenergy_timedomain(HGM.GetOutput())[0]
+    energy_fused = nlsp.common.helper_functions_private.calculateenergy_timedomain(HGM_fused.GetOutput())[0]
+    assert abs(energy - energy_fused) <= 1e-6 * energy
+    HGM_fused.SetInput(sumpf.modules.SineWaveGenerator(frequency=1000.0, samplingrate=48000.0,
+                                                       length=2 ** 14).GetSignal())
+    assert nlsp.common.helper_functions_private.calculateenergy_timedomain(HGM_fused.GetOutput())[0] != energy_fused
+
+
+def test_filter_spectrum_cache():
+    """
+    Test whether the cached filter spectra give the same output as the uncached convolution and whether the least
+    recently used spectra are evicted from the cache.
+    """
+    sampling_rate = 48000
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed="signal").GetSignal()
+    filter_kernel = nlsp.helper_functions.create_arrayof_bpfilter(branches=1, sampling_rate=sampling_rate)[0]
+    convolution = nlsp.common.helper_functions_private.FilterConvolution(input_signal=input_signal,
+                                                                         filter_impulseresponse=filter_kernel)
+    output1 = convolution.GetOutput()
+    convolution.SetInput(input_signal)
+    output2 = convolution.GetOutput()
+    padded_kernel = nlsp.common.helper_functions_private.append_zeros(filter_kernel, len(input_signal))
+    reference = sumpf.modules.InverseFourierTransform(
+        sumpf.modules.FourierTransform(input_signal).GetSpectrum() *
+        sumpf.modules.FourierTransform(padded_kernel).GetSpectrum()).GetSignal()
+    energy_reference = nlsp.common.helper_functions_private.calculateenergy_timedomain(reference)[0]
+    energy1 = nlsp.common.helper_functions_private.calculateenergy_timedomain(output1)[0]
+    energy2 = nlsp.common.helper_functions_private.calculateenergy_timedomain(output2)[0]
+    assert abs(energy1 - energy_reference) <= 1e-6 * energy_reference
+    assert energy1 == energy2
+    cache = nlsp.common.helper_functions_private.FilterSpectrumCache(filter_impulseresponse=filter_kernel,
+                                                                     maximum_entries=2)
+    spectrum = cache.GetSpectrum(2 ** 12, sampling_rate)
+    cache.GetSpectrum(2 ** 13, sampling_rate)
+    assert cache.GetSpectrum(2 ** 12, sampling_rate) is spectrum
+    cache.GetSpectrum(2 ** 14, sampling_rate)
+    cache.GetSpectrum(2 ** 13, sampling_rate)
+    assert cache.GetSpectrum(2 ** 12, sampling_rate) is not spectrum
+
+
+def test_batch_processing():
+    """
+    Test whether the batch processing of the HGM gives the same outputs as processing each signal separately.
+    """
+    branches = 3
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    input_signals = [sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed=seed).GetSignal()
+                     for seed in ("one", "two", "three")]
+    batch = numpy.array([s.GetChannels()[0] for s in input_signals])
+    for aliasing_compensation in (nlsp.aliasing_compensation.NoAliasingCompensation(),
+                                  nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation()):
+        HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                              for i in range(branches)],
+                                         filter_impulseresponses=filter_irs,
+                                         aliasing_compensation=aliasing_compensation)
+        batch_output = HGM.ProcessBatch(batch, sampling_rate=sampling_rate)
+        assert batch_output.shape == batch.shape
+        for input_signal, output in zip(input_signals, batch_output):
+            HGM.SetInput(input_signal)
+            reference = HGM.GetOutput()
+            evaluated = sumpf.Signal(channels=(tuple(output),), samplingrate=sampling_rate)
+            ser = nlsp.evaluations.CompareWithReference(reference_signal=reference, signal_to_be_evaluated=evaluated)
+            assert ser.GetSignaltoErrorRatio()[0] >= 60
+
+
+def test_parallel_branches():
+    """
+    Test whether the parallel evaluation of the branches on a thread pool gives the same output as the sequential
+    evaluation.
+    """
+    branches = 3
+    sampling_rate = 48000
+    pool = multiprocessing.pool.ThreadPool(processes=branches)
+    sweep = sumpf.modules.SweepGenerator(samplingrate=sampling_rate, length=2 ** 14).GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    models = []
+    for executor in (None, pool):
+        models.append(nlsp.HammersteinGroupModel(input_signal=sweep,
+                                                 nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                                      for i in range(branches)],
+                                                 filter_impulseresponses=filter_irs,
+                                                 aliasing_compensation=nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation(),
+                                                 fused_summation=True, executor=executor))
+    sequential, parallel = models
+    assert sequential.GetOutput().GetChannels() == parallel.GetOutput().GetChannels()
+    batch = numpy.array(sweep.GetChannels())
+    assert numpy.array_equal(sequential.ProcessBatch(batch), parallel.ProcessBatch(batch))
+    pool.close()
+
+
+def test_single_precision():
+    """
+    Test whether the simulation in single precision stays within the documented accuracy bound of the simulation in
+    double precision.
+    """
+    branches = 3
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed="one").GetSignal()
+    nonlinear_functions = [nlsp.nonlinear_function.Power(i + 1) for i in range(branches)]
+    HGM_double = nlsp.HammersteinGroupModel(nonlinear_functions=nonlinear_functions, filter_impulseresponses=filter_irs,
+                                            precision=nlsp.common.precision.DOUBLE)
+    HGM_single = HGM_double.CreateModified(nonlinear_functions=[nl.CreateModified() for nl in nonlinear_functions],
+                                           precision=nlsp.common.precision.SINGLE)
+    batch = numpy.array(input_signal.GetChannels())
+    output_double = HGM_double.ProcessBatch(batch, sampling_rate=sampling_rate)
+    output_single = HGM_single.ProcessBatch(batch, sampling_rate=sampling_rate)
+    assert output_double.dtype == numpy.float64
+    assert output_single.dtype == numpy.float32
+    reference = nlsp.common.helper_functions_private.array_to_signal(output_double, samplingrate=sampling_rate)
+    evaluated = nlsp.common.helper_functions_private.array_to_signal(output_single, samplingrate=sampling_rate)
+    ser = nlsp.evaluations.CompareWithReference(reference_signal=reference, signal_to_be_evaluated=evaluated)
+    assert ser.GetSignaltoErrorRatio()[0] >= nlsp.common.precision.SINGLE_PRECISION_SER
+
+
+def test_compiled_model():
+    """
+    Test whether the compiled execution plan of the HGM gives the same output as the batch processing of the model.
+    """
+    branches = 3
+    sampling_rate = 48000
+    length = 2 ** 11
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=length, seed="one").GetSignal()
+    batch = numpy.array(input_signal.GetChannels())
+    for downsampling_position in (nlsp.HammersteinGroupModel.AFTERNONLINEARBLOCK,
+                                  nlsp.HammersteinGroupModel.AFTERLINEARBLOCK):
+        for aliasing_compensation in (nlsp.aliasing_compensation.NoAliasingCompensation(),
+                                      nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation()):
+            HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                                  for i in range(branches)],
+                                             filter_impulseresponses=filter_irs,
+                                             aliasing_compensation=aliasing_compensation,
+                                             downsampling_position=downsampling_position)
+            compiled = HGM.Compile(length=length, sampling_rate=sampling_rate)
+            assert compiled.GetInputShape() == batch.shape
+            reference = HGM.ProcessBatch(batch, sampling_rate=sampling_rate)
+            for i in range(2):
+                output = compiled.Process(batch)
+                assert output.shape == reference.shape
+                assert numpy.allclose(output, reference)
+            assert numpy.allclose(compiled.Process(batch[0]), reference[0])
+
+
+def test_convolution_strategy():
+    """
+    Test whether the linear convolution of the HGM gives the same output with the direct and the fast convolution and
+    in the batch processing.
+    """
+    branches = 2
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=2 ** 6)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 11, seed="one").GetSignal()
+    x = numpy.asarray(input_signal.GetChannels()[0])
+    reference = numpy.zeros(len(x))
+    for i, ir in enumerate(filter_irs):
+        reference += numpy.convolve(x ** (i + 1), numpy.asarray(ir.GetChannels()[0]))[:len(x)]
+    outputs = []
+    for method in (nlsp.common.convolution_strategy.ConvolutionStrategy.DIRECT,
+                   nlsp.common.convolution_strategy.ConvolutionStrategy.FFT,
+                   nlsp.common.convolution_strategy.ConvolutionStrategy.AUTOMATIC):
+        strategy = nlsp.common.convolution_strategy.ConvolutionStrategy(method=method)
+        HGM = nlsp.HammersteinGroupModel(input_signal=input_signal,
+                                         nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                              for i in range(branches)],
+                                         filter_impulseresponses=filter_irs, convolution_strategy=strategy)
+        output = numpy.asarray(HGM.GetOutput().GetChannels()[0])
+        assert numpy.allclose(output, reference)
+        assert numpy.allclose(HGM.ProcessBatch(x, sampling_rate=sampling_rate)[0], reference)
+    assert nlsp.common.convolution_strategy.next_fast_length(1025) == 1080
+
+
+def test_parallel_simulation():
+    """
+    Test whether the segment parallel simulation in a process pool gives the same output as the simulation of the
+    whole signal with a linear convolution.
+    """
+    branches = 3
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=2 ** 8)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 13, seed="one").GetSignal()
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                          for i in range(branches)],
+                                     filter_impulseresponses=filter_irs,
+                                     convolution_strategy=nlsp.common.convolution_strategy.ConvolutionStrategy())
+    reference = HGM.ProcessBatch(numpy.array(input_signal.GetChannels()), sampling_rate=sampling_rate)
+    for segment_length in (None, 1000):
+        output = nlsp.simulate_parallel(HGM, input_signal, processes=2, segment_length=segment_length)
+        assert output.GetSamplingRate() == sampling_rate
+        assert numpy.allclose(output.GetArray(), reference)
+
+
+def test_parallel_simulation_with_aliasing_compensation():
+    """
+    Test whether the segment parallel simulation of models with the upsampling compensations and the polyphase
+    resampling gives the same output as the simulation of the whole signal, and whether the compensations, which
+    resample the whole signal at once, are rejected.
+    """
+    branches = 3
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=2 ** 8)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 13, seed="one").GetSignal()
+    resampling = nlsp.aliasing_compensation.PolyphaseResampling()
+    strategy = nlsp.common.convolution_strategy.ConvolutionStrategy()
+    for aliasing_compensation in (nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation(
+                                      resampling_algorithm=resampling),
+                                  nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(
+                                      resampling_algorithm=resampling)):
+        for downsampling_position in (nlsp.HammersteinGroupModel.AFTERNONLINEARBLOCK,
+                                      nlsp.HammersteinGroupModel.AFTERLINEARBLOCK):
+            HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                                  for i in range(branches)],
+                                             filter_impulseresponses=filter_irs,
+                                             aliasing_compensation=aliasing_compensation,
+                                             downsampling_position=downsampling_position,
+                                             convolution_strategy=strategy)
+            reference = HGM.ProcessBatch(numpy.array(input_signal.GetChannels()), sampling_rate=sampling_rate)
+            for segment_length in (None, 1000):
+                output = nlsp.simulate_parallel(HGM, input_signal, processes=2, segment_length=segment_length)
+                assert numpy.allclose(output.GetArray(), reference)
+    spectrum_resampling = nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation()
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(2)],
+                                     filter_impulseresponses=filter_irs[:1], aliasing_compensation=spectrum_resampling)
+    try:
+        nlsp.simulate_parallel(HGM, input_signal, processes=1)
+    except NotImplementedError:
+        pass
+    else:
+        assert False
+
+
+def test_many_branches():
+    """
+    Test whether the output of a HGM with many branches, whose input is set before the output is requested for the
+    first time, is equal to the sum of the outputs of the Hammerstein models of the branches.
+    """
+    branches = 24
+    sampling_rate = 48000
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed="signal").GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(degree=i % 4 + 1)
+                                                          for i in range(branches)],
+                                     filter_impulseresponses=filter_irs)
+    assert len(HGM.GetNonlinearFunctions()) == branches
+    HGM.SetInput(input_signal)
+    output = numpy.asarray(HGM.GetOutput().GetChannels())
+    reference = 0.0
+    for i, ir in enumerate(filter_irs):
+        HM = nlsp.HammersteinModel(input_signal=input_signal,
+                                   nonlinear_function=nlsp.nonlinear_function.Power(degree=i % 4 + 1),
+                                   filter_impulseresponse=ir)
+        reference = reference + numpy.asarray(HM.GetOutput().GetChannels())
+    assert numpy.allclose(output, reference)
+
+
+def test_multirate_model():
+    """
+    Test whether the multirate model decimates the branches with band-limited filter kernels, whether its measured
+    accuracy is close to the expected one and whether it equals the full rate model, if no branch is decimated.
+    """
+    sampling_rate = 48000
+    length = 2 ** 11
+    n = numpy.arange(length) - length // 2
+    kernels = [numpy.sinc(2.0 * cutoff * n) * 2.0 * cutoff * numpy.hanning(length) for cutoff in (0.4, 0.1, 0.05)]
+    filter_irs = [sumpf.Signal(channels=(tuple(k),), samplingrate=sampling_rate) for k in kernels]
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(degree=i + 1)
+                                                          for i in range(len(filter_irs))],
+                                     filter_impulseresponses=filter_irs,
+                                     convolution_strategy=nlsp.common.convolution_strategy.ConvolutionStrategy())
+    input_signal = numpy.random.RandomState(0).uniform(-1.0, 1.0, 2 ** 14)
+    multirate = nlsp.MultirateHammersteinGroupModel(HGM, minimum_ser=60.0)
+    factors = multirate.GetDecimationFactors()
+    assert factors[0] == 1
+    assert factors[1] > 1 and factors[2] >= factors[1]
+    assert min(multirate.GetExpectedBranchSignalToErrorRatios()) >= 60.0
+    assert multirate.EvaluateSignalToErrorRatio(input_signal) >= 50.0
+    assert multirate.Process(input_signal).shape == input_signal.shape
+    full_rate = nlsp.MultirateHammersteinGroupModel(HGM, minimum_ser=float("inf"))
+    assert full_rate.GetDecimationFactors() == [1, 1, 1]
+    assert numpy.allclose(full_rate.Process(input_signal), HGM.ProcessBatch(input_signal)[0])
+
+
+def test_compiled_model_with_output_cache():
+    """
+    Test whether the compiled execution plan gives the correct outputs for different input signals, when the output
+    cache is enabled, although the plan passes the same input buffer to the preprocessing on every call.
+    """
+    branches = 3
+    sampling_rate = 48000
+    length = 2 ** 10
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    batches = [numpy.array(sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=length,
+                                                        seed=seed).GetSignal().GetChannels()) for seed in ("a", "b")]
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1) for i in range(branches)],
+                                     filter_impulseresponses=filter_irs,
+                                     aliasing_compensation=nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation())
+    references = [HGM.ProcessBatch(batch.copy(), sampling_rate=sampling_rate) for batch in batches]
+    previous_cache = nlsp.common.helper_functions_private.get_output_cache()
+    nlsp.common.helper_functions_private.set_output_cache(nlsp.common.helper_functions_private.OutputCache())
+    try:
+        compiled = HGM.Compile(length=length, sampling_rate=sampling_rate)
+        for batch, reference in zip(batches + batches, references + references):
+            assert numpy.allclose(compiled.Process(batch), reference)
+    finally:
+        nlsp.common.helper_functions_private.set_output_cache(previous_cache)
+
+
+def test_process_batch_reused_buffer():
+    """
+    Test whether the batch processing gives the correct output, when the same array is processed again after it has
+    been changed in place.
+    """
+    branches = 3
+    sampling_rate = 48000
+    length = 2 ** 10
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    batches = [numpy.array(sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=length,
+                                                        seed=seed).GetSignal().GetChannels()) for seed in ("a", "b")]
+    for aliasing_compensation in (nlsp.aliasing_compensation.NoAliasingCompensation(),
+                                  nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation()):
+        HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(i + 1)
+                                                              for i in range(branches)],
+                                         filter_impulseresponses=filter_irs,
+                                         aliasing_compensation=aliasing_compensation)
+        references = [HGM.CreateModified().ProcessBatch(batch.copy(), sampling_rate=sampling_rate)
+                      for batch in batches]
+        buffer = numpy.empty_like(batches[0])
+        for batch, reference in zip(batches + batches, references + references):
+            buffer[:] = batch
+            assert numpy.allclose(HGM.ProcessBatch(buffer, sampling_rate=sampling_rate), reference)
+
+
+def test_compiled_model_with_antiderivative_antialiasing():
+    """
+    Test whether the compiled execution plan computes the antiderivative anti-aliasing of the clipping blocks for each
+    input signal separately, so that the state of one signal does not affect the next one.
+    """
+    sampling_rate = 48000
+    length = 2 ** 10
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=2, sampling_rate=sampling_rate)
+    batch = numpy.array([sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=length,
+                                                      seed=seed).GetSignal().GetChannels()[0] for seed in ("a", "b")])
+    clipper = nlsp.nonlinear_function.HardClip(clipping_threshold=[-0.5, 0.5], antiderivative_order=1)
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(1), clipper],
+                                     filter_impulseresponses=filter_irs)
+    reference = HGM.ProcessBatch(batch, sampling_rate=sampling_rate)
+    assert numpy.allclose(HGM.ProcessBatch(batch[1:], sampling_rate=sampling_rate), reference[1:])
+    compiled = HGM.Compile(length=length, sampling_rate=sampling_rate, signals=2)
+    assert numpy.allclose(compiled.Process(batch), reference)
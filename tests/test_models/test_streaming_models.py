@@ -0,0 +1,263 @@
+import os
+import shutil
+import struct
+import tempfile
+import numpy
+import sumpf
+import nlsp
+
+
+def test_streaming_hammerstein_model():
+    """
+    Test whether the block based simulation of the Hammerstein model is equal to the linear convolution of the
+    nonlinearly processed signal with the filter kernel.
+    """
+    sampling_rate = 48000
+    block_length = 2 ** 9
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 14, seed="signal").GetSignal()
+    filter_kernel = nlsp.helper_functions.create_arrayof_bpfilter(branches=1, sampling_rate=sampling_rate)[0]
+    model = nlsp.StreamingHammersteinModel(nonlinear_function=nlsp.nonlinear_function.Power(degree=2),
+                                           filter_impulseresponse=filter_kernel, block_length=block_length)
+    output = numpy.asarray(model.ProcessSignal(input_signal).GetChannels()[0])
+    reference = numpy.convolve(numpy.asarray(input_signal.GetChannels()[0]) ** 2,
+                               numpy.asarray(filter_kernel.GetChannels()[0]))[:len(input_signal)]
+    assert numpy.allclose(output, reference)
+    first_block = model.ProcessBlock(numpy.asarray(input_signal.GetChannels()[0][:block_length]))
+    assert len(first_block) == block_length
+
+
+def test_partitioned_convolution():
+    """
+    Test whether the streaming HGM with partitioned convolution gives the same output as the one with overlap-save
+    convolution, when the filter kernels are much longer than the blocks.
+    """
+    sampling_rate = 48000
+    branches = 3
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 14, seed="signal").GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=2 ** 13)
+    nonlinear_functions = [nlsp.nonlinear_function.Power(degree=i + 1) for i in range(branches)]
+    overlap_save = nlsp.StreamingHammersteinGroupModel(nonlinear_functions=nonlinear_functions,
+                                                       filter_impulseresponses=filter_irs, block_length=2 ** 7)
+    partitioned_method = nlsp.StreamingHammersteinGroupModel.PARTITIONED
+    partitioned = nlsp.StreamingHammersteinGroupModel(nonlinear_functions=nonlinear_functions,
+                                                      filter_impulseresponses=filter_irs, block_length=2 ** 7,
+                                                      convolution_method=partitioned_method)
+    output_overlap_save = numpy.asarray(overlap_save.ProcessSignal(input_signal).GetChannels())
+    output_partitioned = numpy.asarray(partitioned.ProcessSignal(input_signal).GetChannels())
+    assert numpy.allclose(output_overlap_save, output_partitioned)
+    convolution = nlsp.common.block_convolution.PartitionedConvolution(filter_kernel=numpy.ones(2 ** 12),
+                                                                       block_length=2 ** 6,
+                                                                       maximum_partition_length=2 ** 6)
+    assert convolution.GetPartitionLengths() == [2 ** 6] * 2 ** 6
+
+
+def test_partitioned_convolution_effort():
+    """
+    Test whether the partitioned convolution distributes the computation of the long partitions over the blocks, so
+    that the worst case effort per block stays close to the average effort and grows much slower than the length of
+    the filter kernel, and whether the output is equal to the linear convolution.
+    """
+    block_length = 2 ** 6
+    input_samples = numpy.asarray(sumpf.modules.NoiseGenerator(samplingrate=48000, length=2 ** 16,
+                                                               seed="signal").GetSignal().GetChannels()[0])
+    worst_cases = []
+    for kernel_length in (2 ** 12, 2 ** 14):
+        kernel = numpy.asarray(sumpf.modules.NoiseGenerator(samplingrate=48000, length=kernel_length,
+                                                            seed="kernel").GetSignal().GetChannels()[0])
+        convolution = nlsp.common.block_convolution.PartitionedConvolution(filter_kernel=kernel,
+                                                                           block_length=block_length)
+        output = []
+        operations = []
+        for i in range(0, len(input_samples), block_length):
+            count = convolution._GetOperationCount()
+            output.append(convolution.ProcessBlock(input_samples[i:i + block_length]))
+            operations.append(convolution._GetOperationCount() - count)
+        reference = numpy.convolve(input_samples, kernel)[:len(input_samples)]
+        assert numpy.allclose(numpy.concatenate(output), reference)
+        # skip the blocks, in which the delay lines are filled
+        operations = operations[2 * kernel_length // block_length:]
+        assert max(operations) < 4.0 * numpy.mean(operations)
+        worst_cases.append(max(operations))
+    assert worst_cases[1] < 1.5 * worst_cases[0]
+
+
+def test_file_simulation():
+    """
+    Test whether the simulation of a model on a memory mapped file gives the same output as the streaming model, also
+    for a model, that has been saved and retrieved.
+    """
+    sampling_rate = 48000
+    branches = 3
+    directory = tempfile.mkdtemp()
+    input_filename = os.path.join(directory, "input.npy")
+    output_filename = os.path.join(directory, "output.npy")
+    model_filename = os.path.join(directory, "model.npz")
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=10000, seed="signal").GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate)
+    model = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(degree=i + 1)
+                                                            for i in range(branches)],
+                                       filter_impulseresponses=filter_irs)
+    nlsp.SaveHGMModel(filename=model_filename, model=model)
+    retrieved_model = nlsp.RetrieveHGMModel(filename=model_filename).GetModel()
+    reference = nlsp.create_streaming_model(model, block_length=2 ** 8).ProcessSignal(input_signal)
+    numpy.save(input_filename, numpy.asarray(input_signal.GetChannels()))
+    for m in (model, retrieved_model):
+        nlsp.simulate_file(m, input_filename, output_filename, block_length=2 ** 8, chunk_length=3000)
+        output = numpy.load(output_filename)
+        assert output.shape == (1, len(input_signal))
+        assert numpy.allclose(output, numpy.asarray(reference.GetChannels()))
+    shutil.rmtree(directory)
+
+
+def test_wave_file_simulation():
+    """
+    Test whether the simulation writes a .wav file with the format and the fact chunk of the floating point format,
+    whose samples are equal to the output of the streaming model, and whether outputs, which are too long for a .wav
+    file, are rejected, before the file is created.
+    """
+    sampling_rate = 48000
+    directory = tempfile.mkdtemp()
+    input_filename = os.path.join(directory, "input.npy")
+    output_filename = os.path.join(directory, "output.wav")
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=5000, seed="signal").GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=2, sampling_rate=sampling_rate)
+    model = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(degree=i + 1)
+                                                            for i in range(2)],
+                                       filter_impulseresponses=filter_irs)
+    reference = nlsp.create_streaming_model(model, block_length=2 ** 8).ProcessSignal(input_signal)
+    numpy.save(input_filename, numpy.asarray(input_signal.GetChannels()))
+    nlsp.simulate_file(model, input_filename, output_filename, block_length=2 ** 8)
+    with open(output_filename, "rb") as f:
+        header = f.read(58)
+    assert header[12:16] == b"fmt " and struct.unpack("<I", header[16:20])[0] == 18
+    assert struct.unpack("<H", header[36:38])[0] == 0
+    assert header[38:42] == b"fact" and struct.unpack("<II", header[42:50]) == (4, len(input_signal))
+    assert header[50:54] == b"data"
+    assert struct.unpack("<I", header[4:8])[0] + 8 == os.path.getsize(output_filename)
+    output = nlsp.models.file_simulation._MappedSignalFile.Open(output_filename).Read(0, len(input_signal))
+    assert numpy.allclose(output, numpy.asarray(reference.GetChannels()), atol=1e-6)
+    try:
+        nlsp.models.file_simulation._MappedSignalFile.Create(os.path.join(directory, "long.wav"), channels=2,
+                                                             samples=2 ** 29, sampling_rate=sampling_rate)
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert not os.path.exists(os.path.join(directory, "long.wav"))
+    shutil.rmtree(directory)
+
+
+def test_realtime_processor():
+    """
+    Test whether the real-time processor gives the same output as the streaming model for filters, which are much
+    longer than the blocks, whether it measures the processing time of the blocks and whether it rejects nonlinear
+    functions, which can not be computed in place.
+    """
+    sampling_rate = 48000
+    block_length = 2 ** 7
+    branches = 4
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed="signal").GetSignal()
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=2 ** 11)
+    nonlinear_functions = [nlsp.nonlinear_function.Power(degree=1), nlsp.nonlinear_function.Power(degree=3),
+                           nlsp.nonlinear_function.HardClip(clipping_threshold=[-0.5, 0.5]),
+                           nlsp.nonlinear_function.Chebyshev(degree=2)]
+    model = nlsp.HammersteinGroupModel(nonlinear_functions=nonlinear_functions, filter_impulseresponses=filter_irs)
+    reference = numpy.asarray(nlsp.create_streaming_model(model, block_length=block_length).
+                              ProcessSignal(input_signal).GetChannels()[0])
+    processor = nlsp.RealtimeProcessor(model, block_length=block_length)
+    samples = numpy.asarray(input_signal.GetChannels()[0])
+    output = numpy.zeros(len(samples))
+    for i in range(0, len(samples), block_length):
+        processor.ProcessBlock(samples[i:i + block_length], output[i:i + block_length])
+    assert numpy.allclose(output, reference)
+    assert processor.GetLatency() == block_length
+    assert processor.GetWorstCaseProcessingTime() > 0.0
+    assert processor.GetWorstCaseLatency() > float(block_length) / sampling_rate
+    processor.ResetStatistics()
+    assert processor.GetWorstCaseProcessingTime() == 0.0
+    lookup_table = nlsp.nonlinear_function.LookupTable(transfer_curve=numpy.tanh, maximum_harmonics=3)
+    model = nlsp.HammersteinGroupModel(nonlinear_functions=[lookup_table], filter_impulseresponses=filter_irs[:1])
+    try:
+        nlsp.RealtimeProcessor(model, block_length=block_length)
+    except NotImplementedError:
+        pass
+    else:
+        assert False
+
+
+def test_nonlinear_functions_with_memory():
+    """
+    Test whether the block based simulations reject the soft clipping, which would otherwise normalize every block to
+    its own peak, and the clipping with antiderivative anti-aliasing, whose state would otherwise be restarted at the
+    beginning of every block or segment.
+    """
+    sampling_rate = 48000
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=2, sampling_rate=sampling_rate)
+    input_signal = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 10, seed="signal").GetSignal()
+    for nonlinear_function in (nlsp.nonlinear_function.SoftClip(clipping_threshold=[-0.8, 0.8]),
+                               nlsp.nonlinear_function.HardClip(antiderivative_order=1)):
+        model = nlsp.HammersteinGroupModel(nonlinear_functions=[nlsp.nonlinear_function.Power(degree=1),
+                                                                nonlinear_function],
+                                           filter_impulseresponses=filter_irs)
+        for simulate in (lambda: nlsp.create_streaming_model(model),
+                         lambda: nlsp.StreamingHammersteinModel(nonlinear_function=nonlinear_function),
+                         lambda: nlsp.RealtimeProcessor(model),
+                         lambda: nlsp.simulate_parallel(model, input_signal, processes=1)):
+            try:
+                simulate()
+            except NotImplementedError:
+                pass
+            else:
+                assert False
+
+
+def test_streaming_aliasing_compensation():
+    """
+    Test whether the streaming model and the real-time processor with the polyphase upsampling compensation give the
+    same output as the simulation of the whole signal, apart from the delay of their causal resamplers. The input
+    signal starts and ends with zeros, so that the resamplers have settled at its borders.
+    """
+    sampling_rate = 48000
+    block_length = 2 ** 7
+    branches = 3
+    noise = sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 12, seed="signal").GetSignal()
+    samples = numpy.asarray(noise.GetChannels()[0])
+    samples[:2 ** 6] = 0.0
+    samples[-2 ** 7:] = 0.0
+    input_signal = sumpf.Signal(channels=(tuple(samples),), samplingrate=sampling_rate, labels=("Noise",))
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=branches, sampling_rate=sampling_rate,
+                                                               filter_length=300)
+    nonlinear_functions = [nlsp.nonlinear_function.Power(degree=i + 1) for i in range(branches)]
+    resampling = nlsp.aliasing_compensation.PolyphaseResampling()
+    for aliasing_compensation in (nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation(
+                                      resampling_algorithm=resampling),
+                                  nlsp.aliasing_compensation.ReducedUpsamplingAliasingCompensation(
+                                      resampling_algorithm=resampling)):
+        model = nlsp.HammersteinGroupModel(nonlinear_functions=nonlinear_functions, filter_impulseresponses=filter_irs,
+                                           aliasing_compensation=aliasing_compensation,
+                                           convolution_strategy=nlsp.common.convolution_strategy.ConvolutionStrategy())
+        reference = model.ProcessBatch(numpy.array([samples]), sampling_rate=sampling_rate)[0]
+        streaming_model = nlsp.create_streaming_model(model, block_length=block_length)
+        delay = streaming_model.GetDelay()
+        assert delay == 2 * resampling.GetTapsPerPhase()
+        assert numpy.allclose(numpy.asarray(streaming_model.ProcessSignal(input_signal).GetChannels()[0]), reference)
+        processor = nlsp.RealtimeProcessor(model, block_length=block_length)
+        assert processor.GetLatency() == block_length + delay
+        blocks = -(-(len(samples) + delay) // block_length)
+        padded = numpy.zeros(blocks * block_length)
+        padded[:len(samples)] = samples
+        output = numpy.zeros(len(padded))
+        for i in range(0, len(padded), block_length):
+            processor.ProcessBlock(padded[i:i + block_length], output[i:i + block_length])
+        assert numpy.allclose(output[delay:delay + len(samples)], reference)
+    model = nlsp.HammersteinGroupModel(nonlinear_functions=nonlinear_functions, filter_impulseresponses=filter_irs,
+                                       aliasing_compensation=nlsp.aliasing_compensation.LowpassAliasingCompensation())
+    for simulate in (lambda: nlsp.create_streaming_model(model), lambda: nlsp.RealtimeProcessor(model)):
+        try:
+            simulate()
+        except NotImplementedError:
+            pass
+        else:
+            assert False
@@ -1,3 +1,4 @@
+import numpy
 import sumpf
 import nlsp
 
@@ -29,3 +30,213 @@ def test_create_modified_method():
     energy1 = nlsp.common.helper_functions_private.calculateenergy_timedomain(model1.GetOutput())
     energy2 = nlsp.common.helper_functions_private.calculateenergy_timedomain(model2.GetOutput())
     assert energy1 == energy2
+
+
+def test_power_series():
+    """
+    Test, if the Power blocks, that share a polynomial series, compute the same output as the separate Power blocks,
+    and if the series recomputes the powers of an array, which has been changed in place.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    power_series = nlsp.nonlinear_functions.PolynomialSeries()
+    for degree in (3, 1, 5, 2):
+        reference = nlsp.nonlinear_functions.Power(degree=degree, input_signal=signal)
+        shared = nlsp.nonlinear_functions.Power(degree=degree, input_signal=signal)
+        shared._SetPolynomialSeries(power_series)
+        for r, s in zip(reference.GetOutput().GetChannels(), shared.GetOutput().GetChannels()):
+            for a, b in zip(r, s):
+                assert abs(a - b) <= 1e-12 * max(abs(a), 1.0)
+    assert power_series.GetPolynomial(signal, 4, nlsp.nonlinear_functions.power_recurrence,
+                                      lambda s: s.GetChannels()) is \
+           power_series.GetPolynomial(signal, 4, nlsp.nonlinear_functions.power_recurrence, lambda s: s.GetChannels())
+    samples = numpy.array([[1.0, 2.0, 3.0]])
+    assert numpy.allclose(power_series.GetPolynomial(samples, 3, nlsp.nonlinear_functions.power_recurrence),
+                          [[1.0, 8.0, 27.0]])
+    samples[:] = [[4.0, 5.0, 6.0]]
+    assert numpy.allclose(power_series.GetPolynomial(samples, 3, nlsp.nonlinear_functions.power_recurrence),
+                          [[64.0, 125.0, 216.0]])
+
+
+def test_array_output():
+    """
+    Test, if the array output of the nonlinear blocks equals the output signal and if array signals can be used as
+    input signals.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    array_signal = nlsp.common.helper_functions_private.ArraySignal.FromSignal(signal)
+    assert array_signal.GetChannels() == signal.GetChannels()
+    for nl_function in (nlsp.nonlinear_functions.Power(degree=3), nlsp.nonlinear_functions.Legendre(degree=2),
+                        nlsp.nonlinear_functions.HardClip(clipping_threshold=[-0.5, 0.5])):
+        nl_function.SetInput(signal)
+        output = nl_function.GetOutput()
+        array_output = nl_function.GetArrayOutput()
+        assert array_output.GetChannels() == output.GetChannels()
+        assert array_output.GetSamplingRate() == output.GetSamplingRate()
+        nl_function.SetInput(array_signal)
+        assert nl_function.GetArrayOutput().GetChannels() == output.GetChannels()
+
+
+def test_orthogonal_polynomials():
+    """
+    Test whether the polynomial blocks, which are evaluated with three-term recurrences, give the same output as the
+    basis polynomials of numpy.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    samples = numpy.asarray(signal.GetChannels()[0])
+    for block, basis in ((nlsp.nonlinear_functions.Chebyshev, numpy.polynomial.Chebyshev),
+                         (nlsp.nonlinear_functions.Hermite, numpy.polynomial.HermiteE),
+                         (nlsp.nonlinear_functions.Legendre, numpy.polynomial.Legendre),
+                         (nlsp.nonlinear_functions.Laguerre, numpy.polynomial.Laguerre)):
+        for degree in range(1, 7):
+            nl_function = block(input_signal=signal, degree=degree)
+            output = numpy.asarray(nl_function.GetOutput().GetChannels()[0])
+            assert numpy.allclose(output, basis.basis(deg=degree)(samples))
+
+
+def test_polynomial_series():
+    """
+    Test whether the evaluation of all degrees of a polynomial family in one pass and the polynomial blocks, that share
+    a polynomial series, give the same output as the separate polynomial blocks.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    samples = numpy.asarray(signal.GetChannels())
+    polynomial_series = nlsp.nonlinear_functions.PolynomialSeries()
+    for block, recurrence in ((nlsp.nonlinear_functions.Power, nlsp.nonlinear_functions.power_recurrence),
+                              (nlsp.nonlinear_functions.Chebyshev, nlsp.nonlinear_functions.chebyshev_recurrence),
+                              (nlsp.nonlinear_functions.Hermite, nlsp.nonlinear_functions.hermite_recurrence),
+                              (nlsp.nonlinear_functions.Legendre, nlsp.nonlinear_functions.legendre_recurrence),
+                              (nlsp.nonlinear_functions.Laguerre, nlsp.nonlinear_functions.laguerre_recurrence)):
+        basis = nlsp.nonlinear_functions.evaluate_polynomial_basis(samples, 5, recurrence)
+        assert basis.shape == (5,) + samples.shape
+        for degree in (3, 1, 5, 2):
+            reference = numpy.asarray(block(degree=degree, input_signal=signal).GetOutput().GetChannels())
+            shared = block(degree=degree, input_signal=signal)
+            shared._SetPolynomialSeries(polynomial_series)
+            assert numpy.allclose(numpy.asarray(shared.GetOutput().GetChannels()), reference)
+            assert numpy.allclose(basis[degree - 1], reference)
+        assert numpy.allclose(polynomial_series.GetPolynomials(samples, 5, recurrence), basis)
+
+
+def test_clipping_functions():
+    """
+    Test whether the clipping blocks give the same output as clipping the samples with sumpf and whether the clipping
+    functions can process the samples in place.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    samples = numpy.asarray(signal.GetChannels()[0])
+    hard_clipper = nlsp.nonlinear_functions.HardClip(input_signal=signal, clipping_threshold=[-0.5, 0.7])
+    reference = sumpf.modules.ClipSignal(signal=signal, thresholds=[-0.5, 0.7]).GetOutput()
+    assert numpy.allclose(hard_clipper.GetOutput().GetChannels(), reference.GetChannels())
+    soft_clipper = nlsp.nonlinear_functions.SoftClip(input_signal=signal, clipping_threshold=[-0.8, 0.8])
+    reference = nlsp.sumpf.SoftClipSignal(signal=signal, thresholds=[-0.8, 0.8]).GetOutput()
+    assert numpy.allclose(soft_clipper.GetOutput().GetChannels(), reference.GetChannels())
+    in_place = samples * 2.0
+    nlsp.nonlinear_functions.nonlinear_functions.hard_clip(thresholds=[-1.0, 1.0])(in_place, out=in_place)
+    assert numpy.allclose(in_place, numpy.clip(samples * 2.0, -1.0, 1.0))
+
+
+def test_soft_clipping_of_several_channels():
+    """
+    Test whether the soft clipping normalizes each channel of a signal and each signal of a batch separately, like
+    the soft clipping of the single channels with sumpf.
+    """
+    sampling_rate = 48000
+    channels = numpy.array([sumpf.modules.NoiseGenerator(samplingrate=sampling_rate, length=2 ** 10,
+                                                         seed=seed).GetSignal().GetChannels()[0]
+                            for seed in ("a", "b")])
+    channels[1] *= 3.0
+    signal = sumpf.Signal(channels=tuple(tuple(c) for c in channels), samplingrate=sampling_rate, labels=("a", "b"))
+    references = [numpy.asarray(nlsp.sumpf.SoftClipSignal(
+        signal=sumpf.Signal(channels=(tuple(c),), samplingrate=sampling_rate),
+        thresholds=[-0.8, 0.8]).GetOutput().GetChannels()[0]) for c in channels]
+    soft_clipper = nlsp.nonlinear_functions.SoftClip(input_signal=signal, clipping_threshold=[-0.8, 0.8])
+    assert numpy.allclose(soft_clipper.GetOutput().GetChannels(), references)
+    assert numpy.allclose(soft_clipper._GetArrayOutput(channels), references)
+    filter_irs = nlsp.helper_functions.create_arrayof_bpfilter(branches=1, sampling_rate=sampling_rate)
+    HGM = nlsp.HammersteinGroupModel(nonlinear_functions=[soft_clipper.CreateModified()],
+                                     filter_impulseresponses=filter_irs)
+    batch_output = HGM.ProcessBatch(channels, sampling_rate=sampling_rate)
+    for i, channel in enumerate(channels):
+        assert numpy.allclose(batch_output[i], HGM.ProcessBatch(channel, sampling_rate=sampling_rate)[0])
+
+
+def test_antiderivative_antialiasing():
+    """
+    Test whether the antiderivative anti-aliasing of the clipping blocks approximates the clipping for slowly varying
+    signals and whether it reduces the aliasing of a clipped high frequency sine wave.
+    """
+    sampling_rate = 48000.0
+    frequency = 5123.0
+    length = 2 ** 14
+    sine = 1.5 * numpy.sin(2.0 * numpy.pi * frequency / sampling_rate * numpy.arange(length))
+    signal = sumpf.Signal(channels=(tuple(sine),), samplingrate=sampling_rate, labels=("Sine",))
+    ramp = numpy.linspace(-2.0, 2.0, 10001)
+    frequencies = numpy.fft.rfftfreq(length, 1.0 / sampling_rate)
+    harmonics = numpy.zeros(len(frequencies), dtype=bool)
+    for k in range(1, int(sampling_rate / 2.0 / frequency) + 1):
+        harmonics |= numpy.abs(frequencies - k * frequency) < 30.0
+    for block in (nlsp.nonlinear_functions.HardClip, nlsp.nonlinear_functions.SoftClip):
+        ratios = []
+        for order in (0, 1, 2):
+            clipper = block(input_signal=signal, clipping_threshold=[-0.8, 0.8], antiderivative_order=order)
+            assert clipper.CreateModified().GetAntiderivativeOrder() == order
+            output = numpy.asarray(clipper.GetOutput().GetChannels()[0])
+            spectrum = numpy.abs(numpy.fft.rfft(output * numpy.hanning(length))) ** 2
+            ratios.append(numpy.sum(spectrum[harmonics]) / numpy.sum(spectrum[~harmonics]))
+            if order:
+                function = clipper._GetNonlinearFunction()
+                reference = block(clipping_threshold=[-0.8, 0.8])._GetNonlinearFunction()(ramp)
+                assert numpy.max(numpy.abs(function(ramp) - reference)) < 1e-3
+        assert ratios[0] < ratios[1] < ratios[2]
+
+
+def test_lookup_table():
+    """
+    Test whether the lookup table approximates the tabulated transfer curve with the linear and the cubic
+    interpolation and whether it can be used with an aliasing compensation in a Hammerstein model.
+    """
+    signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+    samples = numpy.asarray(signal.GetChannels()[0])
+    reference = numpy.tanh(3.0 * numpy.clip(samples, -1.0, 1.0))
+    for interpolation, tolerance in ((nlsp.nonlinear_functions.LookupTable.LINEAR, 1e-5),
+                                     (nlsp.nonlinear_functions.LookupTable.CUBIC, 1e-7)):
+        table = nlsp.nonlinear_functions.LookupTable(input_signal=signal, transfer_curve=lambda x: numpy.tanh(3.0 * x),
+                                                     interpolation=interpolation, maximum_harmonics=5)
+        output = numpy.asarray(table.GetOutput().GetChannels()[0])
+        assert numpy.max(numpy.abs(output - reference)) < tolerance
+    inputs, outputs = table.GetTable()
+    tabulated = nlsp.nonlinear_functions.LookupTable(input_signal=signal, transfer_curve=(inputs, outputs))
+    assert numpy.max(numpy.abs(numpy.asarray(tabulated.GetOutput().GetChannels()[0]) - reference)) < 1e-5
+    assert table.CreateModified().GetMaximumHarmonics() == 5
+    model = nlsp.HammersteinModel(input_signal=signal, nonlinear_function=table,
+                                  aliasing_compensation=nlsp.aliasing_compensation.FullUpsamplingAliasingCompensation())
+    assert len(model.GetOutput()) == len(signal)
+
+
+def test_output_cache():
+    """
+    Test whether the outputs of nonlinear blocks are taken from the shared output cache, when a block with the same
+    parameters processes an input signal with the same content, and whether the cache is bounded by its size.
+    """
+    previous_cache = nlsp.common.helper_functions_private.get_output_cache()
+    cache = nlsp.common.helper_functions_private.OutputCache(maximum_bytes=2 ** 20)
+    nlsp.common.helper_functions_private.set_output_cache(cache)
+    try:
+        outputs = []
+        for degree in (3, 3, 2):
+            signal = sumpf.modules.SweepGenerator(length=2 ** 12).GetSignal()
+            outputs.append(nlsp.nonlinear_functions.Hermite(input_signal=signal, degree=degree).GetOutput())
+        assert outputs[0] is outputs[1]
+        assert outputs[1] is not outputs[2]
+        assert cache.GetHits() == 1
+        assert cache.GetMisses() == 2
+        for threshold in numpy.linspace(0.1, 0.9, 16):
+            clipping_threshold = [-threshold, threshold]
+            nlsp.nonlinear_functions.HardClip(input_signal=signal, clipping_threshold=clipping_threshold).GetOutput()
+        assert 0 < cache.GetCachedBytes() <= cache.GetMaximumBytes()
+        nlsp.common.helper_functions_private.set_output_cache(None)
+        uncached = nlsp.nonlinear_functions.Hermite(input_signal=signal, degree=2).GetOutput()
+        assert uncached is not outputs[2]
+        assert uncached.GetChannels() == outputs[2].GetChannels()
+    finally:
+        nlsp.common.helper_functions_private.set_output_cache(previous_cache)